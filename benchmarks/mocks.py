@@ -0,0 +1,359 @@
+"""Local stand-ins for Etherscan v2, CoinMarketCap, SIM and an Ethereum JSON-RPC node.
+
+All four services run in one aiohttp app on a background thread and
+answer from a deterministic synthetic universe of ``name{i}.eth`` names:
+each has an address, a resolver ``addr``/``text``/``name`` record set
+(even-numbered addresses also set a reverse record), a balance, token
+holdings and a transfer history with a few other names and outside
+addresses. The RPC mock understands the ENS registry, the public
+resolver, the Universal Resolver (used by web3's ENS module) and
+Multicall3 ``aggregate3``.
+
+Each service has its own latency, jitter, slow-tail, error rate and rate
+limit (``ServiceConfig``). Extra JSON-RPC nodes with their own settings
+can be added as ``rpc_endpoints`` and are served on ``/rpc/<name>``, to
+exercise routing between several RPC URLs. Failures and throttles mimic the real providers:
+HTTP 500s, Etherscan's ``NOTOK``/"rate limit" body, CoinMarketCap and SIM
+429s and JSON-RPC ``-32005`` errors.
+"""
+import asyncio
+import random
+import threading
+import time
+from collections import defaultdict
+
+from aiohttp import web
+from ens.utils import normal_name_to_hash
+from eth_abi import decode, encode
+from eth_utils import function_signature_to_4byte_selector as selector, to_checksum_address
+
+
+SERVICES = ('etherscan', 'cmc', 'sim', 'rpc')
+ENS_REGISTRY = "0x00000000000C2E074eC69A0dFb2997BA6C7d2e1e"
+MULTICALL3 = "0xcA11bde05977b3631167028862bE2a173976CA11"
+PUBLIC_RESOLVER = "0x231b0Ee14048e9dCcD1d247744d114a4EB5E8E63"
+UNIVERSAL_RESOLVER = "0xeEeEEEeE14D718C2B47D9923Deab1335E144EeEe"
+ZERO = "0x" + "00" * 20
+ETH_PRICE = 2500.0
+
+AGGREGATE3 = selector("aggregate3((address,bool,bytes)[])")
+RESOLVER = selector("resolver(bytes32)")
+ADDR = selector("addr(bytes32)")
+COIN_ADDR = selector("addr(bytes32,uint256)")
+NAME = selector("name(bytes32)")
+TEXT = selector("text(bytes32,string)")
+CONTENTHASH = selector("contenthash(bytes32)")
+SUPPORTS_INTERFACE = selector("supportsInterface(bytes4)")
+UR_RESOLVE = selector("resolve(bytes,bytes)")
+
+
+def reverse_node(address):
+    return bytes(normal_name_to_hash(f"{address.lower()[2:]}.addr.reverse"))
+
+
+class ServiceConfig:
+    def __init__(self, latency=0.02, jitter=0.0, error_rate=0.0, rate_limit=None, tail_rate=0.0, tail_latency=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        # A ``tail_rate`` fraction of responses take ``tail_latency`` seconds longer
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+class _Bucket:
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+
+    def take(self):
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class Universe:
+    """Deterministic synthetic ENS names, records, balances and transfers."""
+
+    def __init__(self, size=2000, seed=7):
+        rng = random.Random(seed)
+        self.size = size
+        self.names = [f"name{i}.eth" for i in range(size)]
+        self.addresses = [to_checksum_address(f"0x{0xe000000000000000000000000000000000000000 + i:040x}") for i in range(size)]
+        self.records = {}
+        self.reverse = {}
+        for i, (name, address) in enumerate(zip(self.names, self.addresses)):
+            self.records[bytes(normal_name_to_hash(name))] = {
+                'addr': address,
+                'text': {'display': f"Name {i}", 'url': f"https://example.com/{i}", 'twitter': f"name{i}"},
+            }
+            if i % 2 == 0:
+                self.reverse[reverse_node(address)] = name
+
+        self.txs = defaultdict(lambda: defaultdict(list))
+        for i, address in enumerate(self.addresses):
+            address = address.lower()
+            for n in range(rng.randint(5, 15)):
+                if rng.random() < 0.6:
+                    other = self.addresses[(i + rng.choice((1, 2, 3, 5, 8, 13))) % size].lower()
+                else:
+                    other = f"0x{rng.getrandbits(160):040x}"
+                kind = rng.choice(('txlist', 'txlist', 'txlistinternal', 'tokentx'))
+                sender, recipient = (address, other) if rng.random() < 0.5 else (other, address)
+                tx = {
+                    'blockNumber': str(18_000_000 + i * 100 + n),
+                    'timeStamp': str(1_700_000_000 + i * 3600 + n * 60),
+                    'hash': f"0x{rng.getrandbits(256):064x}",
+                    'from': sender, 'to': recipient,
+                    'value': str(rng.randint(0, 5 * 10 ** 18)),
+                    'gasUsed': '21000', 'gasPrice': str(rng.randint(10, 50) * 10 ** 9), 'isError': '0',
+                }
+                if kind == 'txlistinternal':
+                    tx['traceId'] = '0'
+                rows = [tx]
+                if kind == 'tokentx':
+                    # Like Etherscan, no log index; some transactions carry two transfers (a swap or batch send)
+                    tx.update(tokenSymbol='USDC', tokenDecimal='6', contractAddress=ZERO)
+                    if rng.random() < 0.3:
+                        rows.append({**tx, 'value': str(rng.randint(0, 5 * 10 ** 18))})
+                self.txs[address][kind].extend(rows)
+                if other in self._address_index():
+                    self.txs[other][kind].extend(rows)
+        for kinds in self.txs.values():
+            for rows in kinds.values():
+                rows.sort(key=lambda tx: -int(tx['blockNumber']))
+
+    def _address_index(self):
+        if not hasattr(self, '_lower'):
+            self._lower = {address.lower() for address in self.addresses}
+        return self._lower
+
+    def balance(self, address, chainid=1):
+        if chainid != 1:
+            return (int(address, 16) * chainid % 1000) * 10 ** 15
+        return (int(address, 16) % 1000) * 10 ** 16
+
+    def call(self, target, data):
+        """Answer one contract call: ``(success, returndata)``."""
+        target, sig, arg = target.lower(), data[:4], data[4:]
+        if target == ENS_REGISTRY.lower() and sig == RESOLVER:
+            node = arg[:32]
+            known = node in self.records or node in self.reverse
+            return True, encode(["address"], [PUBLIC_RESOLVER if known else ZERO])
+        if target == PUBLIC_RESOLVER.lower():
+            node = arg[:32]
+            record = self.records.get(node, {})
+            if sig == ADDR:
+                return True, encode(["address"], [record.get('addr', ZERO)])
+            if sig == COIN_ADDR:
+                _, coin = decode(["bytes32", "uint256"], arg)
+                value = bytes.fromhex(record['addr'][2:]) if coin == 60 and record else b""
+                return True, encode(["bytes"], [value])
+            if sig == TEXT:
+                _, key = decode(["bytes32", "string"], arg)
+                return True, encode(["string"], [record.get('text', {}).get(key, "")])
+            if sig == NAME:
+                return True, encode(["string"], [self.reverse.get(node, "")])
+            if sig == CONTENTHASH:
+                return True, encode(["bytes"], [b""])
+            if sig == SUPPORTS_INTERFACE:
+                return True, encode(["bool"], [True])
+        if target == UNIVERSAL_RESOLVER.lower() and sig == UR_RESOLVE:
+            _, inner = decode(["bytes", "bytes"], arg)
+            node = inner[4:36]
+            if node not in self.records and node not in self.reverse:
+                return False, b""
+            ok, result = self.call(PUBLIC_RESOLVER, inner)
+            return ok, encode(["bytes", "address"], [result, PUBLIC_RESOLVER])
+        return False, b""
+
+
+class MockServers:
+    """Run all mocks on ``127.0.0.1:port``; ``env()`` points ensdata at them."""
+
+    def __init__(self, universe=None, configs=None, port=18645, seed=11, rpc_endpoints=None):
+        self.universe = universe or Universe()
+        self.configs = {service: ServiceConfig() for service in SERVICES}
+        self.configs.update(configs or {})
+        self.rpc_endpoints = dict(rpc_endpoints or {})
+        self.port = port
+        self.requests = defaultdict(int)
+        self._rng = random.Random(seed)
+        self._buckets = {}
+        self._loop = None
+        self._runner = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def rpc_url(self, endpoint):
+        """URL of the extra RPC node ``endpoint`` (a key of ``rpc_endpoints``)."""
+        return f"{self.url}/rpc/{endpoint}"
+
+    def env(self):
+        return {
+            'ETHERSCAN_API_URL': f"{self.url}/etherscan/v2/api",
+            'COINMARKETCAP_API_URL': f"{self.url}/cmc/v1",
+            'SIM_API_URL': f"{self.url}/sim/v1/evm",
+            'ETH_RPC_URL': f"{self.url}/rpc",
+            'ETHERSCAN_API_KEY': 'mock', 'COINMARKETCAP_API_KEY': 'mock', 'SIM_API_KEY': 'mock',
+        }
+
+    def start(self):
+        app = web.Application()
+        app.router.add_get('/etherscan/v2/api', self._etherscan)
+        app.router.add_get('/cmc/v1/cryptocurrency/quotes/latest', self._cmc)
+        app.router.add_get('/sim/v1/evm/balances/{address}', self._sim)
+        app.router.add_post('/rpc', self._rpc)
+        app.router.add_post('/rpc/{endpoint}', self._rpc)
+        self._loop = asyncio.new_event_loop()
+        self._runner = web.AppRunner(app, access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+        self._loop.run_until_complete(web.TCPSite(self._runner, '127.0.0.1', self.port).start())
+        threading.Thread(target=self._loop.run_forever, name="mock-servers", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    async def _gate(self, service, endpoint=None):
+        """Apply latency, then return ``'error'``, ``'throttled'`` or None."""
+        self.requests[service] += 1
+        config = self.configs[service]
+        if endpoint is not None:
+            self.requests[f"{service}/{endpoint}"] += 1
+            config = self.rpc_endpoints[endpoint]
+        latency = config.latency + self._rng.uniform(-config.jitter, config.jitter)
+        if config.tail_rate and self._rng.random() < config.tail_rate:
+            latency += config.tail_latency
+        await asyncio.sleep(max(0.0, latency))
+        if config.rate_limit:
+            bucket = self._buckets.setdefault(endpoint or service, _Bucket(config.rate_limit))
+            if not bucket.take():
+                return 'throttled'
+        if config.error_rate and self._rng.random() < config.error_rate:
+            return 'error'
+        return None
+
+    async def _etherscan(self, request):
+        outcome = await self._gate('etherscan')
+        if outcome == 'error':
+            return web.json_response({'error': 'internal'}, status=500)
+        if outcome == 'throttled':
+            return web.json_response({'status': '0', 'message': 'NOTOK', 'result': 'Max rate limit reached'})
+        q = request.query
+        module, action = q.get('module'), q.get('action')
+        chainid = int(q.get('chainid', 1))
+        if module == 'account' and action == 'balance':
+            return _ok(str(self.universe.balance(q['address'], chainid)))
+        if module == 'account' and action == 'balancemulti':
+            return _ok([{'account': a, 'balance': str(self.universe.balance(a, chainid))} for a in q['address'].split(',')])
+        if module == 'account' and action in ('txlist', 'txlistinternal', 'tokentx'):
+            start, end = int(q.get('startblock', 0)), int(q.get('endblock', 99999999))
+            rows = [
+                tx for tx in self.universe.txs.get(q['address'].lower(), {}).get(action, [])
+                if start <= int(tx['blockNumber']) <= end
+            ]
+            rows = rows[:int(q.get('offset', 10000))]
+            if not rows:
+                return web.json_response({'status': '0', 'message': 'No transactions found', 'result': []})
+            return _ok(rows)
+        if module == 'nametag' and action == 'getaddresstag':
+            return _ok({'address': q['address'], 'nameTag': None})
+        return web.json_response({'status': '0', 'message': 'NOTOK', 'result': f"Unsupported {module}/{action}"})
+
+    async def _cmc(self, request):
+        outcome = await self._gate('cmc')
+        if outcome == 'error':
+            return web.json_response({'status': {'error_code': 500}}, status=500)
+        if outcome == 'throttled':
+            return web.json_response({'status': {'error_code': 1008, 'error_message': 'rate limit'}}, status=429)
+        symbol = request.query.get('symbol', 'ETH')
+        return web.json_response({'status': {'error_code': 0}, 'data': {symbol: {'quote': {'USD': {'price': ETH_PRICE}}}}})
+
+    async def _sim(self, request):
+        outcome = await self._gate('sim')
+        if outcome == 'error':
+            return web.json_response({'error': 'internal'}, status=500)
+        if outcome == 'throttled':
+            return web.json_response({'error': 'rate limit'}, status=429)
+        address = request.match_info['address']
+        balances = []
+        for chainid in (int(c) for c in request.query.get('chain_ids', '1').split(',')):
+            chain = 'ethereum' if chainid == 1 else f"chain-{chainid}"
+            eth = self.universe.balance(address, chainid)
+            usdc = int(address, 16) * chainid % 10 ** 10
+            balances += [
+                {'chain': chain, 'chain_id': chainid, 'address': 'native', 'symbol': 'ETH', 'name': 'Ether',
+                 'decimals': 18, 'amount': str(eth), 'price_usd': ETH_PRICE, 'value_usd': eth / 10 ** 18 * ETH_PRICE},
+                {'chain': chain, 'chain_id': chainid, 'address': ZERO, 'symbol': 'USDC', 'name': 'USD Coin',
+                 'decimals': 6, 'amount': str(usdc), 'price_usd': 1.0, 'value_usd': usdc / 10 ** 6},
+            ]
+        return web.json_response({'wallet_address': address, 'balances': balances})
+
+    async def _rpc(self, request):
+        endpoint = request.match_info.get('endpoint')
+        if endpoint is not None and endpoint not in self.rpc_endpoints:
+            return web.Response(text="unknown endpoint", status=404)
+        # Read the body first: hedged requests that lose the race are dropped by the client mid-wait
+        body = await request.json()
+        outcome = await self._gate('rpc', endpoint)
+        if outcome == 'error':
+            return web.Response(text="internal error", status=500)
+        if outcome == 'throttled':
+            return web.json_response({'jsonrpc': '2.0', 'id': None, 'error': {'code': -32005, 'message': 'rate limited'}})
+        items = body if isinstance(body, list) else [body]
+        replies = [self._rpc_item(item) for item in items]
+        return web.json_response(replies if isinstance(body, list) else replies[0])
+
+    def _rpc_item(self, item):
+        method, params = item.get('method'), item.get('params') or []
+        reply = {'jsonrpc': '2.0', 'id': item.get('id')}
+        if method == 'eth_chainId':
+            return {**reply, 'result': '0x1'}
+        if method == 'eth_blockNumber':
+            return {**reply, 'result': hex(19_000_000)}
+        if method == 'eth_getBlockByNumber':
+            return {**reply, 'result': _block(19_000_000)}
+        if method == 'eth_getBalance':
+            return {**reply, 'result': hex(self.universe.balance(params[0]))}
+        if method == 'eth_getLogs':
+            return {**reply, 'result': []}
+        if method == 'eth_call':
+            target, data = params[0]['to'], bytes.fromhex(params[0]['data'][2:])
+            if target.lower() == MULTICALL3.lower() and data[:4] == AGGREGATE3:
+                (calls,) = decode(["(address,bool,bytes)[]"], data[4:])
+                results = [self.universe.call(t, calldata) for t, _, calldata in calls]
+                return {**reply, 'result': "0x" + encode(["(bool,bytes)[]"], [results]).hex()}
+            ok, result = self.universe.call(target, data)
+            if not ok:
+                return {**reply, 'error': {'code': 3, 'message': 'execution reverted', 'data': '0x'}}
+            return {**reply, 'result': "0x" + result.hex()}
+        return {**reply, 'error': {'code': -32601, 'message': f"method {method} not found"}}
+
+
+def _block(number):
+    return {
+        'number': hex(number), 'hash': "0x" + f"{number:064x}", 'parentHash': "0x" + f"{number - 1:064x}",
+        'timestamp': hex(int(time.time())), 'transactions': [], 'gasLimit': hex(30_000_000), 'gasUsed': '0x0',
+        'miner': ZERO, 'difficulty': '0x0', 'totalDifficulty': '0x0', 'extraData': '0x', 'size': '0x0',
+        'nonce': '0x0000000000000000', 'sha3Uncles': "0x" + "00" * 32, 'logsBloom': "0x" + "00" * 256,
+        'transactionsRoot': "0x" + "00" * 32, 'stateRoot': "0x" + "00" * 32, 'receiptsRoot': "0x" + "00" * 32,
+        'mixHash': "0x" + "00" * 32, 'baseFeePerGas': hex(10 ** 9), 'uncles': [],
+    }
+
+
+def _ok(result):
+    return web.json_response({'status': '1', 'message': 'OK', 'result': result})
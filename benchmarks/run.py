@@ -0,0 +1,468 @@
+"""Benchmark the lookup, graph and batch paths against local mock upstreams.
+
+    python benchmarks/run.py -o results.json
+    python benchmarks/run.py --scenarios graph_build --sizes 10 100 --latency 0.05 -o slow.json
+    python benchmarks/run.py -o new.json --compare results.json
+
+Every scenario runs against ``benchmarks/mocks.py`` (no API keys or
+network needed) with a cold cache unless it says otherwise. Results are
+written as JSON: ``meta`` (git revision, Python, mock and rate settings)
+plus one entry per scenario with timings in seconds and the upstream
+request counts it caused, so files from different versions can be
+compared with ``--compare``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'frontend'))
+from mocks import SERVICES, MockServers, ServiceConfig, Universe
+
+SCENARIOS = (
+    'cold_start', 'main_lookup', 'concurrent_lookup', 'rpc_routing', 'api', 'graph_build', 'layout_render', 'batch_cli',
+)
+BENCH_RATE = '1000'
+
+
+def _percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def _summary(samples):
+    return {
+        'runs': len(samples),
+        'p50_s': _percentile(samples, 0.5),
+        'p95_s': _percentile(samples, 0.95),
+        'mean_s': statistics.fmean(samples),
+    }
+
+
+def _upstream_requests():
+    from ensdata import get_metrics
+
+    counts = {}
+    for row in get_metrics().snapshot():
+        counts[row['provider']] = counts.get(row['provider'], 0) + row['requests']
+    return counts
+
+
+def _delta(before, after):
+    return {provider: after[provider] - before.get(provider, 0) for provider in sorted(after) if after[provider] != before.get(provider, 0)}
+
+
+class Measure:
+    """Time a block and record the upstream requests made inside it."""
+
+    def __enter__(self):
+        self.requests_before = _upstream_requests()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self.start
+        self.requests = _delta(self.requests_before, _upstream_requests())
+
+
+def _reset():
+    from ensdata import get_cache
+
+    get_cache().clear()
+
+
+COLD_START = """
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+app = AppTest.from_file(sys.argv[1]).run(timeout=120)
+rendered = time.perf_counter()
+time.sleep(float(sys.argv[3]))
+clicked = time.perf_counter()
+app.text_input[0].input(sys.argv[2])
+app.button[-1].click().run(timeout=120)
+print(json.dumps({
+    'landing_render_s': rendered - imported, 'first_lookup_s': time.perf_counter() - clicked,
+    'errors': len(app.exception),
+}))
+"""
+
+
+def bench_cold_start(universe, args, env):
+    """Fresh-process render of the landing page, then its first lookup ``--think-time`` later."""
+    samples = []
+    for _ in range(args.cold_runs):
+        out = subprocess.run(
+            [sys.executable, '-c', COLD_START, os.path.join(ROOT, 'frontend', 'app.py'), universe.names[0], str(args.think_time)],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+    return {
+        'landing_render': _summary([sample['landing_render_s'] for sample in samples]),
+        'first_lookup': _summary([sample['first_lookup_s'] for sample in samples]),
+        'errors': sum(sample['errors'] for sample in samples),
+    }
+
+
+def bench_main_lookup(universe, args):
+    from ensdata import address_metrics, main_lookup, run
+
+    cold, warm, metrics, requests = [], [], [], {}
+    for i in range(args.runs):
+        name = universe.names[i]
+        _reset()
+        with Measure() as m:
+            result = run(main_lookup(name))
+        assert result and result['address'] == universe.addresses[i], f"lookup of {name} failed"
+        cold.append(m.seconds)
+        requests = m.requests
+        with Measure() as m:
+            run(main_lookup(name))
+        warm.append(m.seconds)
+        with Measure() as m:
+            run(address_metrics(result['address']))
+        metrics.append(m.seconds)
+    return {
+        'cold': _summary(cold), 'warm': _summary(warm), 'address_metrics': _summary(metrics),
+        'upstream_requests_cold': requests,
+    }
+
+
+def bench_concurrent_lookup(universe, args):
+    """``--sessions`` threads look up the same cold name at once, as when a name is trending."""
+    from ensdata import get_singleflight, main_lookup, run
+
+    name = universe.names[0]
+    _reset()
+    before = get_singleflight().stats()['providers']
+    barrier = threading.Barrier(args.sessions)
+    latencies, failures = [], []
+
+    def session():
+        barrier.wait()
+        started = time.perf_counter()
+        try:
+            result = run(main_lookup(name))
+            assert result and result['address'] == universe.addresses[0]
+        except Exception as e:
+            failures.append(repr(e))
+        latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=session) for _ in range(args.sessions)]
+    with Measure() as m:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    after = get_singleflight().stats()['providers']
+    return {
+        'sessions': args.sessions, 'seconds': m.seconds, 'latency': _summary(latencies), 'failures': len(failures),
+        'upstream_requests': m.requests,
+        'coalesced': {
+            provider: counts['coalesced'] - before.get(provider, {}).get('coalesced', 0)
+            for provider, counts in sorted(after.items())
+        },
+    }
+
+
+def bench_rpc_routing(universe, args, mocks):
+    """One RPC URL with a slow tail, then routing over two such URLs plus one that is down."""
+    from ensdata import RPCPool, get_client, run
+
+    client = get_client()
+
+    async def fire(send):
+        semaphore = asyncio.Semaphore(10)
+
+        async def one(i):
+            payload = {'jsonrpc': '2.0', 'id': i, 'method': 'eth_getBalance', 'params': [universe.addresses[i % len(universe.addresses)], 'latest']}
+            async with semaphore:
+                started = time.perf_counter()
+                await send(payload)
+                return time.perf_counter() - started
+
+        return await asyncio.gather(*(one(i) for i in range(args.rpc_requests)))
+
+    def summary(samples):
+        return {**_summary(samples), 'p99_s': _percentile(samples, 0.99), 'max_s': max(samples)}
+
+    single = run(fire(lambda payload: client.post_json(mocks.rpc_url('a'), payload, provider='rpc')))
+    before = {endpoint: mocks.requests[f"rpc/{endpoint}"] for endpoint in mocks.rpc_endpoints}
+    pool = RPCPool([mocks.rpc_url(endpoint) for endpoint in ('c', 'a', 'b')])
+    routed = run(fire(lambda payload: client.post_json(None, payload, provider='rpc', pool=pool)))
+    return {
+        'requests': args.rpc_requests,
+        'single': summary(single),
+        'routed': summary(routed),
+        'endpoints': {
+            endpoint: {**row, 'mock_requests': mocks.requests[f"rpc/{endpoint}"] - before[endpoint]}
+            for endpoint, row in zip(('c', 'a', 'b'), pool.stats())
+        },
+    }
+
+
+def bench_api(universe, args):
+    """The JSON API served by uvicorn: single profiles, then one NDJSON batch of ``--batch-names``."""
+    import aiohttp
+    import uvicorn
+    from ensdata import create_app
+
+    server = uvicorn.Server(uvicorn.Config(create_app(), host='127.0.0.1', port=args.port + 1, log_level='warning'))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    base = f"http://127.0.0.1:{args.port + 1}"
+
+    async def scenario():
+        async with aiohttp.ClientSession() as session:
+            single = []
+            for i in range(args.runs):
+                started = time.perf_counter()
+                async with session.get(f"{base}/profile/{universe.names[i]}") as res:
+                    body = await res.json()
+                assert res.status == 200 and body['address'] == universe.addresses[i], body
+                single.append(time.perf_counter() - started)
+
+            _reset()
+            names = universe.names[:args.batch_names]
+            lines, first = 0, None
+            started = time.perf_counter()
+            async with session.post(f"{base}/profiles", json={'names': names}, headers={'Accept': 'application/x-ndjson'}) as res:
+                async for line in res.content:
+                    if json.loads(line)['status'] == 200:
+                        lines += 1
+                    first = first or time.perf_counter() - started
+            seconds = time.perf_counter() - started
+        return single, lines, first, seconds
+
+    with Measure() as m:
+        single, lines, first, seconds = asyncio.run(scenario())
+    server.should_exit = True
+    thread.join()
+    return {
+        'profile': _summary(single),
+        'batch': {
+            'names': args.batch_names, 'ok': lines, 'seconds': seconds, 'first_line_s': first,
+            'names_per_s': lines / seconds,
+        },
+        'upstream_requests': m.requests,
+    }
+
+
+def bench_graph_build(universe, args):
+    from ensdata import run
+    from graph_build import build_graph
+
+    results = {}
+    for size in args.sizes:
+        names = universe.names[:size]
+        samples = []
+        for _ in range(args.graph_runs):
+            _reset()
+            with Measure() as m:
+                built = run(build_graph(names, include_portfolios=True))
+            samples.append(m.seconds)
+        graph = built['graph']
+        results[str(size)] = {
+            **_summary(samples), 'nodes': len(graph), 'edges': graph.number_of_edges, 'graph_bytes': graph.nbytes,
+            'warnings': len(built['warnings']), 'upstream_requests': m.requests,
+        }
+    return results
+
+
+def bench_layout_render(universe, args):
+    import networkx as nx
+    from figures import build_network_figure
+    from graph_analytics import _cache as _analytics_cache, get_analytics
+    from graph_layout import _cache, get_layout
+    from graph_store import CompactGraph
+
+    results = {}
+    for size in args.sizes:
+        # Same shape as the mock transfer graph: ring-like links to near neighbours
+        G = nx.Graph()
+        G.add_nodes_from((name, {'address': address, 'balance': 1.0}) for name, address in zip(universe.names[:size], universe.addresses))
+        for i in range(size):
+            for step in (1, 2, 3, 5, 8, 13):
+                if i + step < size and (i * step) % 3:
+                    G.add_edge(universe.names[i], universe.names[i + step], weight=1, tx_count=1)
+        graph = CompactGraph.from_networkx(G)
+        grown = G.copy()
+        grown.add_edge(universe.names[0], universe.names[size - 1], weight=1, tx_count=1)
+        grown = CompactGraph.from_networkx(grown)
+        _cache.clear()
+        start = time.perf_counter()
+        pos = get_layout(graph)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        get_layout(graph)
+        warm = time.perf_counter() - start
+        start = time.perf_counter()
+        get_layout(grown, previous=graph.key)
+        warm_start = time.perf_counter() - start
+        start = time.perf_counter()
+        fig = build_network_figure(graph, pos)
+        figure = time.perf_counter() - start
+        start = time.perf_counter()
+        payload = fig.to_json()
+        serialize = time.perf_counter() - start
+        _analytics_cache.clear()
+        start = time.perf_counter()
+        get_analytics(graph)
+        analytics_cold = time.perf_counter() - start
+        start = time.perf_counter()
+        get_analytics(grown, previous=graph.key)
+        analytics_warm_start = time.perf_counter() - start
+        results[str(size)] = {
+            'nodes': len(graph), 'edges': graph.number_of_edges, 'graph_bytes': graph.nbytes,
+            'layout_cold_s': cold, 'layout_cached_s': warm, 'layout_warm_start_s': warm_start,
+            'figure_s': figure, 'to_json_s': serialize, 'figure_bytes': len(payload),
+            'analytics_cold_s': analytics_cold, 'analytics_warm_start_s': analytics_warm_start,
+        }
+    return results
+
+
+def bench_batch_cli(universe, args, env):
+    with tempfile.TemporaryDirectory() as tmp:
+        names_path = os.path.join(tmp, 'names.txt')
+        output = os.path.join(tmp, 'out.csv')
+        with open(names_path, 'w') as f:
+            f.write("\n".join(universe.names[:args.batch_names]) + "\n")
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, os.path.join(ROOT, 'scripts', 'batch_lookup.py'), names_path, '-o', output],
+            env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        seconds = time.perf_counter() - start
+        with open(output) as f:
+            rows = sum(1 for _ in f) - 1
+    return {'names': args.batch_names, 'rows': rows, 'seconds': seconds, 'names_per_s': rows / seconds}
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _flatten(prefix, value, out):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(f"{prefix}.{key}" if prefix else key, item, out)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        out[prefix] = value
+    return out
+
+
+def compare(baseline, current):
+    """Print every numeric result that changed, with the ratio to the baseline."""
+    old = _flatten('', baseline['scenarios'], {})
+    new = _flatten('', current['scenarios'], {})
+    print(f"{'metric':<60} {'baseline':>12} {'current':>12} {'ratio':>8}")
+    for key in sorted(set(old) & set(new)):
+        if old[key] == new[key]:
+            continue
+        ratio = f"{new[key] / old[key]:.2f}x" if old[key] else "n/a"
+        print(f"{key:<60} {old[key]:>12.4g} {new[key]:>12.4g} {ratio:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ensdata against local mock upstreams")
+    parser.add_argument('-o', '--output', help="Write JSON results here (default: stdout)")
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=[10, 100, 1000], help="Graph sizes (names)")
+    parser.add_argument('--runs', type=int, default=10, help="Main Lookup repetitions")
+    parser.add_argument('--sessions', type=int, default=20, help="Concurrent sessions for concurrent_lookup")
+    parser.add_argument('--rpc-requests', type=int, default=400, help="Requests per setup in rpc_routing")
+    parser.add_argument('--rpc-tail-rate', type=float, default=0.05, help="rpc_routing: fraction of slow RPC responses")
+    parser.add_argument('--rpc-tail-latency', type=float, default=0.5, help="rpc_routing: extra seconds for a slow response")
+    parser.add_argument('--cold-runs', type=int, default=3, help="Fresh app processes for cold_start")
+    parser.add_argument('--think-time', type=float, default=2.0, help="cold_start pause between render and first lookup")
+    parser.add_argument('--graph-runs', type=int, default=3, help="Repetitions per graph size")
+    parser.add_argument('--batch-names', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.02, help="Mock response latency (seconds)")
+    parser.add_argument('--jitter', type=float, default=0.005)
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of mock responses that are HTTP 500s")
+    parser.add_argument('--rate-limit', type=float, default=None, help="Mock requests/second per service before throttling")
+    parser.add_argument('--real-rates', action='store_true', help="Keep the client's production ENSDATA_RATE_* limits")
+    parser.add_argument('--chains', default='1', help="ENSDATA_CHAINS for the client, e.g. 1,10,8453,42161")
+    parser.add_argument('--port', type=int, default=18645)
+    parser.add_argument('--compare', metavar='BASELINE', help="Print changes against an earlier results file")
+    args = parser.parse_args()
+
+    configs = {
+        service: ServiceConfig(args.latency, args.jitter, args.error_rate, args.rate_limit) for service in SERVICES
+    }
+    universe = Universe(size=max(args.sizes + [args.runs, args.batch_names]))
+    tail = ServiceConfig(args.latency, args.jitter, tail_rate=args.rpc_tail_rate, tail_latency=args.rpc_tail_latency)
+    rpc_endpoints = {'a': tail, 'b': tail, 'c': ServiceConfig(args.latency, args.jitter, error_rate=1.0)}
+    mocks = MockServers(universe, configs, port=args.port, rpc_endpoints=rpc_endpoints).start()
+
+    # ensdata reads its configuration at import time, so set it up first
+    env = {**os.environ, **mocks.env(), 'ENSDATA_PRICE_INTERVAL': '3600', 'ENSDATA_CHAINS': args.chains}
+    for key in ('ENSDATA_CACHE_DB', 'ENSDATA_INDEX_DB', 'ENSDATA_HISTORY_DB'):
+        env.pop(key, None)
+    if not args.real_rates:
+        env.update({f"ENSDATA_RATE_{service.upper()}": BENCH_RATE for service in SERVICES})
+    os.environ.clear()
+    os.environ.update(env)
+
+    runners = {
+        'cold_start': lambda: bench_cold_start(universe, args, env),
+        'main_lookup': lambda: bench_main_lookup(universe, args),
+        'concurrent_lookup': lambda: bench_concurrent_lookup(universe, args),
+        'rpc_routing': lambda: bench_rpc_routing(universe, args, mocks),
+        'api': lambda: bench_api(universe, args),
+        'graph_build': lambda: bench_graph_build(universe, args),
+        'layout_render': lambda: bench_layout_render(universe, args),
+        'batch_cli': lambda: bench_batch_cli(universe, args, env),
+    }
+    scenarios = {}
+    for name in args.scenarios:
+        print(f"Running {name}...", file=sys.stderr)
+        scenarios[name] = runners[name]()
+    mocks.stop()
+
+    from ensdata import config
+
+    results = {
+        'meta': {
+            'git_revision': _git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'mocks': {service: config_.as_dict() for service, config_ in configs.items()},
+            'rpc_endpoints': {endpoint: config_.as_dict() for endpoint, config_ in rpc_endpoints.items()},
+            'client_rate_limits': config.RATE_LIMITS,
+            'args': vars(args),
+        },
+        'scenarios': scenarios,
+        'mock_requests': dict(mocks.requests),
+    }
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Shared data-access layer for the ENS lookup app and scripts.
+
+Names are re-exported lazily: a submodule is imported the first time one
+of its names is used, so ``from ensdata import config, run`` does not pay
+for web3, pandas or the graph stack until a code path needs them.
+"""
+import importlib
+
+_EXPORTS = {
+    'api': ['create_app', 'lookup_document'],
+    'balances': ['fetch_address_balances', 'fetch_balances', 'fetch_chain_balances'],
+    'cache': ['MISSING', 'TieredCache', 'get_cache'],
+    'client': ['AsyncClient', 'get_client', 'run'],
+    'edges': ['SocialEdges', 'build_social_edges', 'iter_account_txs', 'named_edges'],
+    'ens': ['multicall', 'resolve_names', 'reverse_resolve'],
+    'errors': ['ThrottledError', 'UpstreamError'],
+    'etherscan': ['fetch_balance', 'fetch_balance_multi', 'fetch_internal_txs', 'fetch_nametag', 'wei_to_eth'],
+    'history': ['HistoryStore', 'address_metrics', 'get_history_store', 'wallet_metrics'],
+    'index': ['ENSIndex', 'get_index'],
+    'lookup': ['address_holdings', 'main_lookup', 'resolve_name'],
+    'metrics': ['Metrics', 'get_metrics', 'serve_metrics'],
+    'portfolio': ['fetch_portfolios', 'portfolio_totals', 'token_frame'],
+    'prices': ['PriceFeed', 'fetch_eth_price', 'get_price_feed'],
+    'rpc': ['RPCError', 'get_balances', 'get_web3', 'rpc_batch', 'rpc_call'],
+    'rpc_pool': ['RPCEndpoint', 'RPCPool', 'get_rpc_pool'],
+    'scheduler': ['PRIORITY_BACKGROUND', 'PRIORITY_INTERACTIVE', 'Scheduler', 'background', 'get_scheduler'],
+    'sim': ['fetch_sim_balances', 'fetch_sim_data'],
+    'singleflight': ['SingleFlight', 'get_singleflight'],
+}
+_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = sorted(_MODULES)
+
+
+def __getattr__(name):
+    module = _MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_MODULES))
@@ -0,0 +1,233 @@
+"""Headless JSON API over the Main Lookup, as an ASGI (Starlette) app.
+
+    python scripts/serve_api.py --port 8000
+    uvicorn --factory ensdata.api:create_app --port 8000
+
+``GET /profile/{name}`` returns what the Main Lookup assembles for one
+name (address, balances, USD value, recent internal transactions, ENS
+records) plus its Etherscan nametag and SIM data. ``GET
+/profiles?names=a.eth,b.eth`` or ``POST /profiles`` with ``{"names":
+[...]}`` looks up many names, answered as one JSON object, or as NDJSON
+(one line per name, in completion order) when the client sends ``Accept:
+application/x-ndjson`` or ``?stream=1``. Batches are resolved, balanced
+and profiled in bulk chunk by chunk, one chunk ahead of the per-name
+lookups, which then mostly hit the cache.
+
+Handlers run on the server's event loop and hand every lookup to the
+shared client loop, so the API shares the connection pool, cache, rate
+limits and in-flight coalescing with anything else in the process.
+Single-name lookups are interactive; batches run in the scheduler's
+background lane, like the batch CLI and graph builds, so a large batch
+cannot starve interactive lookups.
+"""
+import asyncio
+import json
+import logging
+
+from ens.exceptions import InvalidName
+from ens.utils import normalize_name
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from . import config
+from .balances import fetch_chain_balances
+from .client import get_client
+from .ens import INVALID_NAME, NOT_FOUND, resolve_names
+from .errors import UpstreamError
+from .etherscan import fetch_nametag
+from .lookup import main_lookup, resolve_name
+from .metrics import get_metrics
+from .profile import fetch_profiles
+from .scheduler import background
+from .sim import fetch_sim_data
+
+logger = logging.getLogger(__name__)
+
+NDJSON = 'application/x-ndjson'
+
+
+def _dumps(value):
+    return json.dumps(value, default=str, separators=(',', ':'))
+
+
+class _JSONResponse(JSONResponse):
+    def render(self, content):
+        return _dumps(content).encode()
+
+
+async def _optional(fetch, *args):
+    try:
+        return await fetch(*args)
+    except UpstreamError:
+        return None
+
+
+async def lookup_document(ens_name, tx_limit=10):
+    """Main Lookup data for ``ens_name`` with its nametag and SIM data, JSON ready; None if it does not resolve.
+
+    Wei amounts are strings and chain IDs are string keys, as JSON needs.
+    """
+    # main_lookup resolves the name too; resolve_name joins that call rather than repeating it
+    lookup = asyncio.ensure_future(main_lookup(ens_name, tx_limit=tx_limit))
+    try:
+        address = await resolve_name(ens_name)
+    except BaseException:
+        lookup.cancel()
+        raise
+    if not address:
+        return await lookup
+    lookup, nametag, sim = await asyncio.gather(
+        lookup, _optional(fetch_nametag, address), _optional(fetch_sim_data, address),
+    )
+    return {
+        **lookup,
+        'balance_wei': str(lookup['balance_wei']),
+        'chain_balances': {str(chainid): str(wei) for chainid, wei in lookup['chain_balances'].items()},
+        'balance_errors': {str(chainid): error for chainid, error in lookup['balance_errors'].items()},
+        'profile_error': str(lookup['profile_error']) if lookup['profile_error'] else None,
+        'nametag': nametag,
+        'sim': sim,
+    }
+
+
+async def prefetch(names):
+    """Resolve ``names`` in bulk and warm the profile and balance caches; returns the resolution errors."""
+    resolved, _ = await asyncio.gather(resolve_names(names), fetch_profiles(names), return_exceptions=True)
+    if isinstance(resolved, BaseException):
+        raise resolved
+    addresses, errors = resolved
+    try:
+        await fetch_chain_balances(addresses.values())
+    except UpstreamError:
+        pass
+    return errors
+
+
+def _on_client(coro):
+    return asyncio.wrap_future(get_client().submit(coro))
+
+
+def _error_status(message):
+    return 404 if message == NOT_FOUND or message.startswith(INVALID_NAME) else 502
+
+
+def _invalid(name):
+    """Error body if ``name`` fails ENSIP-15 normalization, else None."""
+    try:
+        normalize_name(name)
+    except InvalidName as e:
+        return {'name': name, 'error': f"{INVALID_NAME}: {e}"}
+    return None
+
+
+async def lookup_one(name, batch=False):
+    """``(status, body)`` for one name: 200 with the document, else an HTTP error status and message.
+
+    ``batch`` lookups run in the background lane.
+    """
+    invalid = _invalid(name)
+    if invalid:
+        return 404, invalid
+    try:
+        document = await _on_client(background(lookup_document(name)) if batch else lookup_document(name))
+    except UpstreamError as e:
+        return 502, {'name': name, 'error': str(e)}
+    except Exception as e:
+        logger.exception("Lookup of %s failed", name)
+        return 500, {'name': name, 'error': str(e)}
+    if document is None:
+        return 404, {'name': name, 'error': NOT_FOUND}
+    return 200, document
+
+
+async def iter_lookups(names):
+    """Yield ``(name, status, body)`` for every name as its lookup finishes, one chunk at a time."""
+    semaphore = asyncio.Semaphore(config.API_CONCURRENCY)
+
+    async def one(name, errors):
+        invalid = _invalid(name)
+        if invalid:
+            return name, 404, invalid
+        if name in errors:
+            return name, _error_status(errors[name]), {'name': name, 'error': errors[name]}
+        async with semaphore:
+            return (name, *await lookup_one(name, batch=True))
+
+    chunks = [names[start:start + config.API_CHUNK] for start in range(0, len(names), config.API_CHUNK)]
+    tasks, prefetched = [], _on_client(background(prefetch(chunks[0]))) if chunks else None
+    try:
+        for i, chunk in enumerate(chunks):
+            try:
+                errors = await prefetched
+            except UpstreamError:
+                errors = {}
+            # The next chunk's bulk calls overlap this chunk's lookups
+            prefetched = _on_client(background(prefetch(chunks[i + 1]))) if i + 1 < len(chunks) else None
+            tasks = [asyncio.ensure_future(one(name, errors)) for name in chunk]
+            for result in asyncio.as_completed(tasks):
+                yield await result
+    finally:
+        # A client that disconnects mid-stream cancels the lookups still running
+        for task in tasks + ([prefetched] if prefetched is not None else []):
+            task.cancel()
+
+
+async def profile(request):
+    status, body = await lookup_one(request.path_params['name'])
+    return _JSONResponse(body, status_code=status)
+
+
+async def _requested_names(request):
+    if request.method == 'POST':
+        try:
+            body = await request.json()
+        except ValueError:
+            return None
+        names = body.get('names') if isinstance(body, dict) else body
+        if not isinstance(names, list):
+            return None
+    else:
+        names = request.query_params.get('names', '').split(',')
+    return list(dict.fromkeys(str(name).strip() for name in names if str(name).strip()))
+
+
+async def profiles(request):
+    names = await _requested_names(request)
+    if not names:
+        return _JSONResponse({'error': 'Pass names as ?names=a.eth,b.eth or a JSON body {"names": [...]}'}, status_code=400)
+    if len(names) > config.API_MAX_BATCH:
+        return _JSONResponse({'error': f"At most {config.API_MAX_BATCH} names per request"}, status_code=413)
+
+    if NDJSON in request.headers.get('accept', '') or request.query_params.get('stream') in ('1', 'true'):
+        async def lines():
+            async for name, status, body in iter_lookups(names):
+                result = {'profile': body} if status == 200 else {'error': body['error']}
+                yield _dumps({'name': name, 'status': status, **result}) + "\n"
+
+        return StreamingResponse(lines(), media_type=NDJSON)
+
+    results, errors = {}, {}
+    async for name, status, body in iter_lookups(names):
+        if status == 200:
+            results[name] = body
+        else:
+            errors[name] = {'status': status, 'error': body['error']}
+    return _JSONResponse({'profiles': {name: results[name] for name in names if name in results}, 'errors': errors})
+
+
+async def health(request):
+    return _JSONResponse({'status': 'ok'})
+
+
+async def metrics(request):
+    return Response(get_metrics().prometheus(), media_type='text/plain; version=0.0.4')
+
+
+def create_app():
+    return Starlette(routes=[
+        Route('/profile/{name}', profile),
+        Route('/profiles', profiles, methods=['GET', 'POST']),
+        Route('/health', health),
+        Route('/metrics', metrics),
+    ])
@@ -0,0 +1,85 @@
+"""Balance collection phase for many addresses at once.
+
+Addresses go to Etherscan ``balancemulti`` in chunks of 20, with the
+chunks running concurrently. Anything a chunk could not answer (throttled,
+upstream error) is retried through a single ``eth_getBalance`` batch.
+Across chains, every configured chain runs its own pass concurrently; the
+scheduler keeps them all under the one shared Etherscan rate limit, so
+adding chains costs about a round trip rather than a pass per chain.
+"""
+import asyncio
+
+from . import config
+from .cache import get_cache
+from .errors import UpstreamError
+from .etherscan import BALANCEMULTI_CHUNK, balance_key, fetch_balance, fetch_balance_multi
+from .rpc import get_balances
+
+
+async def fetch_balances(addresses, chainid=1):
+    """Return ``{address: balance_wei}`` for every address that could be fetched."""
+    cache = get_cache()
+    keys = {address: balance_key(address, chainid) for address in dict.fromkeys(addresses)}
+    cached, _ = cache.get_many('balance', keys.values())
+    balances = {address: cached[key] for address, key in keys.items() if key in cached}
+    addresses = [address for address, key in keys.items() if key not in cached]
+    chunks = [addresses[i:i + BALANCEMULTI_CHUNK] for i in range(0, len(addresses), BALANCEMULTI_CHUNK)]
+    results = await asyncio.gather(*(fetch_balance_multi(chunk, chainid=chainid) for chunk in chunks), return_exceptions=True)
+
+    fetched, missing = {}, []
+    for chunk, result in zip(chunks, results):
+        if isinstance(result, BaseException):
+            if not isinstance(result, UpstreamError):
+                raise result
+            missing.extend(chunk)
+            continue
+        for address in chunk:
+            if address.lower() in result:
+                fetched[address] = result[address.lower()]
+            else:
+                missing.append(address)
+
+    if missing and chainid == 1:
+        try:
+            fetched.update(await get_balances(missing))
+        except UpstreamError:
+            pass
+    for address, balance in fetched.items():
+        cache.set('balance', balance_key(address, chainid), balance)
+    balances.update(fetched)
+    return balances
+
+
+async def fetch_chain_balances(addresses, chains=None):
+    """Return ``{address: {chainid: balance_wei}}`` over ``chains`` (default ``config.CHAINS``).
+
+    Chains that could not be fetched for an address are left out of its dict.
+    """
+    chains = chains or config.CHAINS
+    addresses = list(dict.fromkeys(addresses))
+    results = await asyncio.gather(*(fetch_balances(addresses, chainid=chainid) for chainid in chains))
+    balances = {address: {} for address in addresses}
+    for chainid, fetched in zip(chains, results):
+        for address, balance in fetched.items():
+            balances[address][chainid] = balance
+    return balances
+
+
+async def fetch_address_balances(address, chains=None):
+    """Return ``(balances, errors)`` keyed by chain ID for one address.
+
+    Raises the home chain's error if no chain could be fetched.
+    """
+    chains = chains or config.CHAINS
+    results = await asyncio.gather(*(fetch_balance(address, chainid=chainid) for chainid in chains), return_exceptions=True)
+    balances, errors = {}, {}
+    for chainid, result in zip(chains, results):
+        if isinstance(result, BaseException):
+            if not isinstance(result, UpstreamError):
+                raise result
+            errors[chainid] = result
+        else:
+            balances[chainid] = result
+    if not balances:
+        raise errors[chains[0]]
+    return balances, errors
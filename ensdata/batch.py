@@ -0,0 +1,215 @@
+"""Streaming batch enrichment of ENS names with checkpoint/resume.
+
+Names are read lazily and processed in fixed-size batches, with a bounded
+number of batches in flight on the shared client loop. Results are
+committed in input order, and after each commit a checkpoint records how
+many input names are done and where the output ended. A crashed run
+restarted with the same arguments truncates any partial output and
+resumes at the first uncommitted name.
+"""
+import asyncio
+import csv
+import glob
+import json
+import os
+import time
+from collections import deque
+from itertools import islice
+
+from . import config
+from .balances import fetch_chain_balances
+from .chains import chain_name, total_eth_wei
+from .client import get_client
+from .ens import resolve_names
+from .errors import UpstreamError
+from .etherscan import WEI_PER_ETH, fetch_nametag
+from .profile import PROFILE_KEYS, fetch_profiles
+from .scheduler import background
+
+BASE_COLUMNS = ['name', 'address', 'error', 'balance_wei', 'balance_eth', 'nametag']
+
+
+def chain_column(chainid):
+    """Native balance column for one chain when more than one is configured."""
+    return f"balance_{chain_name(chainid)}"
+
+
+def read_names(stream):
+    """Yield names from a CSV (``name`` column, else first column) or plain list."""
+    column = 0
+    for i, row in enumerate(csv.reader(stream)):
+        header = [cell.strip().lower() for cell in row]
+        if i == 0 and 'name' in header:
+            column = header.index('name')
+            continue
+        name = row[column].strip() if column < len(row) else ''
+        if name:
+            yield name
+
+
+async def _constant(value):
+    return value
+
+
+async def lookup_batch(names, nametags=True, profiles=True, profile_keys=PROFILE_KEYS):
+    """Resolve, price and enrich one batch; returns one row dict per name."""
+    addresses, errors = await resolve_names(names)
+    resolved = list(addresses)
+
+    async def nametag(address):
+        try:
+            return await fetch_nametag(address)
+        except UpstreamError:
+            return None
+
+    balances, tags, (records, _) = await asyncio.gather(
+        fetch_chain_balances(addresses.values()),
+        asyncio.gather(*(nametag(addresses[name]) for name in resolved)) if nametags else _constant([]),
+        fetch_profiles(resolved, profile_keys) if profiles else _constant(({}, {})),
+    )
+    tags = dict(zip(resolved, tags))
+
+    rows = []
+    for name in names:
+        address = addresses.get(name)
+        chain_balances = balances.get(address) if address else None
+        balance_wei = total_eth_wei(chain_balances) if chain_balances else None
+        row = {
+            'name': name,
+            'address': address,
+            'error': errors.get(name),
+            'balance_wei': str(balance_wei) if balance_wei is not None else None,
+            'balance_eth': balance_wei / WEI_PER_ETH if balance_wei is not None else None,
+            'nametag': tags.get(name),
+        }
+        if len(config.CHAINS) > 1:
+            row.update({
+                chain_column(chainid): chain_balances[chainid] / WEI_PER_ETH
+                if chain_balances and chainid in chain_balances else None
+                for chainid in config.CHAINS
+            })
+        if profiles:
+            row.update({key: records.get(name, {}).get(key) for key in profile_keys})
+        rows.append(row)
+    return rows
+
+
+class Checkpoint:
+    def __init__(self, path):
+        self.path = path
+        self.names_done = 0
+        self.output_position = 0
+        if os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            self.names_done = state['names_done']
+            self.output_position = state['output_position']
+
+    def save(self, names_done, output_position):
+        self.names_done, self.output_position = names_done, output_position
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump({'names_done': names_done, 'output_position': output_position}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+
+class CsvSink:
+    """Appends to one CSV file; the position is its byte length."""
+
+    def __init__(self, path, columns, resume_position=0):
+        self.columns = columns
+        exists = os.path.exists(path) and resume_position > 0
+        self._file = open(path, 'r+' if exists else 'w', newline='')
+        if exists:
+            self._file.truncate(resume_position)
+            self._file.seek(resume_position)
+        self._writer = csv.DictWriter(self._file, fieldnames=columns)
+        if not exists:
+            self._writer.writeheader()
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetSink:
+    """Writes one Parquet part file per batch; the position is the part count."""
+
+    def __init__(self, path, columns, resume_position=0):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow)") from e
+        self._pa, self._pq = pa, pq
+        self.path, self.columns, self.parts = path, columns, resume_position
+        self._float_columns = {'balance_eth', *(chain_column(chainid) for chainid in config.CHAINS)}
+        os.makedirs(path, exist_ok=True)
+        for part in glob.glob(os.path.join(path, 'part-*.parquet')):
+            if int(os.path.basename(part)[5:10]) >= resume_position:
+                os.remove(part)
+
+    def write(self, rows):
+        table = self._pa.Table.from_pylist(rows, schema=self._pa.schema(
+            [(column, self._pa.float64() if column in self._float_columns else self._pa.string()) for column in self.columns]
+        ))
+        self._pq.write_table(table, os.path.join(self.path, f"part-{self.parts:05d}.parquet"))
+        self.parts += 1
+        return self.parts
+
+    def close(self):
+        pass
+
+
+def run_batch(names, sink_factory, checkpoint, batch_size=200, concurrency=4, progress=None, **options):
+    """Enrich ``names`` batch by batch, committing results and checkpoints in order.
+
+    ``sink_factory(resume_position)`` opens the output; ``progress(done, rate)``
+    is called after every committed batch with the names/sec of this run.
+    """
+    client = get_client()
+    names = iter(names)
+    for _ in islice(names, checkpoint.names_done):
+        pass
+
+    sink = sink_factory(checkpoint.output_position)
+    pending = deque()
+    first, started = checkpoint.names_done, time.monotonic()
+    done = first
+
+    def commit():
+        nonlocal done
+        batch, future = pending.popleft()
+        position = sink.write(future.result())
+        done += len(batch)
+        checkpoint.save(done, position)
+        if progress:
+            progress(done, (done - first) / max(time.monotonic() - started, 1e-9))
+
+    try:
+        while True:
+            batch = list(islice(names, batch_size))
+            if not batch:
+                break
+            pending.append((batch, client.submit(background(lookup_batch(batch, **options)))))
+            while len(pending) >= concurrency:
+                commit()
+        while pending:
+            commit()
+    finally:
+        for _, future in pending:
+            future.cancel()
+        sink.close()
+    return done
+
+
+def output_columns(profiles=True, profile_keys=PROFILE_KEYS):
+    chains = [chain_column(chainid) for chainid in config.CHAINS] if len(config.CHAINS) > 1 else []
+    return BASE_COLUMNS + chains + (list(profile_keys) if profiles else [])
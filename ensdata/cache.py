@@ -0,0 +1,151 @@
+"""Process-wide TTL/LRU cache with an optional on-disk SQLite tier.
+
+Every data kind has its own TTL (see ``config.CACHE_TTLS``). Lookups check
+memory first, then SQLite when ``ENSDATA_CACHE_DB`` is set, and promote
+disk hits back into memory. Hits and misses are counted per kind and tier.
+Expired rows are purged from SQLite every ``PURGE_EVERY`` disk writes.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from . import config
+
+MISSING = object()
+PURGE_EVERY = 1000
+
+
+class SQLiteTier:
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "kind TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL NOT NULL, "
+            "PRIMARY KEY (kind, key))"
+        )
+
+    def get(self, kind, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return MISSING, None
+        return json.loads(row[0]), row[1]
+
+    def set(self, kind, key, value, expires_at):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (kind, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (kind, key, json.dumps(value), expires_at),
+            )
+
+    def purge_expired(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+
+
+class TieredCache:
+    def __init__(self, max_entries=None, ttls=None, db_path=None):
+        self.max_entries = max_entries or config.CACHE_MAX_ENTRIES
+        self.ttls = dict(ttls or config.CACHE_TTLS)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = SQLiteTier(db_path) if db_path else None
+        self._disk_writes = 0
+        self._counters = defaultdict(int)
+
+    def get(self, kind, key):
+        """Return the cached value or ``MISSING``."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get((kind, key))
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at >= now:
+                    self._entries.move_to_end((kind, key))
+                    self._counters[(kind, 'memory', 'hit')] += 1
+                    return value
+                del self._entries[(kind, key)]
+            self._counters[(kind, 'memory', 'miss')] += 1
+
+        if self._disk is None:
+            return MISSING
+        value, expires_at = self._disk.get(kind, key)
+        with self._lock:
+            self._counters[(kind, 'disk', 'miss' if value is MISSING else 'hit')] += 1
+        if value is not MISSING:
+            self._store(kind, key, value, expires_at)
+        return value
+
+    def set(self, kind, key, value, ttl=None):
+        expires_at = time.time() + (ttl if ttl is not None else self.ttls.get(kind, 60))
+        self._store(kind, key, value, expires_at)
+        if self._disk is not None:
+            self._disk.set(kind, key, value, expires_at)
+            with self._lock:
+                self._disk_writes += 1
+                purge = self._disk_writes % PURGE_EVERY == 0
+            if purge:
+                self._disk.purge_expired()
+
+    def _store(self, kind, key, value, expires_at):
+        with self._lock:
+            self._entries[(kind, key)] = (value, expires_at)
+            self._entries.move_to_end((kind, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_many(self, kind, keys):
+        """Split ``keys`` into ``({key: value}, [missing keys])``."""
+        found, missing = {}, []
+        for key in keys:
+            value = self.get(kind, key)
+            if value is MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        return found, missing
+
+    async def get_or_fetch(self, kind, key, fetch, ttl=None):
+        value = self.get(kind, key)
+        if value is MISSING:
+            value = await fetch()
+            self.set(kind, key, value, ttl=ttl)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters and hit ratio per data kind and tier."""
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+        stats = {'entries': size, 'kinds': {}}
+        for (kind, tier, outcome), count in counters.items():
+            tiers = stats['kinds'].setdefault(kind, {})
+            tiers.setdefault(tier, {'hit': 0, 'miss': 0})[outcome] = count
+        for tiers in stats['kinds'].values():
+            for counts in tiers.values():
+                total = counts['hit'] + counts['miss']
+                counts['hit_ratio'] = counts['hit'] / total if total else 0.0
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TieredCache(db_path=config.CACHE_DB_PATH)
+    return _cache
@@ -0,0 +1,42 @@
+"""Chains that native and token balances are collected on.
+
+``config.CHAINS`` lists Etherscan v2 / SIM chain IDs (``ENSDATA_CHAINS``,
+default mainnet only). Balances are kept per chain; totals in ETH only
+add up chains whose native token is ETH, so a BNB or POL balance is
+shown on its own column but never counted as ether.
+"""
+from . import config
+from .etherscan import WEI_PER_ETH
+
+CHAIN_NAMES = {
+    1: 'ethereum', 10: 'optimism', 56: 'bnb', 100: 'gnosis', 137: 'polygon', 324: 'zksync', 8453: 'base',
+    42161: 'arbitrum', 59144: 'linea', 81457: 'blast', 534352: 'scroll',
+}
+NATIVE_SYMBOLS = {56: 'BNB', 100: 'xDAI', 137: 'POL'}
+
+
+def chain_name(chainid):
+    return CHAIN_NAMES.get(chainid, str(chainid))
+
+
+def native_symbol(chainid):
+    return NATIVE_SYMBOLS.get(chainid, 'ETH')
+
+
+def chain_ids_param(chains=None):
+    """SIM ``chain_ids`` value for ``chains`` (default ``config.CHAINS``)."""
+    return ",".join(str(chainid) for chainid in (chains or config.CHAINS))
+
+
+def total_eth_wei(balances):
+    """Sum of a ``{chainid: balance_wei}`` dict over the chains whose native token is ETH."""
+    return sum(wei for chainid, wei in balances.items() if native_symbol(chainid) == 'ETH')
+
+
+def chain_columns(balances, chains=None):
+    """``{'<symbol> (<chain>)': amount}`` for each chain, in ``config.CHAINS`` order (None if missing)."""
+    return {
+        f"{native_symbol(chainid)} ({chain_name(chainid)})":
+            balances[chainid] / WEI_PER_ETH if chainid in balances else None
+        for chainid in (chains or config.CHAINS)
+    }
@@ -0,0 +1,149 @@
+"""Pooled keep-alive HTTP client shared by every page, script and session.
+
+The client owns one event loop running in a daemon thread, so a single
+aiohttp connection pool survives Streamlit reruns and is reused by
+synchronous callers through ``run``.
+"""
+import asyncio
+import atexit
+import json as jsonlib
+import threading
+
+import aiohttp
+
+from . import config
+from .errors import ThrottledError, UpstreamError
+from .metrics import endpoint_label, get_metrics
+from .scheduler import get_scheduler
+from .singleflight import get_singleflight, request_key
+
+
+class AsyncClient:
+    def __init__(self, pool_size=None, pool_size_per_host=None, timeout=None, keepalive_timeout=60):
+        self.pool_size = pool_size or config.HTTP_POOL_SIZE
+        self.pool_size_per_host = pool_size_per_host or config.HTTP_POOL_SIZE_PER_HOST
+        self.timeout = timeout or config.HTTP_TIMEOUT
+        self.keepalive_timeout = keepalive_timeout
+        self._session = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="ensdata-http", daemon=True)
+        self._thread.start()
+
+    @property
+    def loop(self):
+        return self._loop
+
+    def run(self, coro, timeout=None):
+        """Run ``coro`` on the client loop and block until it finishes."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def submit(self, coro):
+        """Schedule ``coro`` on the client loop and return a concurrent future."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def request_json(self, method, url, params=None, headers=None, json=None, provider=None, pool=None):
+        """Send a request and decode the JSON body.
+
+        With ``provider`` set, the call goes through that provider's rate
+        limiter and is retried with backoff on throttling and transient
+        errors, and identical requests already in flight are joined rather
+        than sent again. With ``pool`` (an ``RPCPool``) set, ``url`` is
+        ignored and the pool picks, hedges and fails over between its endpoints.
+        """
+        if provider is None:
+            return await self._send(method, url, params=params, headers=headers, json=json)
+        endpoint = endpoint_label(provider, url, params, json)
+        attempt = lambda url: self._send(method, url, params=params, headers=headers, json=json, label=(provider, endpoint))
+        send = (lambda: attempt(url)) if pool is None else (lambda: pool.call(attempt))
+        return await get_singleflight().do(
+            request_key(provider, method, url if pool is None else id(pool), params, headers, json),
+            lambda: get_scheduler().call(provider, send, endpoint),
+            provider, endpoint,
+        )
+
+    async def _send(self, method, url, params=None, headers=None, json=None, label=None):
+        session = self._get_session()
+        # Like requests, silently drop unset values (e.g. a missing API key)
+        if params:
+            params = {k: v for k, v in params.items() if v is not None}
+        if headers:
+            headers = {k: v for k, v in headers.items() if v is not None}
+        # Encode the body ourselves so its size can be recorded
+        body = None
+        if json is not None:
+            body = jsonlib.dumps(json).encode()
+            headers = {**(headers or {}), 'Content-Type': 'application/json'}
+        try:
+            async with session.request(method, url, params=params, headers=headers, data=body) as res:
+                raw = await res.read()
+                if label is not None:
+                    get_metrics().add_bytes(*label, len(body or b''), len(raw))
+                if res.status == 429:
+                    raise ThrottledError("HTTP 429", status=429, url=url, retry_after=_retry_after(res))
+                if res.status >= 400:
+                    raise UpstreamError(f"HTTP {res.status}: {raw[:200].decode(errors='replace')}", status=res.status, url=url)
+                return jsonlib.loads(raw)
+        except ValueError as e:
+            raise UpstreamError(f"Invalid JSON response: {e}", url=url) from e
+        except asyncio.TimeoutError as e:
+            raise UpstreamError(f"Timed out after {self.timeout}s", url=url) from e
+        except aiohttp.ClientError as e:
+            raise UpstreamError(str(e), url=url) from e
+
+    async def get_json(self, url, params=None, headers=None, provider=None):
+        return await self.request_json("GET", url, params=params, headers=headers, provider=provider)
+
+    async def post_json(self, url, payload, headers=None, provider=None, pool=None):
+        return await self.request_json("POST", url, headers=headers, json=payload, provider=provider, pool=pool)
+
+    async def _close(self):
+        # Stop background work (e.g. the price feed) before the pool goes away
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    def close(self):
+        self.run(self._close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+def _retry_after(res):
+    try:
+        return float(res.headers.get('Retry-After', ''))
+    except ValueError:
+        return None
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = AsyncClient()
+                atexit.register(_client.close)
+    return _client
+
+
+def run(coro, timeout=None):
+    return get_client().run(coro, timeout)
@@ -0,0 +1,82 @@
+import os
+
+ETHERSCAN_API_KEY = os.getenv('ETHERSCAN_API_KEY')
+COINMARKETCAP_API_KEY = os.getenv('COINMARKETCAP_API_KEY')
+ETH_RPC_URL = os.getenv('ETH_RPC_URL')
+# Several JSON-RPC endpoints (comma separated) to route between; the first also serves as ETH_RPC_URL
+ETH_RPC_URLS = [url.strip() for url in os.getenv('ETH_RPC_URLS', ETH_RPC_URL or '').split(',') if url.strip()]
+ETH_RPC_URL = ETH_RPC_URL or (ETH_RPC_URLS[0] if ETH_RPC_URLS else None)
+SIM_API_KEY = os.getenv('SIM_API_KEY')
+
+# Base URLs can be overridden to point the app at local stand-in servers
+ETHERSCAN_API_URL = os.getenv('ETHERSCAN_API_URL', 'https://api.etherscan.io/v2/api')
+COINMARKETCAP_API_URL = os.getenv('COINMARKETCAP_API_URL', 'https://pro-api.coinmarketcap.com/v1')
+SIM_API_URL = os.getenv('SIM_API_URL', 'https://api.sim.dune.com/v1/evm')
+
+# Chains (Etherscan v2 / SIM chain IDs) that balances are collected on, e.g. "1,10,8453,42161"
+CHAINS = [int(chainid) for chainid in os.getenv('ENSDATA_CHAINS', '1').split(',') if chainid.strip()] or [1]
+
+HTTP_TIMEOUT = float(os.getenv('ENSDATA_HTTP_TIMEOUT', '20'))
+HTTP_POOL_SIZE = int(os.getenv('ENSDATA_HTTP_POOL_SIZE', '100'))
+HTTP_POOL_SIZE_PER_HOST = int(os.getenv('ENSDATA_HTTP_POOL_SIZE_PER_HOST', '20'))
+
+# Cache: in-process LRU, plus an optional SQLite tier that survives restarts
+CACHE_MAX_ENTRIES = int(os.getenv('ENSDATA_CACHE_MAX_ENTRIES', '50000'))
+CACHE_DB_PATH = os.getenv('ENSDATA_CACHE_DB')
+BLOCK_TIME = 12
+CACHE_TTLS = {
+    'ens': int(os.getenv('ENSDATA_CACHE_TTL_ENS', '600')),
+    'reverse': int(os.getenv('ENSDATA_CACHE_TTL_REVERSE', '600')),
+    'profile': int(os.getenv('ENSDATA_CACHE_TTL_PROFILE', '600')),
+    'balance': BLOCK_TIME,
+    'portfolio': BLOCK_TIME,
+}
+
+# Finished List Lookup graphs, shared by sessions that build the same names
+GRAPH_STORE_MAX_BYTES = int(os.getenv('ENSDATA_GRAPH_STORE_MAX_BYTES', str(256 * 1024 * 1024)))
+GRAPH_STORE_TTL = float(os.getenv('ENSDATA_GRAPH_STORE_TTL', '600'))
+
+# Local ENS event index (see scripts/sync_ens_index.py); lookups read it first when set
+ENS_INDEX_DB = os.getenv('ENSDATA_INDEX_DB')
+
+# Per-address transaction history store; in memory unless a file is given. Only the
+# HISTORY_MAX_ADDRESSES most recently synced addresses are kept, the rest are evicted
+HISTORY_DB = os.getenv('ENSDATA_HISTORY_DB', ':memory:')
+HISTORY_MAX_TXS = int(os.getenv('ENSDATA_HISTORY_MAX_TXS', '50000'))
+HISTORY_MAX_ADDRESSES = int(os.getenv('ENSDATA_HISTORY_MAX_ADDRESSES', '200'))
+
+# Background ETH price feed
+PRICE_REFRESH_INTERVAL = float(os.getenv('ENSDATA_PRICE_INTERVAL', '60'))
+PRICE_WAIT_TIMEOUT = float(os.getenv('ENSDATA_PRICE_WAIT_TIMEOUT', '5'))
+
+# JSON API (scripts/serve_api.py): lookups in flight per batch request, names resolved and
+# prefetched together, and the most names one request may ask for
+API_CONCURRENCY = int(os.getenv('ENSDATA_API_CONCURRENCY', '32'))
+API_CHUNK = int(os.getenv('ENSDATA_API_CHUNK', '100'))
+API_MAX_BATCH = int(os.getenv('ENSDATA_API_MAX_BATCH', '10000'))
+
+# Serve Prometheus metrics on this port (e.g. 9100) when set
+METRICS_PORT = os.getenv('ENSDATA_METRICS_PORT')
+
+# Per-provider request rate (requests/second) for the upstream scheduler
+RATE_LIMITS = {
+    'etherscan': float(os.getenv('ENSDATA_RATE_ETHERSCAN', '5')),
+    'cmc': float(os.getenv('ENSDATA_RATE_CMC', '0.5')),
+    'sim': float(os.getenv('ENSDATA_RATE_SIM', '5')),
+    'rpc': float(os.getenv('ENSDATA_RATE_RPC', '25')),
+}
+# Routing over ETH_RPC_URLS: a hedged duplicate goes to the next endpoint once a request has taken
+# longer than this quantile of the endpoint's recent latencies (0 disables hedging), or
+# RPC_HEDGE_DELAY seconds before enough latencies are known
+RPC_HEDGE_QUANTILE = float(os.getenv('ENSDATA_RPC_HEDGE_QUANTILE', '0.95'))
+RPC_HEDGE_DELAY = float(os.getenv('ENSDATA_RPC_HEDGE_DELAY', '0.25'))
+RPC_EWMA_ALPHA = float(os.getenv('ENSDATA_RPC_EWMA_ALPHA', '0.2'))
+# Circuit breaker: skip an endpoint for COOLDOWN seconds after FAILURES consecutive failures
+RPC_BREAKER_FAILURES = int(os.getenv('ENSDATA_RPC_BREAKER_FAILURES', '5'))
+RPC_BREAKER_COOLDOWN = float(os.getenv('ENSDATA_RPC_BREAKER_COOLDOWN', '30'))
+
+# Share one upstream call among identical requests that are in flight at the same time
+SINGLEFLIGHT = os.getenv('ENSDATA_SINGLEFLIGHT', '1') != '0'
+MAX_RETRIES = int(os.getenv('ENSDATA_MAX_RETRIES', '4'))
+RETRY_BASE_DELAY = float(os.getenv('ENSDATA_RETRY_BASE_DELAY', '0.5'))
+RETRY_MAX_DELAY = float(os.getenv('ENSDATA_RETRY_MAX_DELAY', '10'))
@@ -0,0 +1,4 @@
+ENS_REGISTRY = "0x00000000000C2E074eC69A0dFb2997BA6C7d2e1e"
+BASE_REGISTRAR = "0x57f1887a8BF19b14fC0dF6Fd9B2acc9Af147eA85"
+MULTICALL3 = "0xcA11bde05977b3631167028862bE2a173976CA11"
+ZERO_ADDRESS = "0x" + "00" * 20
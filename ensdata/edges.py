@@ -0,0 +1,177 @@
+"""Social edges derived from real transfers between resolved addresses.
+
+Each address's normal, internal and token-transfer history is streamed
+page by page from Etherscan (newest first, paging by block cursor so the
+10k-row window limit never applies). Only transfers whose counterparty is
+another address in the set become edges, so the graph grows with actual
+interactions instead of n(n-1)/2. Transfers with addresses outside the set
+are only counted per member, so the busiest outside counterparties can be
+labelled without becoming nodes.
+"""
+import asyncio
+from collections import Counter, defaultdict
+
+from .errors import UpstreamError
+from .etherscan import WEI_PER_ETH, etherscan_get
+
+TX_KINDS = ("txlist", "txlistinternal", "tokentx")
+PAGE_SIZE = 1000
+MAX_TXS_PER_KIND = 5000
+
+
+async def iter_account_txs(address, action, page_size=PAGE_SIZE, max_txs=MAX_TXS_PER_KIND, chainid=1, start_block=0):
+    """Yield pages of ``action`` rows for ``address`` from ``start_block`` on, newest first.
+
+    Every row gets a ``transferId`` that tells apart transfers sharing a
+    transaction hash (see ``_transfer_ids``).
+    """
+    end_block = 99999999
+    seen = Counter()
+    fetched = 0
+    while fetched < max_txs:
+        data = await etherscan_get(
+            "account", action, chainid=chainid, address=address,
+            startblock=start_block, endblock=end_block, page=1, offset=page_size, sort="desc",
+        )
+        rows = data.get('result')
+        if not isinstance(rows, list) or not rows:
+            return
+        # The cursor block is re-read on the next page, so drop rows already seen
+        page = _transfer_ids(rows, seen)
+        if page:
+            fetched += len(page)
+            yield page
+        if len(rows) < page_size:
+            return
+        last_block = int(rows[-1]['blockNumber'])
+        end_block = last_block if page else last_block - 1
+
+
+def _transfer_ids(rows, seen):
+    """Set ``transferId`` on the rows of ``rows`` not yielded before and return them.
+
+    Internal transactions carry a ``traceId``; Etherscan token transfers
+    carry no log index, so several transfers in one transaction (swaps,
+    batch sends) are told apart by sender, recipient, token and value,
+    plus an occurrence number for exact repeats. ``seen`` counts every
+    discriminator yielded so far. A re-read block starts at the top of a
+    page, so its repeats are numbered the same way again and the first
+    ``seen[...]`` of them are the ones already yielded.
+    """
+    page, counts = [], Counter()
+    for row in rows:
+        base = row.get('traceId') or row.get('logIndex') or ":".join(
+            (row.get(field) or '').lower() for field in ('from', 'to', 'contractAddress', 'value')
+        )
+        base = (row.get('hash'), base)
+        occurrence = counts[base]
+        counts[base] += 1
+        if occurrence >= seen[base]:
+            row['transferId'] = f"{base[1]}:{occurrence}"
+            page.append(row)
+    for base, count in counts.items():
+        seen[base] = max(seen[base], count)
+    return page
+
+
+def _row_key(action, row):
+    return (action, row.get('hash'), row['transferId'])
+
+
+class SocialEdges:
+    """Sparse, symmetric adjacency of weighted edges between addresses."""
+
+    def __init__(self):
+        self._adj = defaultdict(dict)
+        self._external = defaultdict(Counter)
+
+    def add(self, a, b, action, value):
+        if a == b:
+            return
+        edge = self._adj[a].get(b)
+        if edge is None:
+            edge = {'tx_count': 0, 'value_wei': 0, 'token_transfers': 0}
+            self._adj[a][b] = self._adj[b][a] = edge
+        if action == "tokentx":
+            edge['token_transfers'] += 1
+        else:
+            edge['tx_count'] += 1
+            edge['value_wei'] += value
+
+    def add_external(self, member, other):
+        self._external[member][other] += 1
+
+    def top_counterparties(self, address, n=5):
+        """``[(address, transfers)]`` for the busiest counterparties outside the set."""
+        return self._external.get(address, Counter()).most_common(n)
+
+    def neighbors(self, address):
+        return self._adj.get(address, {})
+
+    def edges(self):
+        """Yield each undirected edge once as ``(a, b, attrs)``."""
+        for a, neighbors in self._adj.items():
+            for b, attrs in neighbors.items():
+                if a < b:
+                    yield a, b, attrs
+
+    def __len__(self):
+        return sum(len(neighbors) for neighbors in self._adj.values()) // 2
+
+
+async def build_social_edges(addresses, kinds=TX_KINDS, max_txs=MAX_TXS_PER_KIND, chainid=1, progress=None):
+    """Return ``(SocialEdges, errors)`` for transfers among ``addresses``.
+
+    Edge endpoints are lowercase addresses. A transfer seen from both sides
+    is counted once. ``progress(edges, done, total)`` is called after each
+    address/tx-type scan finishes, so callers can show edges as they appear.
+    """
+    members = {address.lower() for address in addresses}
+    edges = SocialEdges()
+    counted = set()
+    errors = {}
+    scans = [(address, action) for address in members for action in kinds]
+    done = 0
+
+    async def scan(address, action):
+        nonlocal done
+        try:
+            async for page in iter_account_txs(address, action, max_txs=max_txs, chainid=chainid):
+                for row in page:
+                    src, dst = (row.get('from') or '').lower(), (row.get('to') or '').lower()
+                    if src not in members or dst not in members:
+                        other = dst if src == address else src
+                        if other and other not in members:
+                            edges.add_external(address, other)
+                        continue
+                    key = _row_key(action, row)
+                    if key in counted:
+                        continue
+                    counted.add(key)
+                    edges.add(src, dst, action, int(row.get('value') or 0))
+        except UpstreamError as e:
+            errors[(address, action)] = str(e)
+        done += 1
+        if progress is not None:
+            progress(edges, done, len(scans))
+
+    await asyncio.gather(*(scan(address, action) for address, action in scans))
+    return edges, errors
+
+
+def named_edges(edges, addresses):
+    """Map address edges back to ENS names given ``{name: address}``.
+
+    Yields ``(name_a, name_b, attrs)`` with a combined ``weight`` (tx count
+    plus token transfers) and ``value_eth``.
+    """
+    names = {}
+    for name, address in addresses.items():
+        names.setdefault(address.lower(), name)
+    for a, b, attrs in edges.edges():
+        yield names[a], names[b], {
+            'weight': attrs['tx_count'] + attrs['token_transfers'],
+            'tx_count': attrs['tx_count'],
+            'token_transfers': attrs['token_transfers'],
+            'value_eth': attrs['value_wei'] / WEI_PER_ETH,
+        }
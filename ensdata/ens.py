@@ -0,0 +1,217 @@
+"""Bulk ENS resolution over Multicall3.
+
+Names are resolved in two rounds - registry ``resolver(node)``, then
+``addr(node)`` on each resolver - with every round packed into
+``aggregate3`` calls that go out as a single JSON-RPC batch. Names the
+fast path cannot answer (wildcard or offchain resolvers) fall back to
+web3's full resolution, with bounded concurrency.
+"""
+import asyncio
+
+from eth_abi import decode, encode
+from eth_utils import function_signature_to_4byte_selector, to_checksum_address
+
+from .cache import get_cache
+from .contracts import ENS_REGISTRY, MULTICALL3, ZERO_ADDRESS
+from .errors import UpstreamError
+from .index import get_index, name_node, reverse_node
+from .rpc import get_web3, rpc_batch
+
+MULTICALL_CHUNK = 200
+FALLBACK_CONCURRENCY = 8
+
+AGGREGATE3 = function_signature_to_4byte_selector("aggregate3((address,bool,bytes)[])")
+RESOLVER = function_signature_to_4byte_selector("resolver(bytes32)")
+ADDR = function_signature_to_4byte_selector("addr(bytes32)")
+NAME = function_signature_to_4byte_selector("name(bytes32)")
+
+NOT_FOUND = "ENS name not found"
+INVALID_NAME = "Invalid ENS name"
+
+
+async def multicall(calls, block="latest"):
+    """Run ``(target, calldata)`` calls through Multicall3 ``aggregate3``.
+
+    Calls are chunked and every chunk is sent in one JSON-RPC batch.
+    Returns ``(success, returndata)`` per call; when a whole chunk fails
+    upstream, its calls get ``(False, UpstreamError)``.
+    """
+    chunks = [calls[i:i + MULTICALL_CHUNK] for i in range(0, len(calls), MULTICALL_CHUNK)]
+    batch = []
+    for chunk in chunks:
+        data = AGGREGATE3 + encode(["(address,bool,bytes)[]"], [[(target, True, calldata) for target, calldata in chunk]])
+        batch.append(("eth_call", [{"to": MULTICALL3, "data": "0x" + data.hex()}, block]))
+
+    try:
+        responses = await rpc_batch(batch)
+    except UpstreamError as e:
+        responses = [e] * len(chunks)
+
+    results = []
+    for chunk, response in zip(chunks, responses):
+        if isinstance(response, UpstreamError):
+            results.extend([(False, response)] * len(chunk))
+            continue
+        (decoded,) = decode(["(bool,bytes)[]"], bytes.fromhex(response[2:]))
+        results.extend(decoded)
+    return results
+
+
+def _decode_address(ok, data):
+    if not ok or not isinstance(data, bytes) or len(data) < 32:
+        return None
+    address = to_checksum_address(data[12:32])
+    return None if address == to_checksum_address(ZERO_ADDRESS) else address
+
+
+async def _resolve_with_web3(names):
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(FALLBACK_CONCURRENCY)
+    w3 = get_web3()
+
+    async def resolve(name):
+        async with semaphore:
+            try:
+                return await loop.run_in_executor(None, w3.ens.address, name)
+            except Exception as e:
+                return e
+
+    return dict(zip(names, await asyncio.gather(*(resolve(name) for name in names))))
+
+
+async def resolve_names(names, fallback=True):
+    """Resolve many ENS names in a handful of RPC round trips.
+
+    Returns ``(addresses, errors)``: checksum addresses for the names that
+    resolved, and an error message for every name that did not. Names
+    already in the cache or the local event index never leave the process.
+    """
+    requested = list(dict.fromkeys(names))
+    cache = get_cache()
+    cached, _ = cache.get_many('ens', [name.lower() for name in requested])
+    index = get_index()
+    if index is not None:
+        for name, address in index.addresses([name for name in requested if name.lower() not in cached]).items():
+            cached[name.lower()] = address
+            cache.set('ens', name.lower(), address)
+    addresses, errors = {}, {}
+    nodes = {}
+    for name in requested:
+        if name.lower() in cached:
+            addresses[name] = cached[name.lower()]
+            continue
+        try:
+            nodes[name] = name_node(name)
+        except Exception as e:
+            errors[name] = f"{INVALID_NAME}: {e}"
+
+    names = list(nodes)
+    unresolved = []
+
+    results = await multicall([(ENS_REGISTRY, RESOLVER + nodes[name]) for name in names])
+    resolvers = {}
+    for name, (ok, data) in zip(names, results):
+        if isinstance(data, UpstreamError):
+            errors[name] = str(data)
+            continue
+        resolver = _decode_address(ok, data)
+        if resolver:
+            resolvers[name] = resolver
+        else:
+            unresolved.append(name)
+
+    names = list(resolvers)
+    results = await multicall([(resolvers[name], ADDR + nodes[name]) for name in names])
+    for name, (ok, data) in zip(names, results):
+        if isinstance(data, UpstreamError):
+            errors[name] = str(data)
+            continue
+        address = _decode_address(ok, data)
+        if address:
+            addresses[name] = address
+        else:
+            unresolved.append(name)
+
+    if fallback and unresolved:
+        for name, result in (await _resolve_with_web3(unresolved)).items():
+            if isinstance(result, Exception):
+                errors[name] = str(result)
+            elif result:
+                addresses[name] = result
+    for name in unresolved:
+        if name not in addresses and name not in errors:
+            errors[name] = NOT_FOUND
+    for name in nodes:
+        if name in addresses:
+            cache.set('ens', name.lower(), addresses[name])
+    return {name: addresses[name] for name in requested if name in addresses}, errors
+
+
+def _decode_string(ok, data):
+    if not ok or not isinstance(data, bytes) or len(data) < 64:
+        return None
+    try:
+        (value,) = decode(["string"], data)
+    except Exception:
+        return None
+    return value or None
+
+
+async def reverse_resolve(addresses):
+    """Verified primary ENS names for many addresses in a few RPC round trips.
+
+    Reads every ``<addr>.addr.reverse`` record through Multicall, then
+    forward-resolves the claimed names in bulk and keeps a name only if it
+    points back at the same address. Returns ``(names, errors)`` keyed by
+    the addresses as given; addresses without a primary name are omitted.
+    Both outcomes are cached, so unnamed addresses are not re-queried.
+    """
+    requested = list(dict.fromkeys(addresses))
+    cache = get_cache()
+    cached, missing = cache.get_many('reverse', [address.lower() for address in requested])
+    index = get_index()
+    if index is not None:
+        for address in missing:
+            name = index.name(address)
+            if name:
+                cached[address] = name
+                cache.set('reverse', address, name)
+    pending = [address for address in dict.fromkeys(address.lower() for address in requested) if address not in cached]
+    errors = {}
+
+    nodes = {address: reverse_node(address) for address in pending}
+    results = await multicall([(ENS_REGISTRY, RESOLVER + nodes[address]) for address in pending])
+    resolvers = {}
+    for address, (ok, data) in zip(pending, results):
+        if isinstance(data, UpstreamError):
+            errors[address] = str(data)
+        elif _decode_address(ok, data):
+            resolvers[address] = _decode_address(ok, data)
+        else:
+            cached[address] = None
+
+    candidates = list(resolvers)
+    results = await multicall([(resolvers[address], NAME + nodes[address]) for address in candidates])
+    claimed = {}
+    for address, (ok, data) in zip(candidates, results):
+        if isinstance(data, UpstreamError):
+            errors[address] = str(data)
+        elif _decode_string(ok, data):
+            claimed[address] = _decode_string(ok, data)
+        else:
+            cached[address] = None
+
+    forward, forward_errors = await resolve_names(set(claimed.values()), fallback=False)
+    for address, name in claimed.items():
+        error = forward_errors.get(name)
+        if error and error != NOT_FOUND and not error.startswith(INVALID_NAME):
+            errors[address] = error
+            continue
+        resolved = forward.get(name)
+        cached[address] = name if resolved and resolved.lower() == address else None
+
+    for address in pending:
+        if address in cached:
+            cache.set('reverse', address, cached[address])
+    names = {address: cached[address.lower()] for address in requested if cached.get(address.lower())}
+    return names, {address: errors[address.lower()] for address in requested if address.lower() in errors}
@@ -0,0 +1,10 @@
+class UpstreamError(Exception):
+    def __init__(self, message, status=None, url=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.url = url
+        self.retry_after = retry_after
+
+
+class ThrottledError(UpstreamError):
+    """The provider answered with a rate-limit response."""
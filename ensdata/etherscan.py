@@ -0,0 +1,58 @@
+from decimal import Decimal
+
+from . import config
+from .cache import get_cache
+from .client import get_client
+from .errors import UpstreamError
+
+WEI_PER_ETH = 10 ** 18
+BALANCEMULTI_CHUNK = 20
+
+
+def wei_to_eth(wei):
+    """Exact ETH amount as a Decimal (wei strings or ints)."""
+    return Decimal(int(wei or 0)).scaleb(-18)
+
+
+async def etherscan_get(module, action, chainid=1, **params):
+    query = {"chainid": chainid, "module": module, "action": action, **params, "apikey": config.ETHERSCAN_API_KEY}
+    data = await get_client().get_json(config.ETHERSCAN_API_URL, params=query, provider='etherscan')
+    if data.get('message') == 'NOTOK':
+        raise UpstreamError(f"Etherscan {module}/{action}: {data.get('result')}")
+    return data
+
+
+def balance_key(address, chainid=1):
+    return f"{chainid}:{address.lower()}"
+
+
+async def fetch_balance(address, chainid=1):
+    async def fetch():
+        data = await etherscan_get("account", "balance", chainid=chainid, address=address, tag="latest")
+        return int(data.get('result', '0'))
+
+    return await get_cache().get_or_fetch('balance', balance_key(address, chainid), fetch)
+
+
+async def fetch_internal_txs(address, offset=10, chainid=1):
+    data = await etherscan_get(
+        "account", "txlistinternal", chainid=chainid, address=address,
+        startblock=0, endblock=99999999, page=1, offset=offset, sort="desc",
+    )
+    txs = data.get('result', [])
+    return txs if isinstance(txs, list) else []
+
+
+async def fetch_nametag(address, chainid=1):
+    data = await etherscan_get("nametag", "getaddresstag", chainid=chainid, address=address)
+    result = data.get('result')
+    return result.get('nameTag') if isinstance(result, dict) else None
+
+
+async def fetch_balance_multi(addresses, chainid=1):
+    """Balances for up to 20 addresses in one ``balancemulti`` call."""
+    data = await etherscan_get("account", "balancemulti", chainid=chainid, address=",".join(addresses), tag="latest")
+    result = data.get('result')
+    if not isinstance(result, list):
+        raise UpstreamError(f"Etherscan balancemulti failed: {result}")
+    return {item['account'].lower(): int(item['balance']) for item in result}
@@ -0,0 +1,226 @@
+"""Per-address transaction history store with vectorized wallet metrics.
+
+The first ``sync`` of an address pages through its full normal, internal
+and token-transfer history (up to ``HISTORY_MAX_TXS`` rows per kind) into
+SQLite; after that only blocks from the last seen one onward are fetched,
+so a repeat visit costs one small query per kind. Addresses beyond the
+``HISTORY_MAX_ADDRESSES`` most recently synced are evicted. SQLite work
+and the metrics run in the default executor, off the shared client loop.
+ETH amounts are stored
+split into gwei and a wei remainder, both of which fit int64, so metrics
+are exact sums over NumPy columns instead of Python loops over floats.
+"""
+import asyncio
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from . import config
+from .edges import TX_KINDS, iter_account_txs
+
+WEI_PER_GWEI = 10 ** 9
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS txs (
+    chainid INTEGER NOT NULL, address TEXT NOT NULL, kind TEXT NOT NULL, hash TEXT NOT NULL, idx TEXT NOT NULL,
+    block INTEGER NOT NULL, timestamp INTEGER NOT NULL, sender TEXT, recipient TEXT,
+    value TEXT NOT NULL, value_gwei INTEGER NOT NULL, value_rem INTEGER NOT NULL,
+    fee_gwei INTEGER NOT NULL, fee_rem INTEGER NOT NULL, is_error INTEGER NOT NULL,
+    token TEXT, token_decimals INTEGER, contract TEXT,
+    PRIMARY KEY (chainid, address, kind, hash, idx)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    chainid INTEGER NOT NULL, address TEXT NOT NULL, kind TEXT NOT NULL,
+    last_block INTEGER NOT NULL, complete INTEGER NOT NULL,
+    PRIMARY KEY (chainid, address, kind)
+);
+CREATE TABLE IF NOT EXISTS addresses (
+    chainid INTEGER NOT NULL, address TEXT NOT NULL, synced_at REAL NOT NULL,
+    PRIMARY KEY (chainid, address)
+);
+"""
+COLUMNS = [
+    'kind', 'hash', 'block', 'timestamp', 'sender', 'recipient', 'value', 'value_gwei', 'value_rem',
+    'fee_gwei', 'fee_rem', 'is_error', 'token', 'token_decimals', 'contract',
+]
+
+
+def _split(wei):
+    return wei // WEI_PER_GWEI, wei % WEI_PER_GWEI
+
+
+def _join(gwei, rem):
+    """Exact wei from summed gwei and remainder columns."""
+    return int(gwei) * WEI_PER_GWEI + int(rem)
+
+
+def _row(chainid, address, kind, tx):
+    value = int(tx.get('value') or 0)
+    fee = 0
+    if kind == 'txlist':
+        fee = int(tx.get('gasUsed') or 0) * int(tx.get('gasPrice') or 0)
+    decimals = tx.get('tokenDecimal')
+    return (
+        chainid, address, kind, tx.get('hash') or '', tx['transferId'],
+        int(tx.get('blockNumber') or 0), int(tx.get('timeStamp') or 0),
+        (tx.get('from') or '').lower(), (tx.get('to') or '').lower(),
+        str(value), *(_split(value) if kind != 'tokentx' else (0, 0)), *_split(fee),
+        int(tx.get('isError') or 0), tx.get('tokenSymbol'), int(decimals) if decimals else None,
+        (tx.get('contractAddress') or '').lower() or None,
+    )
+
+
+class HistoryStore:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def state(self, address, chainid=1):
+        """``{kind: (last_block, complete)}`` for kinds synced at least once."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT kind, last_block, complete FROM sync_state WHERE chainid = ? AND address = ?",
+                (chainid, address.lower()),
+            ).fetchall()
+        return {kind: (last_block, bool(complete)) for kind, last_block, complete in rows}
+
+    def _insert(self, rows):
+        with self._lock, self._conn:
+            self._conn.executemany(f"INSERT OR IGNORE INTO txs VALUES ({', '.join('?' * 18)})", rows)
+
+    def _mark(self, chainid, address, kind, last_block, complete):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?, ?)",
+                (chainid, address, kind, last_block, int(complete)),
+            )
+
+    def touch(self, address, chainid=1):
+        """Mark ``address`` as most recently used, so eviction keeps it."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO addresses VALUES (?, ?, ?)", (chainid, address.lower(), time.time()),
+            )
+
+    def evict(self, max_addresses=None):
+        """Drop history of all but the ``max_addresses`` most recently used addresses; returns how many."""
+        max_addresses = max_addresses or config.HISTORY_MAX_ADDRESSES
+        with self._lock, self._conn:
+            cold = self._conn.execute(
+                "SELECT chainid, address FROM addresses ORDER BY synced_at DESC LIMIT -1 OFFSET ?",
+                (max_addresses,),
+            ).fetchall()
+            for table in ('txs', 'sync_state', 'addresses'):
+                self._conn.executemany(f"DELETE FROM {table} WHERE chainid = ? AND address = ?", cold)
+        return len(cold)
+
+    async def sync(self, address, kinds=TX_KINDS, chainid=1, max_txs=None):
+        """Fetch new history for ``address``; returns ``{kind: rows fetched}``.
+
+        Kinds never synced get a full pass; the rest re-read from their last
+        seen block (inclusive, duplicates are ignored) so nothing in that
+        block is missed.
+        """
+        address = address.lower()
+        max_txs = max_txs or config.HISTORY_MAX_TXS
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.touch, address, chainid)
+        state = await loop.run_in_executor(None, self.state, address, chainid)
+
+        async def sync_kind(kind):
+            last_block, complete = state.get(kind, (None, True))
+            start = last_block if last_block is not None else 0
+            fetched, newest = 0, last_block or 0
+            async for page in iter_account_txs(address, kind, max_txs=max_txs, chainid=chainid, start_block=start):
+                rows = [_row(chainid, address, kind, tx) for tx in page]
+                await loop.run_in_executor(None, self._insert, rows)
+                fetched += len(rows)
+                newest = max(newest, max(row[5] for row in rows))
+            if last_block is None:
+                complete = fetched < max_txs
+            await loop.run_in_executor(None, self._mark, chainid, address, kind, newest, complete)
+            return fetched
+
+        counts = await asyncio.gather(*(sync_kind(kind) for kind in kinds))
+        await loop.run_in_executor(None, self.evict)
+        return dict(zip(kinds, counts))
+
+    def frame(self, address, chainid=1):
+        """All stored rows for ``address`` as a DataFrame, newest first."""
+        with self._lock:
+            return pd.read_sql_query(
+                f"SELECT {', '.join(COLUMNS)} FROM txs WHERE chainid = ? AND address = ? "
+                "ORDER BY block DESC, hash, idx",
+                self._conn, params=(chainid, address.lower()),
+            )
+
+
+def wallet_metrics(df, address, top=10):
+    """Inflow/outflow, gas, activity and top counterparties from a ``frame``.
+
+    Wei amounts are exact Python ints; ``top_counterparties`` is a
+    DataFrame with transfer counts and ETH volume per counterparty.
+    """
+    address = address.lower()
+    sender, recipient = df['sender'].to_numpy(), df['recipient'].to_numpy()
+    outgoing, incoming = sender == address, recipient == address
+    eth = (df['kind'] != 'tokentx').to_numpy() & (df['is_error'] == 0).to_numpy()
+    gas = (df['kind'] == 'txlist').to_numpy() & outgoing
+    value_gwei, value_rem = df['value_gwei'].to_numpy(np.int64), df['value_rem'].to_numpy(np.int64)
+
+    counterparty = np.where(outgoing, recipient, sender)
+    volume_eth = np.where(eth, value_gwei / 1e9 + value_rem / 1e18, 0.0)
+    counterparties = (
+        pd.DataFrame({'counterparty': counterparty, 'volume_eth': volume_eth})
+        [(counterparty != address) & (counterparty != '')]
+        .groupby('counterparty')
+        .agg(transfers=('volume_eth', 'size'), volume_eth=('volume_eth', 'sum'))
+        .sort_values(['transfers', 'volume_eth'], ascending=False)
+        .head(top)
+        .reset_index()
+    )
+    timestamps = df['timestamp'].to_numpy(np.int64)
+    return {
+        'transactions': df['kind'].value_counts().to_dict(),
+        'inflow_wei': _join(value_gwei[eth & incoming].sum(), value_rem[eth & incoming].sum()),
+        'outflow_wei': _join(value_gwei[eth & outgoing].sum(), value_rem[eth & outgoing].sum()),
+        'gas_spent_wei': _join(df['fee_gwei'].to_numpy(np.int64)[gas].sum(), df['fee_rem'].to_numpy(np.int64)[gas].sum()),
+        'token_transfers_in': int(((df['kind'] == 'tokentx').to_numpy() & incoming).sum()),
+        'token_transfers_out': int(((df['kind'] == 'tokentx').to_numpy() & outgoing).sum()),
+        'active_days': int(np.unique(timestamps // 86400).size),
+        'first_seen': int(timestamps.min()) if len(timestamps) else None,
+        'last_seen': int(timestamps.max()) if len(timestamps) else None,
+        'top_counterparties': counterparties,
+    }
+
+
+async def address_metrics(address, chainid=1):
+    """Sync ``address`` into the shared store and return its wallet metrics."""
+    store = get_history_store()
+    await store.sync(address, chainid=chainid)
+
+    def compute():
+        metrics = wallet_metrics(store.frame(address, chainid), address)
+        metrics['complete'] = all(complete for _, complete in store.state(address, chainid).values())
+        return metrics
+
+    return await asyncio.get_running_loop().run_in_executor(None, compute)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_history_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = HistoryStore(config.HISTORY_DB)
+    return _store
@@ -0,0 +1,215 @@
+"""Local ENS index built from on-chain events.
+
+``sync`` walks ``eth_getLogs`` from a stored block cursor in adaptive
+block ranges (halved when the provider rejects a range, doubled while
+ranges stay small) and applies registry ``NewResolver``, resolver
+``AddrChanged``/``NameChanged`` and base registrar
+``NameRegistered``/``NameRenewed`` events to a SQLite file. Every range is
+committed together with the cursor, so an interrupted sync resumes cleanly.
+Logs that cannot be decoded (resolver events come from any contract) are
+skipped and counted in ``skipped`` rather than stalling the sync.
+
+Forward lookups join a node's current resolver with the address that
+resolver last set. Reverse lookups read the ``name`` record of the
+``<addr>.addr.reverse`` node and keep it only if it resolves back to the
+same address.
+"""
+import functools
+import sqlite3
+import threading
+
+from ens.utils import normal_name_to_hash
+from eth_abi import decode
+from eth_abi.exceptions import DecodingError
+from eth_utils import event_signature_to_log_topic, keccak, to_checksum_address
+
+from . import config
+from .contracts import BASE_REGISTRAR, ENS_REGISTRY, ZERO_ADDRESS
+from .errors import UpstreamError
+from .rpc import rpc_call
+
+ETH_NODE = bytes(normal_name_to_hash("eth"))
+ADDR_REVERSE_NODE = bytes(normal_name_to_hash("addr.reverse"))
+# Deployment block of the current ENS registry
+REGISTRY_START_BLOCK = 9380380
+
+NEW_RESOLVER = event_signature_to_log_topic("NewResolver(bytes32,address)")
+ADDR_CHANGED = event_signature_to_log_topic("AddrChanged(bytes32,address)")
+NAME_CHANGED = event_signature_to_log_topic("NameChanged(bytes32,string)")
+NAME_REGISTERED = event_signature_to_log_topic("NameRegistered(uint256,address,uint256)")
+NAME_RENEWED = event_signature_to_log_topic("NameRenewed(uint256,uint256)")
+TOPICS = ["0x" + topic.hex() for topic in (NEW_RESOLVER, ADDR_CHANGED, NAME_CHANGED, NAME_REGISTERED, NAME_RENEWED)]
+
+MIN_SPAN = 1
+MAX_SPAN = 100000
+INITIAL_SPAN = 2000
+TARGET_LOGS = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cursor (id INTEGER PRIMARY KEY CHECK (id = 0), block INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS resolvers (node BLOB PRIMARY KEY, resolver TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS addrs (node BLOB NOT NULL, resolver TEXT NOT NULL, address TEXT NOT NULL,
+                                  PRIMARY KEY (node, resolver));
+CREATE TABLE IF NOT EXISTS names (node BLOB NOT NULL, resolver TEXT NOT NULL, name TEXT NOT NULL,
+                                  PRIMARY KEY (node, resolver));
+CREATE TABLE IF NOT EXISTS expiries (node BLOB PRIMARY KEY, expires INTEGER NOT NULL);
+"""
+
+
+@functools.lru_cache(maxsize=100000)
+def name_node(name):
+    """Namehash of ``name``; cached because ENSIP-15 normalization costs ~1ms per name."""
+    return bytes(normal_name_to_hash(name))
+
+
+def reverse_node(address):
+    """Namehash of ``<addr>.addr.reverse``; the label is already normalized lowercase hex, so no ENSIP-15 pass."""
+    return keccak(ADDR_REVERSE_NODE + keccak(text=address.lower()[2:]))
+
+
+def _topic_address(data):
+    return to_checksum_address(bytes.fromhex(data[2:])[12:32])
+
+
+def _statement(log):
+    """``(sql, params)`` applying ``log`` to the index, or None for logs the index ignores."""
+    topics = log['topics']
+    topic0 = bytes.fromhex(topics[0][2:])
+    emitter = log['address'].lower()
+    if topic0 == NEW_RESOLVER and emitter == ENS_REGISTRY.lower():
+        return (
+            "INSERT OR REPLACE INTO resolvers (node, resolver) VALUES (?, ?)",
+            (bytes.fromhex(topics[1][2:]), _topic_address(log['data'])),
+        )
+    if topic0 == ADDR_CHANGED:
+        return (
+            "INSERT OR REPLACE INTO addrs (node, resolver, address) VALUES (?, ?, ?)",
+            (bytes.fromhex(topics[1][2:]), to_checksum_address(emitter), _topic_address(log['data'])),
+        )
+    if topic0 == NAME_CHANGED:
+        (name,) = decode(["string"], bytes.fromhex(log['data'][2:]))
+        return (
+            "INSERT OR REPLACE INTO names (node, resolver, name) VALUES (?, ?, ?)",
+            (bytes.fromhex(topics[1][2:]), to_checksum_address(emitter), name),
+        )
+    if topic0 in (NAME_REGISTERED, NAME_RENEWED) and emitter == BASE_REGISTRAR.lower():
+        node = keccak(ETH_NODE + bytes.fromhex(topics[1][2:]))
+        (expires,) = decode(["uint256"], bytes.fromhex(log['data'][2:])[-32:])
+        return "INSERT OR REPLACE INTO expiries (node, expires) VALUES (?, ?)", (node, expires)
+    return None
+
+
+class ENSIndex:
+    def __init__(self, path, start_block=REGISTRY_START_BLOCK):
+        self.path = path
+        self.start_block = start_block
+        self.span = INITIAL_SPAN
+        self.skipped = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def cursor(self):
+        """Last block fully applied to the index."""
+        with self._lock:
+            row = self._conn.execute("SELECT block FROM cursor WHERE id = 0").fetchone()
+        return row[0] if row else self.start_block - 1
+
+    def _apply(self, logs, end_block):
+        with self._lock, self._conn:
+            for log in logs:
+                try:
+                    statement = _statement(log)
+                except (IndexError, ValueError, DecodingError):
+                    self.skipped += 1
+                    continue
+                if statement:
+                    self._conn.execute(*statement)
+            self._conn.execute("INSERT OR REPLACE INTO cursor (id, block) VALUES (0, ?)", (end_block,))
+
+    async def sync(self, to_block=None, progress=None):
+        """Apply events up to ``to_block`` (default: chain head); returns the new cursor."""
+        head = to_block if to_block is not None else int(await rpc_call("eth_blockNumber", []), 16)
+        start = self.cursor() + 1
+        while start <= head:
+            end = min(start + self.span - 1, head)
+            try:
+                logs = await rpc_call("eth_getLogs", [{"fromBlock": hex(start), "toBlock": hex(end), "topics": [TOPICS]}])
+            except UpstreamError:
+                # Range too large or too many results: retry a smaller range
+                if self.span <= MIN_SPAN:
+                    raise
+                self.span = max(MIN_SPAN, self.span // 2)
+                continue
+            self._apply(logs, end)
+            if progress:
+                progress(end, head, len(logs))
+            start = end + 1
+            if len(logs) < TARGET_LOGS // 2:
+                self.span = min(MAX_SPAN, self.span * 2)
+        return self.cursor()
+
+    def _address_for_node(self, node):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT a.address FROM resolvers r JOIN addrs a ON a.node = r.node AND a.resolver = r.resolver "
+                "WHERE r.node = ?",
+                (node,),
+            ).fetchone()
+        address = row[0] if row else None
+        return address if address and address != to_checksum_address(ZERO_ADDRESS) else None
+
+    def address(self, name):
+        """Indexed address for ``name``, or None if the index has none."""
+        try:
+            node = name_node(name)
+        except Exception:
+            return None
+        return self._address_for_node(node)
+
+    def addresses(self, names):
+        """``{name: address}`` for the names the index can answer."""
+        found = {}
+        for name in names:
+            address = self.address(name)
+            if address:
+                found[name] = address
+        return found
+
+    def name(self, address):
+        """Verified primary name for ``address`` from reverse records, or None."""
+        node = reverse_node(address)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT n.name FROM resolvers r JOIN names n ON n.node = r.node AND n.resolver = r.resolver "
+                "WHERE r.node = ?",
+                (node,),
+            ).fetchone()
+        if not row or not row[0]:
+            return None
+        forward = self.address(row[0])
+        return row[0] if forward and forward.lower() == address.lower() else None
+
+    def expiry(self, name):
+        """Registration expiry (unix time) for a ``.eth`` second-level name."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires FROM expiries WHERE node = ?", (name_node(name),)
+            ).fetchone()
+        return row[0] if row else None
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """The process-wide index when ``ENSDATA_INDEX_DB`` is set, else None."""
+    global _index
+    if _index is None and config.ENS_INDEX_DB:
+        with _index_lock:
+            if _index is None:
+                _index = ENSIndex(config.ENS_INDEX_DB)
+    return _index
@@ -0,0 +1,107 @@
+"""Main Lookup data assembly.
+
+Once the ENS name resolves, the balance, price and internal-transaction
+fetches are started together so the lookup costs roughly the slowest of
+them rather than their sum. Native balances cover every configured chain;
+``balance_wei``/``balance_eth`` are their ETH total and ``chain_balances``
+the per-chain amounts.
+"""
+import asyncio
+
+from .balances import fetch_address_balances
+from .cache import MISSING, get_cache
+from .chains import total_eth_wei
+from .etherscan import WEI_PER_ETH, fetch_internal_txs
+from .index import get_index
+from .prices import fetch_eth_price, get_price_feed
+from .profile import fetch_profile
+from .rpc import get_web3
+from .sim import fetch_sim_balances
+from .singleflight import get_singleflight
+
+
+async def resolve_name(ens_name):
+    cache = get_cache()
+    address = cache.get('ens', ens_name.lower())
+    if address is MISSING and get_index() is not None:
+        address = get_index().address(ens_name) or MISSING
+    if address is MISSING:
+        loop = asyncio.get_running_loop()
+        address = await get_singleflight().do(
+            ('ens', ens_name.lower()),
+            lambda: loop.run_in_executor(None, get_web3().ens.address, ens_name),
+            'rpc', 'ens.address',
+        )
+        if address:
+            cache.set('ens', ens_name.lower(), address)
+    return address
+
+
+async def main_lookup(ens_name, tx_limit=10):
+    # Profile records only need the name, so they load while it resolves
+    profile = asyncio.ensure_future(fetch_profile(ens_name))
+    try:
+        address = await resolve_name(ens_name)
+    except BaseException:
+        profile.cancel()
+        raise
+    if not address:
+        profile.cancel()
+        return None
+
+    balances, price, txs, profile = await asyncio.gather(
+        fetch_address_balances(address),
+        fetch_eth_price(),
+        fetch_internal_txs(address, offset=tx_limit),
+        profile,
+        return_exceptions=True,
+    )
+    if isinstance(balances, BaseException):
+        raise balances
+    chain_balances, balance_errors = balances
+    if isinstance(price, BaseException):
+        price = None
+    if isinstance(txs, BaseException):
+        txs = []
+    profile_error = None
+    if isinstance(profile, BaseException):
+        profile, profile_error = {}, profile
+
+    balance_wei = total_eth_wei(chain_balances)
+    balance_eth = balance_wei / WEI_PER_ETH
+    return {
+        'ens_name': ens_name,
+        'address': address,
+        'balance_wei': balance_wei,
+        'balance_eth': balance_eth,
+        'chain_balances': chain_balances,
+        'balance_errors': {chainid: str(error) for chainid, error in balance_errors.items()},
+        'price': price,
+        'price_age': get_price_feed().snapshot()['age'],
+        'eth_usd': balance_eth * price if price is not None else None,
+        'internal_txs': txs,
+        'profile': profile,
+        'profile_error': profile_error,
+    }
+
+
+async def address_holdings(address, include_tokens=True):
+    """Fetch native balances on every configured chain and (optionally) SIM token balances together."""
+    balances, tokens = await asyncio.gather(
+        fetch_address_balances(address),
+        fetch_sim_balances(address) if include_tokens else asyncio.sleep(0, result=[]),
+        return_exceptions=True,
+    )
+    if isinstance(balances, BaseException):
+        raise balances
+    chain_balances, _ = balances
+    balance_wei = total_eth_wei(chain_balances)
+    holdings = {
+        'balance_wei': balance_wei, 'balance_eth': balance_wei / WEI_PER_ETH, 'chain_balances': chain_balances,
+        'tokens': [], 'tokens_error': None,
+    }
+    if isinstance(tokens, BaseException):
+        holdings['tokens_error'] = tokens
+    else:
+        holdings['tokens'] = tokens
+    return holdings
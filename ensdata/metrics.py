@@ -0,0 +1,247 @@
+"""Instrumentation of upstream calls per provider and endpoint.
+
+Every attempt the scheduler makes (and every Web3 provider request) is
+recorded with its latency, outcome (ok / error / throttled) and request
+and response sizes. ``prometheus()`` renders these, the scheduler,
+single-flight and RPC endpoint counters and the cache hit ratios in the
+Prometheus text format, and
+``serve_metrics`` exposes that on ``/metrics``.
+"""
+import bisect
+import re
+import threading
+from collections import defaultdict
+from urllib.parse import urlparse
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+OUTCOMES = ('ok', 'error', 'throttled')
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimate by linear interpolation inside the bucket, as Prometheus does."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+class _Series:
+    def __init__(self):
+        self.latency = Histogram()
+        self.outcomes = dict.fromkeys(OUTCOMES, 0)
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = defaultdict(_Series)
+
+    def observe(self, provider, endpoint, seconds, outcome):
+        with self._lock:
+            series = self._series[(provider, endpoint)]
+            series.latency.observe(seconds)
+            series.outcomes[outcome] += 1
+
+    def add_bytes(self, provider, endpoint, sent, received):
+        with self._lock:
+            series = self._series[(provider, endpoint)]
+            series.bytes_sent += sent
+            series.bytes_received += received
+
+    def retry(self, provider, endpoint):
+        with self._lock:
+            self._series[(provider, endpoint)].retries += 1
+
+    def snapshot(self):
+        """One dict per (provider, endpoint), slowest p99 first."""
+        with self._lock:
+            rows = []
+            for (provider, endpoint), series in self._series.items():
+                latency = series.latency
+                rows.append({
+                    'provider': provider,
+                    'endpoint': endpoint,
+                    'requests': latency.count,
+                    **{outcome: series.outcomes[outcome] for outcome in OUTCOMES if outcome != 'ok'},
+                    'retries': series.retries,
+                    'mean_s': latency.sum / latency.count if latency.count else None,
+                    'p50_s': latency.quantile(0.5),
+                    'p95_s': latency.quantile(0.95),
+                    'p99_s': latency.quantile(0.99),
+                    'bytes_sent': series.bytes_sent,
+                    'bytes_received': series.bytes_received,
+                })
+        return sorted(rows, key=lambda row: -(row['p99_s'] or 0))
+
+    def prometheus(self):
+        from .cache import get_cache
+        from .scheduler import get_scheduler
+
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            series = sorted(self._series.items())
+            family('ensdata_upstream_request_duration_seconds', 'histogram', "Upstream request latency.")
+            for (provider, endpoint), s in series:
+                labels = _labels(provider=provider, endpoint=endpoint)
+                cumulative = 0
+                for bound, count in zip(s.latency.buckets + (float('inf'),), s.latency.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'ensdata_upstream_request_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"ensdata_upstream_request_duration_seconds_sum{{{labels}}} {s.latency.sum}")
+                lines.append(f"ensdata_upstream_request_duration_seconds_count{{{labels}}} {s.latency.count}")
+            family('ensdata_upstream_requests_total', 'counter', "Upstream request attempts by outcome.")
+            for (provider, endpoint), s in series:
+                for outcome in OUTCOMES:
+                    labels = _labels(provider=provider, endpoint=endpoint, outcome=outcome)
+                    lines.append(f"ensdata_upstream_requests_total{{{labels}}} {s.outcomes[outcome]}")
+            family('ensdata_upstream_retries_total', 'counter', "Upstream requests retried after an error or throttle.")
+            for (provider, endpoint), s in series:
+                lines.append(f"ensdata_upstream_retries_total{{{_labels(provider=provider, endpoint=endpoint)}}} {s.retries}")
+            family('ensdata_upstream_bytes_total', 'counter', "Bytes sent to and received from upstreams.")
+            for (provider, endpoint), s in series:
+                for direction, value in (('sent', s.bytes_sent), ('received', s.bytes_received)):
+                    labels = _labels(provider=provider, endpoint=endpoint, direction=direction)
+                    lines.append(f"ensdata_upstream_bytes_total{{{labels}}} {value}")
+
+        family('ensdata_scheduler_events_total', 'counter', "Scheduler request, throttle, retry and failure counts.")
+        for provider, counters in sorted(get_scheduler().stats().items()):
+            for event, value in sorted(counters.items()):
+                lines.append(f"ensdata_scheduler_events_total{{{_labels(provider=provider, event=event)}}} {value}")
+
+        from .singleflight import get_singleflight
+
+        family('ensdata_singleflight_calls_total', 'counter', "Upstream calls made and identical in-flight calls joined instead.")
+        for row in sorted(get_singleflight().snapshot(), key=lambda row: (row['provider'], row['endpoint'])):
+            for result, value in (('upstream', row['calls']), ('coalesced', row['coalesced'])):
+                labels = _labels(provider=row['provider'], endpoint=row['endpoint'], result=result)
+                lines.append(f"ensdata_singleflight_calls_total{{{labels}}} {value}")
+        family('ensdata_singleflight_in_flight', 'gauge', "Distinct upstream calls currently in flight.")
+        lines.append(f"ensdata_singleflight_in_flight {get_singleflight().in_flight()}")
+
+        from .rpc_pool import get_rpc_pool
+
+        pool = get_rpc_pool()
+        if pool is not None:
+            endpoints = pool.stats()
+            family('ensdata_rpc_endpoint_events_total', 'counter', "RPC endpoint requests, hedges, wins, errors and breaker trips.")
+            for row in endpoints:
+                for event in ('requests', 'hedges', 'wins', 'errors', 'trips'):
+                    lines.append(f"ensdata_rpc_endpoint_events_total{{{_labels(endpoint=row['endpoint'], event=event)}}} {row[event]}")
+            family('ensdata_rpc_endpoint_latency_ewma_seconds', 'gauge', "EWMA of RPC endpoint latency.")
+            family_errors = []
+            for row in endpoints:
+                labels = _labels(endpoint=row['endpoint'])
+                if row['latency_ewma_s'] is not None:
+                    lines.append(f"ensdata_rpc_endpoint_latency_ewma_seconds{{{labels}}} {row['latency_ewma_s']}")
+                family_errors.append(f"ensdata_rpc_endpoint_error_rate{{{labels}}} {row['error_rate_ewma']}")
+            family('ensdata_rpc_endpoint_error_rate', 'gauge', "EWMA of RPC endpoint error rate.")
+            lines.extend(family_errors)
+            family('ensdata_rpc_endpoint_circuit_open', 'gauge', "1 while the endpoint's circuit breaker is open or half open.")
+            for row in endpoints:
+                lines.append(f"ensdata_rpc_endpoint_circuit_open{{{_labels(endpoint=row['endpoint'])}}} {int(row['state'] != 'closed')}")
+
+        stats = get_cache().stats()
+        family('ensdata_cache_lookups_total', 'counter', "Cache lookups by kind, tier and result.")
+        family_ratio = []
+        for kind, tiers in sorted(stats['kinds'].items()):
+            for tier, counts in sorted(tiers.items()):
+                for result in ('hit', 'miss'):
+                    labels = _labels(kind=kind, tier=tier, result=result)
+                    lines.append(f"ensdata_cache_lookups_total{{{labels}}} {counts[result]}")
+                if counts['hit_ratio'] is not None:
+                    family_ratio.append(f"ensdata_cache_hit_ratio{{{_labels(kind=kind, tier=tier)}}} {counts['hit_ratio']}")
+        family('ensdata_cache_hit_ratio', 'gauge', "Cache hit ratio by kind and tier.")
+        lines.extend(family_ratio)
+        family('ensdata_cache_entries', 'gauge', "Entries in the in-memory cache tier.")
+        lines.append(f"ensdata_cache_entries {stats['entries']}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+_HEX = re.compile(r"0x[0-9a-fA-F]{6,}")
+
+
+def endpoint_label(provider, url, params=None, payload=None):
+    """Low-cardinality endpoint name for a request (never includes addresses)."""
+    if provider == 'etherscan' and params:
+        return f"{params.get('module')}/{params.get('action')}"
+    if provider == 'rpc' and payload is not None:
+        calls = payload if isinstance(payload, list) else [payload]
+        methods = sorted({call.get('method', '?') for call in calls})
+        return ("batch:" if isinstance(payload, list) else "") + "+".join(methods)
+    path = urlparse(url).path.rstrip('/')
+    if provider == 'sim':
+        # /v1/evm/balances/0xabc... -> balances
+        parts = [part for part in path.split('/') if part and not _HEX.fullmatch(part)]
+        return parts[-1] if parts else path
+    return _HEX.sub('{address}', path.rsplit('/v1', 1)[-1] or path)
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    return _metrics
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def serve_metrics(port, host='0.0.0.0'):
+    """Serve ``prometheus()`` on ``http://host:port/metrics`` from the client loop (idempotent)."""
+    global _server
+    from aiohttp import web
+
+    from .client import get_client
+
+    async def handle(request):
+        return web.Response(text=get_metrics().prometheus(), content_type='text/plain', charset='utf-8')
+
+    async def start():
+        app = web.Application()
+        app.router.add_get('/metrics', handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
+    with _server_lock:
+        if _server is None:
+            _server = get_client().run(start())
+    return _server
@@ -0,0 +1,88 @@
+"""Token-portfolio valuation for many addresses from SIM balances.
+
+Balances for every address are fetched concurrently (bounded by
+``PORTFOLIO_CONCURRENCY``) and cached for one block. ``token_frame``
+normalizes raw integer amounts per decimals group with string slicing,
+so amounts stay exact without a per-row ``int``/``float`` branch.
+"""
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from .cache import get_cache
+from .chains import chain_ids_param
+from .errors import UpstreamError
+from .sim import fetch_sim_balances
+
+PORTFOLIO_CONCURRENCY = 8
+TOKEN_COLUMNS = ['symbol', 'name', 'chain', 'amount', 'amount_float', 'price_usd', 'value_usd']
+
+
+def _scale(raw, decimals):
+    """Exact decimal strings for a Series of raw integer strings sharing ``decimals``."""
+    if decimals <= 0:
+        return raw
+    padded = raw.str.zfill(decimals + 1)
+    fraction = padded.str[-decimals:].str.rstrip('0')
+    whole = padded.str[:-decimals]
+    return whole.where(fraction == '', whole + '.' + fraction)
+
+
+def token_frame(balances):
+    """DataFrame of SIM balance rows with exact ``amount`` strings and float USD values."""
+    df = pd.DataFrame(list(balances))
+    if df.empty:
+        return pd.DataFrame(columns=TOKEN_COLUMNS)
+    for column in TOKEN_COLUMNS:
+        if column not in df:
+            df[column] = None
+    raw = df['amount'].fillna('0').astype(str)
+    decimals = df['decimals'] if 'decimals' in df else pd.Series(0, index=df.index)
+    decimals = pd.to_numeric(decimals, errors='coerce').fillna(0).astype(int)
+    amount = pd.Series('', index=df.index, dtype=object)
+    for value, rows in decimals.groupby(decimals).groups.items():
+        amount[rows] = _scale(raw[rows], value)
+    df['amount'] = amount
+    df['amount_float'] = pd.to_numeric(amount, errors='coerce')
+    df['price_usd'] = pd.to_numeric(df['price_usd'], errors='coerce')
+    df['value_usd'] = pd.to_numeric(df['value_usd'], errors='coerce')
+    return df[TOKEN_COLUMNS].sort_values('value_usd', ascending=False, na_position='last').reset_index(drop=True)
+
+
+async def fetch_portfolios(addresses, chain_ids=None, concurrency=PORTFOLIO_CONCURRENCY):
+    """Return ``(portfolios, errors)`` keyed by address.
+
+    Each portfolio is ``{'tokens': DataFrame, 'total_usd': float}`` over every
+    chain in ``chain_ids`` (default ``config.CHAINS``), one SIM call per address.
+    """
+    cache = get_cache()
+    chain_ids = chain_ids or chain_ids_param()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(address):
+        async with semaphore:
+            return await fetch_sim_balances(address, chain_ids=chain_ids)
+
+    async def balances(address):
+        try:
+            return await cache.get_or_fetch('portfolio', f"{chain_ids}:{address.lower()}", lambda: fetch(address))
+        except UpstreamError as e:
+            return e
+
+    addresses = list(dict.fromkeys(addresses))
+    results = await asyncio.gather(*(balances(address) for address in addresses))
+    portfolios, errors = {}, {}
+    for address, result in zip(addresses, results):
+        if isinstance(result, UpstreamError):
+            errors[address] = str(result)
+            continue
+        tokens = token_frame(result)
+        portfolios[address] = {'tokens': tokens, 'total_usd': float(np.nansum(tokens['value_usd'].to_numpy(float)))}
+    return portfolios, errors
+
+
+def portfolio_totals(portfolios):
+    """Per-address USD totals and their aggregate."""
+    totals = {address: portfolio['total_usd'] for address, portfolio in portfolios.items()}
+    return totals, sum(totals.values())
@@ -0,0 +1,110 @@
+"""ETH/USD price served from one background feed shared by every session.
+
+The feed polls CoinMarketCap on a fixed interval and keeps the last good
+value with its timestamp, so lookups never wait on CMC and credit usage
+grows with uptime rather than with traffic.
+"""
+import asyncio
+import logging
+import threading
+import time
+
+from . import config
+from .client import get_client
+from .errors import UpstreamError
+from .scheduler import PRIORITY_BACKGROUND, set_priority
+
+logger = logging.getLogger(__name__)
+
+
+async def fetch_cmc_price(symbol="ETH"):
+    url = f"{config.COINMARKETCAP_API_URL}/cryptocurrency/quotes/latest"
+    headers = {"X-CMC_PRO_API_KEY": config.COINMARKETCAP_API_KEY}
+    data = await get_client().get_json(url, params={"symbol": symbol}, headers=headers, provider='cmc')
+    try:
+        return float(data['data'][symbol]['quote']['USD']['price'])
+    except (KeyError, TypeError, ValueError) as e:
+        status = data.get('status', data) if isinstance(data, dict) else data
+        raise UpstreamError(f"Unexpected CoinMarketCap response: {status}") from e
+
+
+class PriceFeed:
+    def __init__(self, interval=None, fetch=fetch_cmc_price):
+        self.interval = interval or config.PRICE_REFRESH_INTERVAL
+        self._fetch = fetch
+        self._lock = threading.Lock()
+        self._price = None
+        self._updated_at = None
+        self._error = None
+        self._future = None
+        self._ready = asyncio.Event()
+
+    def start(self):
+        with self._lock:
+            if self._future is None or self._future.done():
+                self._future = get_client().submit(self._run())
+        return self
+
+    async def _run(self):
+        set_priority(PRIORITY_BACKGROUND)
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.interval)
+
+    async def refresh(self):
+        try:
+            price = await self._fetch()
+        except UpstreamError as e:
+            logger.warning("ETH price refresh failed: %s", e)
+            with self._lock:
+                self._error = str(e)
+        except Exception as e:
+            # Anything else must not end the feed either; the next interval tries again
+            logger.exception("ETH price refresh failed")
+            with self._lock:
+                self._error = str(e)
+        else:
+            with self._lock:
+                self._price, self._updated_at, self._error = price, time.time(), None
+        self._ready.set()
+
+    async def wait_ready(self, timeout=None):
+        """Wait for the first refresh attempt after start-up."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def snapshot(self):
+        with self._lock:
+            age = time.time() - self._updated_at if self._updated_at else None
+            return {'price': self._price, 'updated_at': self._updated_at, 'age': age, 'error': self._error}
+
+
+_feed = None
+_feed_lock = threading.Lock()
+
+
+def get_price_feed():
+    """The shared feed, restarted if its polling loop has stopped."""
+    global _feed
+    if _feed is None:
+        with _feed_lock:
+            if _feed is None:
+                _feed = PriceFeed().start()
+    else:
+        # A no-op while the loop runs
+        _feed.start()
+    return _feed
+
+
+async def fetch_eth_price():
+    """Last good ETH/USD price; waits briefly for the feed's first refresh."""
+    feed = get_price_feed()
+    snapshot = feed.snapshot()
+    if snapshot['price'] is None:
+        await feed.wait_ready(config.PRICE_WAIT_TIMEOUT)
+        snapshot = feed.snapshot()
+    if snapshot['price'] is None:
+        raise UpstreamError(f"ETH price unavailable: {snapshot['error'] or 'no data yet'}")
+    return snapshot['price']
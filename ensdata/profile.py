@@ -0,0 +1,117 @@
+"""ENS profile records (text records, coin addresses, contenthash).
+
+Every requested record of every name is read through Multicall: one
+round for the names' resolvers and one for all of their records, so the
+cost does not grow with the number of keys or names. Keys in
+``COIN_TYPES`` are read with ``addr(node, coinType)``, ``contenthash``
+with ``contenthash(node)`` and anything else as a text record. Non-ETH
+coin addresses and the contenthash are returned as raw 0x-hex bytes.
+"""
+from eth_abi import decode, encode
+from eth_utils import function_signature_to_4byte_selector, to_checksum_address
+
+from .cache import get_cache
+from .contracts import ENS_REGISTRY
+from .ens import INVALID_NAME, RESOLVER, _decode_address, _decode_string, multicall
+from .errors import UpstreamError
+from .index import name_node
+
+PROFILE_KEYS = [
+    'avatar', 'display', 'description', 'email', 'url', 'twitter', 'github', 'discord', 'telegram', 'reddit',
+    'eth', 'btc', 'ltc', 'doge', 'contenthash'
+]
+PROFILE_LABELS = {
+    'avatar': 'Avatar', 'display': 'Display Name', 'description': 'Bio/Description', 'url': 'Website',
+    'email': 'Email', 'twitter': 'Twitter', 'github': 'GitHub', 'discord': 'Discord', 'telegram': 'Telegram',
+    'reddit': 'Reddit', 'eth': 'ETH Address', 'btc': 'BTC Address', 'ltc': 'LTC Address', 'doge': 'DOGE Address',
+    'contenthash': 'Content Hash',
+}
+# SLIP-44 coin types for the coin-address keys (ENSIP-9)
+COIN_TYPES = {'eth': 60, 'btc': 0, 'ltc': 2, 'doge': 3}
+
+TEXT = function_signature_to_4byte_selector("text(bytes32,string)")
+COIN_ADDR = function_signature_to_4byte_selector("addr(bytes32,uint256)")
+CONTENTHASH = function_signature_to_4byte_selector("contenthash(bytes32)")
+
+
+def _record_call(node, key):
+    if key in COIN_TYPES:
+        return COIN_ADDR + encode(["bytes32", "uint256"], [node, COIN_TYPES[key]])
+    if key == 'contenthash':
+        return CONTENTHASH + node
+    return TEXT + encode(["bytes32", "string"], [node, key])
+
+
+def _decode_record(key, ok, data):
+    if key not in COIN_TYPES and key != 'contenthash':
+        return _decode_string(ok, data)
+    if not ok or not isinstance(data, bytes) or len(data) < 64:
+        return None
+    try:
+        (value,) = decode(["bytes"], data)
+    except Exception:
+        return None
+    if not value:
+        return None
+    if key == 'eth' and len(value) == 20:
+        return to_checksum_address(value)
+    return "0x" + value.hex()
+
+
+async def fetch_profiles(ens_names, keys=PROFILE_KEYS):
+    """Return ``(profiles, errors)``: non-empty records per name for ``keys``.
+
+    Names with no resolver get an empty profile. Fetched records are cached
+    per name, and a cached entry is reused when it covers every requested key.
+    """
+    requested = list(dict.fromkeys(ens_names))
+    keys = list(dict.fromkeys(keys))
+    cache = get_cache()
+    records, errors, nodes = {}, {}, {}
+    for name in requested:
+        cached = cache.get('profile', name.lower())
+        if isinstance(cached, dict) and all(key in cached for key in keys):
+            records[name] = cached
+            continue
+        try:
+            nodes[name] = name_node(name)
+        except Exception as e:
+            errors[name] = f"{INVALID_NAME}: {e}"
+
+    names = list(nodes)
+    results = await multicall([(ENS_REGISTRY, RESOLVER + nodes[name]) for name in names])
+    resolvers = {}
+    for name, (ok, data) in zip(names, results):
+        if isinstance(data, UpstreamError):
+            errors[name] = str(data)
+        elif _decode_address(ok, data):
+            resolvers[name] = _decode_address(ok, data)
+        else:
+            records[name] = dict.fromkeys(keys)
+
+    names = list(resolvers)
+    results = await multicall([(resolvers[name], _record_call(nodes[name], key)) for name in names for key in keys])
+    for i, name in enumerate(names):
+        row = results[i * len(keys):(i + 1) * len(keys)]
+        failed = next((data for _, data in row if isinstance(data, UpstreamError)), None)
+        if failed is not None:
+            errors[name] = str(failed)
+            continue
+        records[name] = {key: _decode_record(key, ok, data) for key, (ok, data) in zip(keys, row)}
+
+    for name in nodes:
+        if name in records:
+            cache.set('profile', name.lower(), records[name])
+    profiles = {
+        name: {key: records[name][key] for key in keys if records[name].get(key)}
+        for name in requested if name in records
+    }
+    return profiles, errors
+
+
+async def fetch_profile(ens_name, keys=PROFILE_KEYS):
+    """Non-empty ENS records for ``ens_name``."""
+    profiles, errors = await fetch_profiles([ens_name], keys)
+    if ens_name in errors:
+        raise UpstreamError(errors[ens_name])
+    return profiles[ens_name]
@@ -0,0 +1,78 @@
+import threading
+
+from . import config
+from .client import get_client
+from .errors import UpstreamError
+from .rpc_pool import get_rpc_pool
+
+_w3 = None
+_w3_lock = threading.Lock()
+
+
+class RPCError(UpstreamError):
+    def __init__(self, message, code=None, url=None):
+        super().__init__(message, url=url)
+        self.code = code
+
+
+def get_web3():
+    """Process-wide Web3 instance for the paths that need web3 itself (e.g. ENS fallback).
+
+    web3 takes the better part of a second to import, so it is only loaded
+    on first use. Every session, rerun and executor thread then shares this
+    instance and its keep-alive connection pool.
+    """
+    global _w3
+    if _w3 is None:
+        with _w3_lock:
+            if _w3 is None:
+                from .web3_http import make_web3
+
+                _w3 = make_web3(config.ETH_RPC_URL, get_rpc_pool())
+    return _w3
+
+
+async def rpc_batch(calls, url=None):
+    """Send ``(method, params)`` pairs as one JSON-RPC batch.
+
+    Returns one entry per call, in order: the ``result`` value, or an
+    ``RPCError`` for calls the node answered with an error. Without an
+    explicit ``url`` the batch is routed over ``config.ETH_RPC_URLS``.
+    """
+    if not calls:
+        return []
+    pool = get_rpc_pool() if url is None else None
+    url = url or config.ETH_RPC_URL
+    if not url:
+        raise RPCError("ETH_RPC_URL is not set")
+    payload = [{"jsonrpc": "2.0", "id": i, "method": method, "params": params} for i, (method, params) in enumerate(calls)]
+    data = await get_client().post_json(url, payload, provider='rpc', pool=pool)
+    if not isinstance(data, list):
+        # Providers answer a rejected batch with a single error object
+        error = data.get('error', {}) if isinstance(data, dict) else {}
+        raise RPCError(error.get('message', "Invalid batch response"), code=error.get('code'), url=url)
+
+    by_id = {item.get('id'): item for item in data if isinstance(item, dict)}
+    results = []
+    for i in range(len(calls)):
+        item = by_id.get(i)
+        if item is None:
+            results.append(RPCError("Missing response in batch", url=url))
+        elif item.get('error'):
+            results.append(RPCError(item['error'].get('message', ''), code=item['error'].get('code'), url=url))
+        else:
+            results.append(item.get('result'))
+    return results
+
+
+async def rpc_call(method, params, url=None):
+    (result,) = await rpc_batch([(method, params)], url=url)
+    if isinstance(result, RPCError):
+        raise result
+    return result
+
+
+async def get_balances(addresses, block="latest"):
+    """``eth_getBalance`` for every address in one JSON-RPC batch."""
+    results = await rpc_batch([("eth_getBalance", [address, block]) for address in addresses])
+    return {address: int(result, 16) for address, result in zip(addresses, results) if not isinstance(result, RPCError)}
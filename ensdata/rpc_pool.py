@@ -0,0 +1,193 @@
+"""Latency-routed, hedged JSON-RPC requests over several endpoints.
+
+With more than one URL in ``config.ETH_RPC_URLS`` every RPC request goes
+to the fastest healthy endpoint, ranked by an EWMA of its latency
+inflated by its EWMA error rate. If no answer has arrived after that
+endpoint's recent p95 latency, a hedged duplicate goes to the next-best
+endpoint and whichever answers first wins; the other attempt is
+cancelled. A failed attempt fails over to the next endpoint straight
+away. Each endpoint has a circuit breaker: after
+``config.RPC_BREAKER_FAILURES`` consecutive failures it is skipped for
+``config.RPC_BREAKER_COOLDOWN`` seconds, then a single probe request
+decides whether it closes again.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+from . import config
+from .errors import UpstreamError
+from .scheduler import check_throttled, is_retryable
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+LATENCY_WINDOW = 200
+MIN_HEDGE_SAMPLES = 20
+
+
+class RPCEndpoint:
+    def __init__(self, url):
+        self.url = url
+        self.latency = None
+        self.error_rate = 0.0
+        self.recent = deque(maxlen=LATENCY_WINDOW)
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.counts = {'requests': 0, 'errors': 0, 'hedges': 0, 'wins': 0, 'trips': 0}
+
+    @property
+    def name(self):
+        """URL for display: no query, and long path segments (API keys) masked."""
+        parsed = urlparse(self.url)
+        path = "/".join('***' if len(segment) > 16 else segment for segment in parsed.path.split('/'))
+        return f"{parsed.scheme}://{parsed.netloc}{path}"
+
+    def score(self):
+        """Expected seconds per answer; endpoints never measured come first."""
+        if self.latency is None:
+            return 0.0
+        return self.latency / max(1.0 - self.error_rate, 0.1)
+
+    def hedge_delay(self):
+        if len(self.recent) < MIN_HEDGE_SAMPLES:
+            return config.RPC_HEDGE_DELAY
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(config.RPC_HEDGE_QUANTILE * len(ordered)))]
+
+    def available(self, now):
+        if self.state == OPEN and now - self.opened_at >= config.RPC_BREAKER_COOLDOWN:
+            self.state = HALF_OPEN
+        return self.state == CLOSED or (self.state == HALF_OPEN and not self.probing)
+
+    def observe_latency(self, seconds):
+        alpha = config.RPC_EWMA_ALPHA
+        self.latency = seconds if self.latency is None else alpha * seconds + (1 - alpha) * self.latency
+        self.recent.append(seconds)
+
+    def succeeded(self, seconds):
+        self.observe_latency(seconds)
+        self.error_rate *= 1 - config.RPC_EWMA_ALPHA
+        self.failures = 0
+        self.state = CLOSED
+
+    def failed(self, seconds):
+        self.observe_latency(seconds)
+        alpha = config.RPC_EWMA_ALPHA
+        self.error_rate = alpha + (1 - alpha) * self.error_rate
+        self.failures += 1
+        self.counts['errors'] += 1
+        if self.state == HALF_OPEN or self.failures >= config.RPC_BREAKER_FAILURES:
+            if self.state != OPEN:
+                self.counts['trips'] += 1
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def as_dict(self):
+        return {
+            'endpoint': self.name, 'state': self.state,
+            'latency_ewma_s': self.latency, 'error_rate_ewma': self.error_rate,
+            'hedge_delay_s': self.hedge_delay(), **self.counts,
+        }
+
+
+class RPCPool:
+    def __init__(self, urls=None, provider='rpc'):
+        self.provider = provider
+        self.endpoints = [RPCEndpoint(url) for url in (urls or config.ETH_RPC_URLS)]
+
+    def ranked(self):
+        """Endpoints that may take a request now, best first."""
+        now = time.monotonic()
+        return sorted((endpoint for endpoint in self.endpoints if endpoint.available(now)), key=RPCEndpoint.score)
+
+    async def call(self, send):
+        """Return the first successful ``send(url)`` across endpoints, hedging slow ones.
+
+        Errors a retry elsewhere cannot fix (HTTP 4xx other than 429) are
+        raised as they are; otherwise the last endpoint's error is raised
+        once every available endpoint has failed.
+        """
+        candidates = self.ranked()
+        if not candidates:
+            raise UpstreamError(f"All {len(self.endpoints)} RPC endpoints are unavailable (circuit open)")
+        attempts = {}
+        error = None
+
+        def launch(hedge=False):
+            endpoint = candidates.pop(0)
+            endpoint.counts['requests'] += 1
+            if hedge:
+                endpoint.counts['hedges'] += 1
+            if endpoint.state == HALF_OPEN:
+                endpoint.probing = True
+            attempts[asyncio.ensure_future(self._attempt(endpoint, send))] = (endpoint, time.perf_counter())
+
+        launch()
+        hedged = config.RPC_HEDGE_QUANTILE <= 0
+        try:
+            while attempts:
+                timeout = None
+                if not hedged and candidates:
+                    endpoint, started = next(iter(attempts.values()))
+                    timeout = max(0.0, endpoint.hedge_delay() - (time.perf_counter() - started))
+                done, _ = await asyncio.wait(attempts, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    launch(hedge=True)
+                    continue
+                winner = None
+                for task in done:
+                    endpoint, _ = attempts.pop(task)
+                    if task.exception() is None:
+                        winner = winner or (endpoint, task)
+                    elif error is None or is_retryable(error):
+                        error = task.exception()
+                if winner is not None:
+                    winner[0].counts['wins'] += 1
+                    return winner[1].result()
+                if not is_retryable(error):
+                    raise error
+                if not attempts and candidates:
+                    launch()
+            raise error
+        finally:
+            for task, (endpoint, started) in attempts.items():
+                task.cancel()
+                # The losing attempt took at least this long, which is what routing needs to know
+                endpoint.observe_latency(time.perf_counter() - started)
+
+    async def _attempt(self, endpoint, send):
+        started = time.perf_counter()
+        try:
+            data = await send(endpoint.url)
+            check_throttled(self.provider, data)
+        except UpstreamError as e:
+            if is_retryable(e):
+                endpoint.failed(time.perf_counter() - started)
+            else:
+                endpoint.succeeded(time.perf_counter() - started)
+            raise
+        finally:
+            endpoint.probing = False
+        endpoint.succeeded(time.perf_counter() - started)
+        return data
+
+    def stats(self):
+        return [endpoint.as_dict() for endpoint in self.endpoints]
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_rpc_pool():
+    """The shared pool, or None when a single RPC URL is configured (requests go straight to it)."""
+    global _pool
+    if _pool is None and len(config.ETH_RPC_URLS) > 1:
+        with _pool_lock:
+            if _pool is None:
+                _pool = RPCPool()
+    return _pool
@@ -0,0 +1,193 @@
+"""Rate-limit-aware scheduling of upstream requests.
+
+Each provider gets a token bucket sized from ``config.RATE_LIMITS``.
+Waiting requests are served in priority order, so an interactive Main
+Lookup is let through ahead of a graph build that is already queued.
+Throttle responses and transient failures are retried with jittered
+exponential backoff.
+"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+
+from . import config
+from .errors import ThrottledError, UpstreamError
+from .metrics import get_metrics
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+_priority = contextvars.ContextVar('ensdata_priority', default=PRIORITY_INTERACTIVE)
+
+# JSON-RPC error codes providers use for rate limiting
+RPC_THROTTLE_CODES = {429, -32005, -32029}
+# CoinMarketCap status.error_code values for rate/credit limits
+CMC_THROTTLE_CODES = {1008, 1009, 1010, 1011}
+
+
+async def background(coro):
+    """Await ``coro`` in the background lane; tasks it spawns inherit the lane."""
+    token = _priority.set(PRIORITY_BACKGROUND)
+    try:
+        return await coro
+    finally:
+        _priority.reset(token)
+
+
+def current_priority():
+    return _priority.get()
+
+
+def set_priority(priority):
+    """Set the lane for the current task (and tasks it spawns from now on)."""
+    _priority.set(priority)
+
+
+def check_throttled(provider, data):
+    """Raise ``ThrottledError`` if a 200 response body is a rate-limit answer."""
+    if provider == 'etherscan' and isinstance(data, dict):
+        result = data.get('result')
+        if data.get('status') == '0' and isinstance(result, str) and 'rate limit' in result.lower():
+            raise ThrottledError(f"Etherscan: {result}")
+    elif provider == 'cmc' and isinstance(data, dict):
+        status = data.get('status') or {}
+        if status.get('error_code') in CMC_THROTTLE_CODES:
+            raise ThrottledError(f"CoinMarketCap: {status.get('error_message')}")
+    elif provider == 'rpc':
+        items = data if isinstance(data, list) else [data]
+        for item in items:
+            error = item.get('error') if isinstance(item, dict) else None
+            if not isinstance(error, dict) or error.get('code') not in RPC_THROTTLE_CODES:
+                continue
+            # Infura reuses -32005 for oversized eth_getLogs results, which retrying cannot fix
+            if 'results' in str(error.get('message', '')).lower():
+                continue
+            raise ThrottledError(f"RPC: {error.get('message')}")
+
+
+def is_retryable(error):
+    if isinstance(error, ThrottledError):
+        return True
+    return error.status is None or error.status >= 500
+
+
+class TokenBucket:
+    """Token bucket whose waiters are served lowest priority value first."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1, math.ceil(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._waiters = []
+        self._seq = itertools.count()
+        self._timer = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, priority=PRIORITY_INTERACTIVE):
+        self._refill()
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._schedule()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._tokens += 1
+            raise
+
+    def penalize(self):
+        """Empty the bucket after a throttle response so everyone slows down."""
+        self._refill()
+        self._tokens = min(self._tokens, 0)
+
+    def _schedule(self):
+        if self._timer is None:
+            self._dispatch()
+
+    def _dispatch(self):
+        self._timer = None
+        self._refill()
+        while self._waiters and self._tokens >= 1:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self._tokens -= 1
+            future.set_result(None)
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+        if self._waiters:
+            delay = (1 - self._tokens) / self.rate
+            self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+
+class Scheduler:
+    def __init__(self, limits=None, max_retries=None, base_delay=None, max_delay=None):
+        self.limits = dict(limits or config.RATE_LIMITS)
+        self.max_retries = config.MAX_RETRIES if max_retries is None else max_retries
+        self.base_delay = base_delay or config.RETRY_BASE_DELAY
+        self.max_delay = max_delay or config.RETRY_MAX_DELAY
+        self._buckets = {}
+        self._counters = defaultdict(lambda: defaultdict(int))
+
+    def bucket(self, provider):
+        if provider not in self._buckets:
+            self._buckets[provider] = TokenBucket(self.limits.get(provider, 10))
+        return self._buckets[provider]
+
+    async def call(self, provider, send, endpoint='other'):
+        """Run ``send()`` under ``provider``'s limit, retrying throttles and transient errors."""
+        bucket = self.bucket(provider)
+        counters = self._counters[provider]
+        metrics = get_metrics()
+        for attempt in range(self.max_retries + 1):
+            await bucket.acquire(current_priority())
+            counters['requests'] += 1
+            started = time.perf_counter()
+            try:
+                data = await send()
+                check_throttled(provider, data)
+                metrics.observe(provider, endpoint, time.perf_counter() - started, 'ok')
+                return data
+            except UpstreamError as e:
+                throttled = isinstance(e, ThrottledError)
+                metrics.observe(provider, endpoint, time.perf_counter() - started, 'throttled' if throttled else 'error')
+                if throttled:
+                    counters['throttled'] += 1
+                    bucket.penalize()
+                if not is_retryable(e) or attempt == self.max_retries:
+                    counters['failed'] += 1
+                    raise
+                counters['retries'] += 1
+                metrics.retry(provider, endpoint)
+                backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                await asyncio.sleep(max(backoff, e.retry_after or 0))
+
+    def stats(self):
+        return {provider: dict(counters) for provider, counters in self._counters.items()}
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = Scheduler()
+    return _scheduler
@@ -0,0 +1,44 @@
+import asyncio
+
+from . import config
+from .chains import chain_ids_param
+from .client import get_client
+from .errors import UpstreamError
+
+
+def _headers():
+    return {"X-Sim-Api-Key": config.SIM_API_KEY} if config.SIM_API_KEY else {}
+
+
+async def fetch_sim_balances(address, chain_ids=None):
+    """Token balances on every chain in ``chain_ids`` (default ``config.CHAINS``) in one call."""
+    url = f"{config.SIM_API_URL}/balances/{address}"
+    params = {"chain_ids": chain_ids or chain_ids_param(), "exclude_spam_tokens": "true"}
+    data = await get_client().get_json(url, params=params, headers=_headers(), provider='sim')
+    return data.get('balances', [])
+
+
+async def _sim_get(path, address):
+    params = {"chain_ids": chain_ids_param(), "addresses": address}
+    if path == "transactions":
+        params["limit"] = 1
+    try:
+        return await get_client().get_json(f"{config.SIM_API_URL}/{path}", params=params, headers=_headers(), provider='sim')
+    except UpstreamError:
+        return None
+
+
+async def fetch_sim_data(address):
+    bal_json, tx_json, info_json = await asyncio.gather(
+        _sim_get("balances", address),
+        _sim_get("transactions", address),
+        _sim_get("token-info", address),
+    )
+    sim_data = {}
+    if bal_json is not None:
+        sim_data['balance'] = bal_json.get('balances', {}).get(address, {}).get('native', {}).get('balance')
+    if tx_json is not None:
+        sim_data['txCount'] = tx_json.get('transactions', {}).get(address, {}).get('count')
+    if info_json is not None:
+        sim_data['isContract'] = info_json.get('token_info', {}).get(address, {}).get('is_contract')
+    return sim_data
@@ -0,0 +1,107 @@
+"""Coalescing of identical in-flight upstream calls (single-flight).
+
+When several sessions ask for the same thing at the same moment - a
+trending name's Main Lookup, say - only the first caller (the leader)
+goes upstream; callers that arrive while it is in flight await the same
+call and receive its result or error. Calls are keyed by provider,
+endpoint and the full request, and all of them run on the shared client
+loop, so this works across threads and Streamlit sessions. Only callers
+in the same scheduler lane share a call: the leader's request queues in
+the leader's lane, and an interactive lookup must not wait behind a
+graph build's backlog. Nothing is
+kept once a call finishes; the cache handles reuse after that.
+"""
+import asyncio
+import copy
+import json
+from collections import defaultdict
+
+from . import config
+from .scheduler import current_priority
+
+
+class _Call:
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+        self.followers = 0
+
+
+class SingleFlight:
+    def __init__(self, enabled=None):
+        self.enabled = config.SINGLEFLIGHT if enabled is None else enabled
+        self._calls = {}
+        self._counters = defaultdict(lambda: defaultdict(int))
+
+    async def do(self, key, fn, provider='other', endpoint='other'):
+        """Await ``fn()``, or the identical call already in flight under ``key``.
+
+        Followers get a deep copy of the shared result, so callers may
+        mutate what they receive. A caller that is cancelled only stops
+        waiting; the upstream call is cancelled once nobody waits for it.
+        """
+        if not self.enabled:
+            return await fn()
+        key = (current_priority(), key)
+        counters = self._counters[(provider, endpoint)]
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            counters['calls'] += 1
+        else:
+            call.followers += 1
+            counters['coalesced'] += 1
+        call.waiters += 1
+        try:
+            result = await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if not call.waiters and not call.task.done():
+                call.task.cancel()
+                # Forget it now: a caller arriving before the task finishes cancelling starts a fresh call
+                self._forget(key, call)
+        return copy.deepcopy(result) if call.followers else result
+
+    def _forget(self, key, call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def in_flight(self):
+        return len(self._calls)
+
+    def snapshot(self):
+        """One dict per (provider, endpoint) with leader and coalesced call counts."""
+        rows = []
+        for (provider, endpoint), counters in list(self._counters.items()):
+            calls, coalesced = counters['calls'], counters['coalesced']
+            rows.append({
+                'provider': provider, 'endpoint': endpoint, 'calls': calls, 'coalesced': coalesced,
+                'coalesced_ratio': coalesced / (calls + coalesced) if calls + coalesced else None,
+            })
+        return sorted(rows, key=lambda row: -row['coalesced'])
+
+    def stats(self):
+        totals = defaultdict(lambda: {'calls': 0, 'coalesced': 0})
+        for row in self.snapshot():
+            totals[row['provider']]['calls'] += row['calls']
+            totals[row['provider']]['coalesced'] += row['coalesced']
+        return {'in_flight': self.in_flight(), 'providers': dict(totals)}
+
+
+def request_key(provider, method, url, params=None, headers=None, payload=None):
+    """Identity of an HTTP request: two requests with the same key get the same answer."""
+    return (
+        provider, method, url,
+        tuple(sorted((k, str(v)) for k, v in (params or {}).items() if v is not None)),
+        tuple(sorted((k, str(v)) for k, v in (headers or {}).items() if v is not None)),
+        json.dumps(payload, sort_keys=True) if payload is not None else None,
+    )
+
+
+_singleflight = SingleFlight()
+
+
+def get_singleflight():
+    return _singleflight
@@ -0,0 +1,78 @@
+"""The Web3 HTTP provider behind ``rpc.get_web3``.
+
+web3 keeps one ``requests`` session per calling thread, so lookups that
+run web3 from executor threads would each open their own connections.
+The provider here is given one explicit keep-alive session instead,
+sized like the aiohttp pool, and records every request in the upstream
+metrics under the 'rpc' provider. With several RPC URLs configured,
+requests are instead handed to the shared client so they are routed,
+hedged and rate limited like every other RPC call.
+"""
+import json
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+from web3.providers.rpc import HTTPProvider
+
+from . import config
+from .client import get_client
+from .metrics import get_metrics
+from .scheduler import RPC_THROTTLE_CODES
+
+
+class InstrumentedHTTPProvider(HTTPProvider):
+    """Web3 HTTP provider that records each request under the 'rpc' provider."""
+
+    def _make_request(self, method, request_data):
+        metrics = get_metrics()
+        started = time.perf_counter()
+        try:
+            raw = super()._make_request(method, request_data)
+        except Exception:
+            metrics.observe('rpc', f"web3:{method}", time.perf_counter() - started, 'error')
+            raise
+        outcome = 'ok'
+        if b'"error"' in raw:
+            body = json.loads(raw)
+            error = (body.get('error') if isinstance(body, dict) else None) or {}
+            if error:
+                outcome = 'throttled' if error.get('code') in RPC_THROTTLE_CODES else 'error'
+        metrics.observe('rpc', f"web3:{method}", time.perf_counter() - started, outcome)
+        metrics.add_bytes('rpc', f"web3:{method}", len(request_data), len(raw))
+        return raw
+
+
+class RoutedHTTPProvider(HTTPProvider):
+    """Web3 HTTP provider that sends each request over an ``RPCPool`` on the client loop.
+
+    Only for calls made off the client loop (executor threads, scripts),
+    since it blocks until the answer arrives.
+    """
+
+    def __init__(self, pool):
+        super().__init__(pool.endpoints[0].url)
+        self.pool = pool
+
+    def _make_request(self, method, request_data):
+        client = get_client()
+        data = client.run(client.post_json(None, json.loads(request_data), provider='rpc', pool=self.pool))
+        return json.dumps(data).encode()
+
+
+def keepalive_session(pool_size=None):
+    """``requests`` session whose connection pool is shared by every thread."""
+    pool_size = pool_size or config.HTTP_POOL_SIZE_PER_HOST
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def make_web3(url, pool=None):
+    if pool is not None:
+        return Web3(RoutedHTTPProvider(pool))
+    provider = InstrumentedHTTPProvider(url, session=keepalive_session(), request_kwargs={'timeout': config.HTTP_TIMEOUT})
+    return Web3(provider)
@@ -1,18 +1,48 @@
 import os
+import sys
 import streamlit as st
-from web3 import Web3
-import requests
-import pandas as pd
-import networkx as nx
-import plotly.graph_objects as go
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+# Page-specific modules (pandas, web3, networkx, plotly) are imported inside each page,
+# so the landing page renders before the graph stack loads
+import importlib
+import threading
+from ensdata import config, get_price_feed, run, serve_metrics
+from diagnostics import render_diagnostics
+
+# Heavy dependencies of the page modules; only importable-from-root names, since the
+# script directory is not on sys.path once the script run has finished
+PRELOAD_MODULES = (
+    'pandas', 'ensdata.lookup', 'ensdata.history', 'ensdata.profile',
+    'networkx', 'plotly.graph_objects', 'ensdata.edges', 'ensdata.portfolio', 'scipy.sparse',
+)
+
+
+@st.cache_resource
+def preload_modules():
+    """Import the page modules once per process in the background, after the landing page is sent."""
+    def load():
+        for module in PRELOAD_MODULES:
+            importlib.import_module(module)
+
+    thread = threading.Thread(target=load, name="preload-modules", daemon=True)
+    thread.start()
+    return thread
 
 st.set_page_config(page_title="ENS Profile Lookup", page_icon="🔎", layout="wide")
 
+# Start the shared price feed so the first lookup does not wait on CoinMarketCap
+get_price_feed()
+if config.METRICS_PORT:
+    serve_metrics(int(config.METRICS_PORT))
+render_diagnostics()
+
 ETHERSCAN_API_KEY = os.getenv('ETHERSCAN_API_KEY')
 COINMARKETCAP_API_KEY = os.getenv('COINMARKETCAP_API_KEY')
 ETH_RPC_URL = os.getenv('ETH_RPC_URL')
 SIM_API_KEY = os.getenv('SIM_API_KEY')
 
+
 # Initialize session state for selected ENS
 if 'selected_ens_for_main' not in st.session_state:
     st.session_state['selected_ens_for_main'] = None
@@ -23,6 +53,10 @@ if 'active_page' not in st.session_state:
 if st.session_state.get('selected_ens_for_main'):
     st.session_state['active_page'] = "ENS Main Lookup"
 
+# A graph build left running on another page is abandoned; stop its upstream requests
+if st.session_state['active_page'] != "ENS List Lookup" and 'graph_build' in st.session_state:
+    st.session_state.pop('graph_build').cancel()
+
 # Create navigation buttons
 col1, col2 = st.columns([1, 1])
 with col1:
@@ -41,7 +75,7 @@ st.divider()
 # Display content based on active page
 if st.session_state['active_page'] == "ENS Main Lookup":
     st.write("Enter an ENS name to view the 4 key metrics.")
-    default_ens = st.session_state.get('selected_ens_for_main', 'vitalik.eth')
+    default_ens = st.session_state.get('selected_ens_for_main') or 'vitalik.eth'
     ens_name = st.text_input("ENS Name", default_ens)
     
     # Auto-lookup if ENS was selected from graph
@@ -51,44 +85,24 @@ if st.session_state['active_page'] == "ENS Main Lookup":
         st.session_state['selected_ens_for_main'] = None
     
     if st.button("Lookup", type="primary") or auto_lookup:
+        import pandas as pd
+        from ensdata import address_metrics, main_lookup, wei_to_eth
+        from ensdata.chains import chain_columns, chain_name
+        from profile_view import render_profile
+        
         with st.spinner("Resolving ENS and fetching data..."):
-            w3 = Web3(Web3.HTTPProvider(ETH_RPC_URL))
-            address = w3.ens.address(ens_name)
+            lookup = run(main_lookup(ens_name))
             
-            if not address:
+            if not lookup:
                 st.error(f"ENS name not found: {ens_name}")
                 st.stop()
             
+            address = lookup['address']
+            balance_eth = lookup['balance_eth']
+            price = lookup['price']
+            eth_usd = lookup['eth_usd']
             st.success(f"**Address:** `{address}`")
             
-            # Metric 1: ETH Balance
-            bal_url = (
-                f"https://api.etherscan.io/v2/api"
-                f"?chainid=1"
-                f"&module=account"
-                f"&action=balance"
-                f"&address={address}"
-                f"&tag=latest"
-                f"&apikey={ETHERSCAN_API_KEY}"
-            )
-            bal_res = requests.get(bal_url)
-            bal_data = bal_res.json()
-            balance_wei = int(bal_data.get('result', '0'))
-            balance_eth = balance_wei / 1e18
-            
-            # Metric 2: ETH USD Value
-            price = None
-            try:
-                price_url = "https://pro-api.coinmarketcap.com/v1/cryptocurrency/quotes/latest?symbol=ETH"
-                headers = {"X-CMC_PRO_API_KEY": COINMARKETCAP_API_KEY}
-                price_res = requests.get(price_url, headers=headers)
-                price_data = price_res.json()
-                price = price_data['data']['ETH']['quote']['USD']['price']
-                eth_usd = balance_eth * price
-            except Exception:
-                eth_usd = 0
-                price = 0
-            
             # Display 4 Key Metrics
             col1, col2, col3, col4 = st.columns(4)
             
@@ -99,29 +113,26 @@ if st.session_state['active_page'] == "ENS Main Lookup":
                 st.metric(label="💰 ETH Balance", value=f"{balance_eth:.4f} ETH")
             
             with col3:
-                st.metric(label="💵 USD Value", value=f"${eth_usd:,.2f}")
+                st.metric(label="💵 USD Value", value=f"${eth_usd:,.2f}" if eth_usd is not None else "n/a")
             
             with col4:
-                st.metric(label="📈 ETH Price", value=f"${price:,.2f}")
+                st.metric(label="📈 ETH Price", value=f"${price:,.2f}" if price is not None else "n/a")
+                if lookup['price_age'] is not None:
+                    st.caption(f"Price updated {lookup['price_age']:.0f}s ago")
+                else:
+                    st.caption("Price feed unavailable")
+            
+            # Native balances per configured chain; the ETH metric above is their ETH total
+            if len(config.CHAINS) > 1:
+                st.dataframe(pd.DataFrame([chain_columns(lookup['chain_balances'])]), hide_index=True)
+            for chainid, error in lookup['balance_errors'].items():
+                st.warning(f"Could not fetch the {chain_name(chainid)} balance: {error}")
+            
+            render_profile(lookup['profile'], lookup['profile_error'])
             
             # Last 10 Internal Transactions
             st.subheader("📜 Last 10 Internal Transactions")
-            tx_url = (
-                f"https://api.etherscan.io/v2/api"
-                f"?chainid=1"
-                f"&module=account"
-                f"&action=txlistinternal"
-                f"&address={address}"
-                f"&startblock=0"
-                f"&endblock=99999999"
-                f"&page=1"
-                f"&offset=10"
-                f"&sort=desc"
-                f"&apikey={ETHERSCAN_API_KEY}"
-            )
-            tx_res = requests.get(tx_url)
-            tx_data = tx_res.json()
-            txs = tx_data.get('result', [])
+            txs = lookup['internal_txs']
             
             if isinstance(txs, list) and txs:
                 tx_table = []
@@ -130,7 +141,7 @@ if st.session_state['active_page'] == "ENS Main Lookup":
                         "Hash": tx.get('hash', '')[:16] + "...",
                         "From": tx.get('from', '')[:10] + "...",
                         "To": tx.get('to', '')[:10] + "...",
-                        "Value (ETH)": f"{float(tx.get('value', '0')) / 1e18:.4f}",
+                        "Value (ETH)": f"{wei_to_eth(tx.get('value')):.4f}",
                         "Timestamp": tx.get('timeStamp', '')
                     })
                 df_tx = pd.DataFrame(tx_table)
@@ -138,154 +149,86 @@ if st.session_state['active_page'] == "ENS Main Lookup":
             else:
                 st.info("No internal transactions found.")
 
+            # Network metrics from the local history store (full pass on first visit, deltas after)
+            st.subheader("🌐 Network Metrics")
+            with st.spinner("Syncing transaction history..."):
+                try:
+                    metrics = run(address_metrics(address))
+                except Exception as e:
+                    metrics = None
+                    st.warning(f"Could not load transaction history: {e}")
+            if metrics:
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric(label="⬇️ ETH In", value=f"{wei_to_eth(metrics['inflow_wei']):,.4f}")
+                with col2:
+                    st.metric(label="⬆️ ETH Out", value=f"{wei_to_eth(metrics['outflow_wei']):,.4f}")
+                with col3:
+                    st.metric(label="⛽ Gas Spent (ETH)", value=f"{wei_to_eth(metrics['gas_spent_wei']):,.4f}")
+                with col4:
+                    st.metric(label="📅 Active Days", value=metrics['active_days'])
+                counts = metrics['transactions']
+                st.caption(
+                    f"{counts.get('txlist', 0)} transactions, {counts.get('txlistinternal', 0)} internal, "
+                    f"{counts.get('tokentx', 0)} token transfers"
+                    + ("" if metrics['complete'] else " (oldest history truncated)")
+                )
+                if len(metrics['top_counterparties']):
+                    st.write("Top counterparties:")
+                    st.dataframe(metrics['top_counterparties'].rename(columns={
+                        'counterparty': "Address", 'transfers': "Transfers", 'volume_eth': "ETH Volume",
+                    }), use_container_width=True, hide_index=True)
+
 elif st.session_state['active_page'] == "ENS List Lookup":
+    import numpy as np
+    from figures import build_network_figure
+    from graph_build import start_graph_build
+    from graph_layout import get_layout
+    from graph_store import content_key, get_graph_store
+    from graph_view import graph_build_progress, render_network_metrics, summary_frame
+    
     st.write("Enter a comma-separated list of ENS names to visualize their social network.")
     
     ens_list = st.text_area("ENS Names (comma separated)", "vitalik.eth, balajis.eth, brantley.eth")
     ens_names = [e.strip() for e in ens_list.split(",") if e.strip()]
     
     if st.button("Build Social Graph", type="primary"):
-        w3 = Web3(Web3.HTTPProvider(ETH_RPC_URL))
-        
-        with st.spinner("Resolving ENS names and building graph..."):
-            # Resolve all ENS names
-            addresses = {}
-            balances = {}
-            for ens in ens_names:
-                try:
-                    addr = w3.ens.address(ens)
-                    if addr:
-                        addresses[ens] = addr
-                        # Get balance for each
-                        bal_url = (
-                            f"https://api.etherscan.io/v2/api"
-                            f"?chainid=1"
-                            f"&module=account"
-                            f"&action=balance"
-                            f"&address={addr}"
-                            f"&tag=latest"
-                            f"&apikey={ETHERSCAN_API_KEY}"
-                        )
-                        bal_res = requests.get(bal_url)
-                        bal_data = bal_res.json()
-                        balance_wei = int(bal_data.get('result', '0'))
-                        balances[ens] = balance_wei / 1e18
-                except Exception as e:
-                    st.warning(f"Could not resolve {ens}: {e}")
-                    continue
-            
-            if not addresses:
-                st.error("No valid ENS names resolved.")
-                st.stop()
-            
-            # Build NetworkX graph
-            G = nx.Graph()
-            for ens, addr in addresses.items():
-                G.add_node(ens, address=addr, balance=balances.get(ens, 0))
-            
-            # Create edges (for demo: connecting all nodes in a network)
-            resolved_names = list(addresses.keys())
-            for i in range(len(resolved_names)):
-                for j in range(i+1, len(resolved_names)):
-                    G.add_edge(resolved_names[i], resolved_names[j])
-            
-            # Store in session state
-            st.session_state['graph'] = G
-            st.session_state['addresses'] = addresses
-            st.session_state['balances'] = balances
-            
-            st.success(f"✅ Graph built with {len(G.nodes)} nodes and {len(G.edges)} edges")
+        if 'graph_build' in st.session_state:
+            st.session_state.pop('graph_build').cancel()
+        for key in ('graph_key', 'graph_messages'):
+            st.session_state.pop(key, None)
+        # A graph another session already built for the same names is reused as is
+        key = content_key(ens_names, include_portfolios=bool(SIM_API_KEY))
+        if get_graph_store().get(key) is not None:
+            st.session_state['graph_key'] = key
+        else:
+            # Names stream into the table and graph as they resolve
+            st.session_state['graph_build'] = start_graph_build(ens_names, include_portfolios=bool(SIM_API_KEY))
+    
+    if 'graph_build' in st.session_state:
+        graph_build_progress()
+    for level, message in st.session_state.get('graph_messages', []):
+        getattr(st, level)(message)
     
     # Display graph and data if it exists
-    if 'graph' in st.session_state:
-        G = st.session_state['graph']
-        addresses = st.session_state['addresses']
-        balances = st.session_state['balances']
-        
+    graph = get_graph_store().get(st.session_state['graph_key']) if 'graph_key' in st.session_state else None
+    if graph is None and 'graph_key' in st.session_state:
+        del st.session_state['graph_key']
+        st.info("This graph has expired from the shared store; build it again to refresh it.")
+    if graph is not None:
         # Display data table
         st.subheader("📊 ENS Profile Summary")
-        table_data = []
-        for ens, addr in addresses.items():
-            table_data.append({
-                "ENS Name": ens,
-                "Address": f"{addr[:6]}...{addr[-4:]}",
-                "Full Address": addr,
-                "ETH Balance": f"{balances.get(ens, 0):.4f}"
-            })
-        df = pd.DataFrame(table_data)
-        st.dataframe(df, use_container_width=True)
+        st.dataframe(summary_frame(graph), use_container_width=True)
         
         # Visualize graph with Plotly (interactive and clickable)
         st.subheader("🔗 Interactive Social Network Graph")
         
-        # Get positions using NetworkX spring layout
-        pos = nx.spring_layout(G, k=2, iterations=50)
-        
-        # Create edge traces
-        edge_trace = []
-        for edge in G.edges():
-            x0, y0 = pos[edge[0]]
-            x1, y1 = pos[edge[1]]
-            edge_trace.append(
-                go.Scatter(
-                    x=[x0, x1, None],
-                    y=[y0, y1, None],
-                    mode='lines',
-                    line=dict(width=2, color='#888'),
-                    hoverinfo='none',
-                    showlegend=False
-                )
-            )
-        
-        # Create node trace
-        node_x = []
-        node_y = []
-        node_text = []
-        node_customdata = []
-        
-        for node in G.nodes():
-            x, y = pos[node]
-            node_x.append(x)
-            node_y.append(y)
-            addr = G.nodes[node]['address']
-            bal = G.nodes[node]['balance']
-            node_text.append(f"{node}<br>Balance: {bal:.4f} ETH<br>{addr[:10]}...")
-            node_customdata.append(node)
+        # Positions are cached per graph structure; a changed graph starts from the last layout
+        pos = get_layout(graph, previous=st.session_state.get('layout_key'))
+        st.session_state['layout_key'] = graph.key
         
-        node_trace = go.Scatter(
-            x=node_x,
-            y=node_y,
-            mode='markers+text',
-            hoverinfo='text',
-            text=[node for node in G.nodes()],
-            textposition="top center",
-            hovertext=node_text,
-            customdata=node_customdata,
-            marker=dict(
-                size=30,
-                color='lightblue',
-                line=dict(width=2, color='darkblue')
-            ),
-            textfont=dict(size=12, color='black', family='Arial Black'),
-            showlegend=False
-        )
-        
-        # Create figure
-        fig = go.Figure(data=edge_trace + [node_trace])
-        
-        fig.update_layout(
-            title=dict(
-                text="ENS Social Network - Click on a node to view profile",
-                font=dict(size=20, color='darkblue')
-            ),
-            showlegend=False,
-            hovermode='closest',
-            margin=dict(b=20, l=5, r=5, t=60),
-            xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
-            yaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
-            plot_bgcolor='white',
-            height=600
-        )
+        # One merged edge trace and one node trace; WebGL for large graphs
+        fig = build_network_figure(graph, pos)
         
         # Display the interactive graph
         selected_point = st.plotly_chart(fig, use_container_width=True, key="network_graph", on_select="rerun")
@@ -300,21 +243,31 @@ elif st.session_state['active_page'] == "ENS List Lookup":
                     st.rerun()
         
         # Graph statistics
-        col1, col2, col3 = st.columns(3)
+        col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("Total Nodes", len(G.nodes))
+            st.metric("Total Nodes", len(graph))
         with col2:
-            st.metric("Total Edges", len(G.edges))
+            st.metric("Total Edges", graph.number_of_edges)
         with col3:
-            st.metric("Network Density", f"{nx.density(G):.2f}")
+            st.metric("Network Density", f"{graph.density():.2f}")
+        with col4:
+            valued = graph.portfolio_usd[np.isfinite(graph.portfolio_usd)]
+            st.metric("Token Portfolios (USD)", f"${valued.sum():,.0f}" if len(valued) else "n/a")
+        
+        st.subheader("🌐 Network Metrics")
+        render_network_metrics(graph)
         
         # Alternative: Clickable node buttons (in case graph click doesn't work in deployment)
         st.subheader("👤 Quick Node Access")
         st.write("Click on a node in the graph above, or use these buttons:")
         
-        cols = st.columns(min(len(G.nodes), 4))
-        for idx, node in enumerate(G.nodes):
+        cols = st.columns(min(len(graph), 4))
+        for idx, i in enumerate(np.argsort(graph.order)):
+            node = graph.names[i]
             with cols[idx % 4]:
                 if st.button(f"📍 {node}", key=f"btn_{node}", use_container_width=True):
                     st.session_state['selected_ens_for_main'] = node
                     st.rerun()
+
+# The first render is on screen; load the heavy page modules before the first click needs them
+preload_modules()
@@ -0,0 +1,54 @@
+import streamlit as st
+
+from ensdata import get_cache, get_metrics, get_rpc_pool, get_scheduler, get_singleflight
+
+
+def render_diagnostics():
+    """Sidebar panel with per-provider/endpoint upstream metrics and cache hit ratios."""
+    if not st.sidebar.checkbox("Show diagnostics", value=False):
+        return
+    import pandas as pd
+
+    with st.sidebar:
+        st.subheader("Upstream calls")
+        rows = get_metrics().snapshot()
+        if rows:
+            df = pd.DataFrame(rows)
+            for column in ('mean_s', 'p50_s', 'p95_s', 'p99_s'):
+                df[column] = (df[column] * 1000).round(1)
+            st.dataframe(df.rename(columns={
+                'mean_s': 'mean ms', 'p50_s': 'p50 ms', 'p95_s': 'p95 ms', 'p99_s': 'p99 ms',
+            }), hide_index=True)
+        else:
+            st.caption("No upstream calls yet.")
+
+        st.subheader("Cache")
+        cache_rows = [
+            {'kind': kind, 'tier': tier, **counts}
+            for kind, tiers in get_cache().stats()['kinds'].items()
+            for tier, counts in tiers.items()
+        ]
+        if cache_rows:
+            st.dataframe(pd.DataFrame(cache_rows), hide_index=True)
+
+        st.subheader("Scheduler")
+        st.json(get_scheduler().stats())
+
+        if get_rpc_pool() is not None:
+            st.subheader("RPC endpoints")
+            endpoints = pd.DataFrame(get_rpc_pool().stats())
+            for column in ('latency_ewma_s', 'hedge_delay_s'):
+                endpoints[column] = (pd.to_numeric(endpoints[column]) * 1000).round(1)
+            st.dataframe(endpoints.rename(columns={
+                'latency_ewma_s': 'latency ms', 'error_rate_ewma': 'error rate', 'hedge_delay_s': 'hedge after ms',
+            }), hide_index=True)
+
+        st.subheader("Coalesced calls")
+        coalesced = get_singleflight().snapshot()
+        if coalesced:
+            st.dataframe(pd.DataFrame(coalesced), hide_index=True)
+        st.caption(f"{get_singleflight().in_flight()} distinct calls in flight")
+
+        st.subheader("Graph store")
+        from graph_store import get_graph_store
+        st.json(get_graph_store().stats())
@@ -0,0 +1,105 @@
+import numpy as np
+import plotly.graph_objects as go
+
+# Above either threshold the figure switches to WebGL traces and drops node labels
+WEBGL_NODE_THRESHOLD = 500
+WEBGL_EDGE_THRESHOLD = 2000
+
+
+def build_network_figure(graph, pos, title="ENS Social Network - Click on a node to view profile"):
+    """Plotly figure for a ``CompactGraph`` with all edges in one trace and one node trace.
+
+    ``pos`` is the ``(n, 2)`` layout aligned with ``graph.names``. Edge
+    coordinates are assembled as NumPy arrays (NaN rows separate edge
+    segments) so payload size and build time stay linear in the graph size.
+    """
+    nodes = list(graph.names)
+    xy = np.asarray(pos, dtype=float).reshape(-1, 2)
+    edges, _ = graph.edge_pairs()
+
+    large = len(nodes) > WEBGL_NODE_THRESHOLD or len(edges) > WEBGL_EDGE_THRESHOLD
+    scatter = go.Scattergl if large else go.Scatter
+
+    # One row per edge: source, target, NaN separator
+    gap = np.full(len(edges), np.nan)
+    edge_x = np.column_stack([xy[edges[:, 0], 0], xy[edges[:, 1], 0], gap]).ravel()
+    edge_y = np.column_stack([xy[edges[:, 0], 1], xy[edges[:, 1], 1], gap]).ravel()
+    edge_trace = scatter(
+        x=edge_x,
+        y=edge_y,
+        mode='lines',
+        line=dict(width=1 if large else 2, color='#888'),
+        hoverinfo='none',
+        showlegend=False
+    )
+
+    hover_text = _hover_text(graph)
+    size, color = _node_style(graph, large)
+    valued = not isinstance(color, str)
+    node_trace = scatter(
+        x=xy[:, 0],
+        y=xy[:, 1],
+        mode='markers' if large else 'markers+text',
+        hoverinfo='text',
+        text=None if large else nodes,
+        textposition="top center",
+        hovertext=hover_text,
+        customdata=nodes,
+        marker=dict(
+            size=size,
+            color=color,
+            colorscale='Blues' if valued else None,
+            showscale=valued,
+            colorbar=dict(title="Tokens (log10 USD)") if valued else None,
+            line=dict(width=1 if large else 2, color='darkblue')
+        ),
+        textfont=dict(size=12, color='black', family='Arial Black'),
+        showlegend=False
+    )
+
+    fig = go.Figure(data=[edge_trace, node_trace])
+    fig.update_layout(
+        title=dict(
+            text=title,
+            font=dict(size=20, color='darkblue')
+        ),
+        showlegend=False,
+        hovermode='closest',
+        margin=dict(b=20, l=5, r=5, t=60),
+        xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
+        yaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
+        plot_bgcolor='white',
+        height=600
+    )
+    return fig
+
+
+def _node_style(graph, large):
+    """Marker sizes and colours; scaled by token portfolio value when any node has one."""
+    base = 8 if large else 30
+    usd = graph.portfolio_usd
+    if not np.isfinite(usd).any():
+        return base, 'lightblue'
+    # Square-root scaling keeps a single whale from dwarfing every other node
+    scaled = np.sqrt(np.nan_to_num(usd, nan=0.0).clip(min=0))
+    top = scaled.max() or 1.0
+    size = base * (0.6 + 0.8 * scaled / top)
+    return size, np.log10(1 + np.nan_to_num(usd, nan=0.0).clip(min=0))
+
+
+def _hover_text(graph):
+    texts = []
+    for i, address in enumerate(graph.addresses()):
+        node, balance, usd = graph.names[i], graph.balance[i], graph.portfolio_usd[i]
+        lines = [node, f"Balance: {balance:.4f} ETH" if np.isfinite(balance) else "Balance: n/a", f"{address[:10]}..."]
+        if np.isfinite(usd):
+            lines.insert(2, f"Tokens: ${usd:,.2f}")
+        primary = graph.primary_name[i]
+        if primary and primary.lower() != node.lower():
+            lines.append(f"Primary name: {primary}")
+        counterparties = graph.counterparties[i]
+        if counterparties:
+            lines.append("Top counterparties:")
+            lines.extend(f"&nbsp;&nbsp;{label} ({count})" for label, count in counterparties)
+        texts.append("<br>".join(lines))
+    return texts
@@ -0,0 +1,246 @@
+"""Network metrics for the session graph on a SciPy sparse adjacency matrix.
+
+The ``CompactGraph``'s CSR arrays are used directly as one symmetric
+SciPy matrix (edge ``weight`` as the value) and every metric is a handful of sparse products over it:
+weighted PageRank by power iteration, degree and strength from row sums,
+betweenness from ``k`` sampled BFS sources run together as one
+level-synchronous sweep, connected components from ``csgraph`` and
+communities by a vectorized Louvain (parallel local moves on a random
+half of the nodes per sweep, then aggregation). Results are cached by graph
+hash like the layout; when nodes are added, the previous PageRank vector
+and community labels seed the new run so it converges in a few sweeps.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+
+from graph_layout import SEED
+
+CACHE_SIZE = 32
+PAGERANK_ALPHA = 0.85
+PAGERANK_TOL = 1e-8
+PAGERANK_MAX_ITER = 200
+BETWEENNESS_SAMPLES = 64
+COMMUNITY_MAX_SWEEPS = 30
+METRIC_COLUMNS = ['pagerank', 'degree', 'strength', 'betweenness', 'component', 'community']
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def adjacency(graph):
+    """Symmetric CSR matrix of a ``CompactGraph`` with edge weights as values."""
+    n = len(graph)
+    weights = graph.weight.astype(float).clip(min=1e-9)
+    return sp.csr_matrix((weights, graph.indices, graph.indptr), shape=(n, n))
+
+
+def pagerank(A, alpha=PAGERANK_ALPHA, start=None, tol=PAGERANK_TOL, max_iter=PAGERANK_MAX_ITER):
+    """Weighted PageRank by power iteration; returns ``(scores, iterations)``.
+
+    Dangling nodes spread their rank uniformly, as in ``nx.pagerank``.
+    """
+    n = A.shape[0]
+    if n == 0:
+        return np.zeros(0), 0
+    out = np.asarray(A.sum(axis=1)).ravel()
+    dangling = out == 0
+    P = sp.diags(np.divide(1.0, out, out=np.zeros(n), where=~dangling)) @ A
+    PT = P.T.tocsr()
+    x = np.full(n, 1.0 / n) if start is None else start / start.sum()
+    for iteration in range(1, max_iter + 1):
+        previous = x
+        x = alpha * (PT @ x + previous[dangling].sum() / n) + (1 - alpha) / n
+        if np.abs(x - previous).sum() < n * tol:
+            break
+    return x, iteration
+
+
+def approximate_betweenness(A, samples=BETWEENNESS_SAMPLES, seed=SEED):
+    """Normalized betweenness (hop distance) estimated from ``samples`` BFS sources.
+
+    All sources advance together: each BFS level is one sparse product of
+    the adjacency with that level's ``n x samples`` frontier, then
+    dependencies are accumulated back level by level (Brandes). Only the
+    frontier is touched per level, so the cost stays near ``edges x
+    samples`` however long the graph's paths are. Exact when ``samples >= n``.
+    """
+    n = A.shape[0]
+    if n < 3:
+        return np.zeros(n)
+    B = A.astype(bool).astype(float).tocsr()
+    rng = np.random.default_rng(seed)
+    sources = np.arange(n) if samples >= n else np.sort(rng.choice(n, samples, replace=False))
+    k = len(sources)
+
+    sigma = np.zeros((n, k))
+    depth = np.full((n, k), -1, dtype=np.int32)
+    rows, cols = sources, np.arange(k)
+    sigma[rows, cols] = 1
+    depth[rows, cols] = 0
+    levels = [(rows, cols)]
+    while True:
+        reached = (B @ sp.csr_matrix((sigma[rows, cols], (rows, cols)), shape=(n, k))).tocoo()
+        new = depth[reached.row, reached.col] < 0
+        if not new.any():
+            break
+        rows, cols = reached.row[new], reached.col[new]
+        depth[rows, cols] = len(levels)
+        sigma[rows, cols] = reached.data[new]
+        levels.append((rows, cols))
+
+    delta = np.zeros((n, k))
+    for d in range(len(levels) - 1, 0, -1):
+        rows, cols = levels[d]
+        coeff = sp.csr_matrix(((1 + delta[rows, cols]) / sigma[rows, cols], (rows, cols)), shape=(n, k))
+        back = (B @ coeff).tocoo()
+        parent = depth[back.row, back.col] == d - 1
+        rows, cols = back.row[parent], back.col[parent]
+        delta[rows, cols] += sigma[rows, cols] * back.data[parent]
+    delta[sources, np.arange(k)] = 0
+    return delta.sum(axis=1) * (n / k) / ((n - 1) * (n - 2))
+
+
+def _one_hot(labels, size):
+    return sp.csr_matrix((np.ones(len(labels)), (np.arange(len(labels)), labels)), shape=(len(labels), size))
+
+
+def _local_moves(A, labels, rng, max_sweeps):
+    """Louvain local moving, vectorized: each sweep moves a random half of the
+    nodes that would gain modularity to their best neighbouring community."""
+    n = A.shape[0]
+    k = np.asarray(A.sum(axis=1)).ravel()
+    two_m = k.sum()
+    off = (A - sp.diags(A.diagonal())).tocsr()
+    off.eliminate_zeros()
+    for _ in range(max_sweeps):
+        tot = np.bincount(labels, weights=k, minlength=n)
+        votes = (off @ _one_hot(labels, n)).tocoo()
+        row, col = votes.row, votes.col
+        own = col == labels[row]
+        gain = votes.data - k[row] * (tot[col] - np.where(own, k[row], 0)) / two_m
+        stay = -k * (tot[labels] - k) / two_m
+        stay[row[own]] = gain[own]
+        # Best other community per node (lowest label on ties)
+        row, col, gain = row[~own], col[~own], gain[~own]
+        order = np.lexsort((col, -gain, row))
+        rows, first = np.unique(row[order], return_index=True)
+        better = gain[order][first] > stay[rows] + 1e-12
+        if not better.any():
+            break
+        move = better & (rng.random(len(rows)) < 0.5)
+        labels = labels.copy()
+        labels[rows[move]] = col[order][first][move]
+    return np.unique(labels, return_inverse=True)[1]
+
+
+def louvain_communities(A, labels=None, seed=SEED, max_levels=10, max_sweeps=COMMUNITY_MAX_SWEEPS):
+    """Community label per node (numbered from 0) by Louvain modularity optimisation.
+
+    ``labels`` seeds the first level, e.g. the communities of the previous
+    graph with one new label per added node.
+    """
+    n = A.shape[0]
+    if n == 0 or A.nnz == 0:
+        return np.arange(n)
+    rng = np.random.default_rng(seed)
+    membership = np.arange(n)
+    graph = A.tocsr()
+    level_labels = np.arange(n) if labels is None else np.unique(labels, return_inverse=True)[1]
+    for _ in range(max_levels):
+        local = _local_moves(graph, level_labels, rng, max_sweeps)
+        membership = local[membership]
+        size = local.max() + 1
+        if size == graph.shape[0]:
+            break
+        # Collapse each community to one node; internal weight becomes a self-loop
+        P = _one_hot(local, size)
+        graph = (P.T @ graph @ P).tocsr()
+        level_labels = np.arange(size)
+    return np.unique(membership, return_inverse=True)[1]
+
+
+def modularity(A, communities):
+    """Newman modularity of a partition of the weighted undirected graph ``A``."""
+    total = A.sum()
+    if total == 0:
+        return 0.0
+    coo = A.tocoo()
+    inside = coo.data[communities[coo.row] == communities[coo.col]].sum()
+    strength = np.bincount(communities, weights=np.asarray(A.sum(axis=1)).ravel())
+    return float(inside / total - ((strength / total) ** 2).sum())
+
+
+def compute_analytics(graph, previous=None, samples=BETWEENNESS_SAMPLES):
+    """Per-node metrics table plus graph-level summary numbers for ``graph``."""
+    timings = {}
+    started = time.perf_counter()
+    nodes = list(graph.names)
+    A = adjacency(graph)
+    timings['matrix_s'] = time.perf_counter() - started
+
+    # Warm start from the last result: known nodes keep their rank and community
+    start, labels = None, None
+    if previous is not None and len(previous['table']):
+        known = previous['table'].reindex(nodes)
+        if known['pagerank'].notna().any():
+            start = known['pagerank'].fillna(1.0 / max(len(nodes), 1)).to_numpy(float)
+            fresh = np.arange(len(nodes)) + len(nodes)
+            labels = np.where(known['community'].notna(), known['community'].fillna(0).astype(np.int64), fresh)
+            labels = np.unique(labels, return_inverse=True)[1]
+
+    step = time.perf_counter()
+    ranks, iterations = pagerank(A, start=start)
+    timings['pagerank_s'] = time.perf_counter() - step
+    step = time.perf_counter()
+    betweenness = approximate_betweenness(A, samples)
+    timings['betweenness_s'] = time.perf_counter() - step
+    step = time.perf_counter()
+    n_components, component = connected_components(A, directed=False)
+    communities = louvain_communities(A, labels)
+    timings['communities_s'] = time.perf_counter() - step
+
+    table = pd.DataFrame({
+        'pagerank': ranks,
+        'degree': np.diff(A.indptr),
+        'strength': np.asarray(A.sum(axis=1)).ravel(),
+        'betweenness': betweenness,
+        'component': component,
+        'community': communities,
+    }, index=pd.Index(nodes, name='node'), columns=METRIC_COLUMNS)
+    sizes = np.bincount(component) if len(nodes) else np.zeros(1, dtype=np.int64)
+    timings['total_s'] = time.perf_counter() - started
+    return {
+        'table': table,
+        'components': int(n_components),
+        'largest_component': int(sizes.max()),
+        'communities': int(communities.max() + 1) if len(nodes) else 0,
+        'modularity': modularity(A, communities) if len(nodes) else 0.0,
+        'pagerank_iterations': iterations,
+        'betweenness_samples': min(samples, len(nodes)),
+        'timings': timings,
+    }
+
+
+def get_analytics(graph, previous=None):
+    """Return the analytics for ``graph``, computing them only on a cache miss.
+
+    ``previous`` is the key of an earlier graph whose metrics, if still
+    cached, warm-start this one.
+    """
+    with _cache_lock:
+        if graph.key in _cache:
+            _cache.move_to_end(graph.key)
+            return _cache[graph.key]
+        prior = _cache.get(previous) if previous else None
+    result = compute_analytics(graph, prior)
+    with _cache_lock:
+        _cache[graph.key] = result
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
@@ -0,0 +1,247 @@
+"""Social-graph build pipeline shared by the List Lookup page and the benchmarks.
+
+Names are resolved in small chunks that run concurrently, and each chunk's
+nodes are added as soon as it resolves, so the first results show up
+after a couple of round trips however long the list is. Balances,
+portfolios and profiles fill in per chunk; edges appear as each
+address's history scan finishes. A build started with
+``start_graph_build`` runs on the client loop in the background lane and
+can be polled with ``snapshot()`` and stopped with ``cancel()``, which
+cancels every in-flight and queued upstream request. A started build
+that nobody has polled for ``ABANDON_AFTER`` seconds (its tab was closed
+or its session expired) cancels itself the same way. Snapshots hand out
+the graph frozen as a ``CompactGraph``.
+"""
+import asyncio
+import threading
+import time
+
+import networkx as nx
+
+from ensdata import (
+    background, build_social_edges, fetch_chain_balances, fetch_portfolios, get_client, named_edges, portfolio_totals,
+    resolve_names, reverse_resolve,
+)
+from ensdata.chains import total_eth_wei
+from ensdata.edges import TX_KINDS
+from ensdata.etherscan import WEI_PER_ETH
+from ensdata.index import name_node
+from ensdata.profile import fetch_profiles
+from graph_store import CompactGraph, content_key
+
+STREAM_CHUNK = 25
+ABANDON_AFTER = 10
+
+PHASES = {
+    'resolving': "Resolving names",
+    'edges': "Scanning transfers",
+    'labels': "Labelling counterparties",
+    'done': "Done",
+    'cancelled': "Cancelled",
+    'failed': "Failed",
+}
+
+
+class GraphBuild:
+    """Graph state filled in by ``run()`` and safe to read from another thread."""
+
+    def __init__(self, ens_names, include_portfolios=False, chunk_size=STREAM_CHUNK):
+        self.names = list(dict.fromkeys(ens_names))
+        self.include_portfolios = include_portfolios
+        self.key = content_key(self.names, include_portfolios)
+        self.chunk_size = chunk_size
+        self.phase = 'resolving'
+        self.error = None
+        self._G = nx.Graph()
+        self._addresses = {}
+        self._profiles = {}
+        self._warnings = []
+        # Progress units: one per name for resolving and for each per-chunk fetch
+        self._steps = 3 + include_portfolios
+        self._done = 0
+        self._total = len(self.names) * self._steps
+        self._portfolio_errors = 0
+        self._lock = threading.Lock()
+        self._future = None
+        self._polled = None
+
+    def start(self):
+        """Run the build on the client loop in the background lane; it stops once it goes unpolled."""
+        self._polled = time.monotonic()
+        self._future = get_client().submit(background(self._watched()))
+        self._future.add_done_callback(self._finished)
+        return self
+
+    def cancel(self):
+        if self._future is not None:
+            self._future.cancel()
+
+    @property
+    def finished(self):
+        return self._future is not None and self._future.done()
+
+    def _finished(self, future):
+        with self._lock:
+            if future.cancelled():
+                self.phase = 'cancelled'
+            elif future.exception() is not None:
+                self.phase = 'failed'
+                self.error = str(future.exception())
+
+    def snapshot(self):
+        """The current ``graph`` (a ``CompactGraph``) plus ``phase``, ``status`` and ``progress`` (0-1)."""
+        with self._lock:
+            self._polled = time.monotonic()
+            # Only copy under the lock; the loop-side callbacks take it too, so freezing happens outside
+            G, profiles = self._G.copy(), dict(self._profiles)
+            snapshot = {
+                'warnings': list(self._warnings),
+                'phase': self.phase,
+                'status': self._status(),
+                'progress': self._done / self._total if self._total else 1.0,
+                'error': self.error,
+            }
+        return {'graph': CompactGraph.from_networkx(G, profiles), **snapshot}
+
+    def _status(self):
+        if self.phase == 'resolving':
+            return f"{PHASES[self.phase]}: {len(self._addresses)} of {len(self.names)} resolved"
+        if self.phase == 'edges':
+            return f"{PHASES[self.phase]}: {self._done} of {self._total} histories"
+        return PHASES[self.phase]
+
+    def _set_phase(self, phase, total):
+        with self._lock:
+            self.phase, self._done, self._total = phase, 0, total
+
+    async def run(self):
+        chunks = [self.names[i:i + self.chunk_size] for i in range(0, len(self.names), self.chunk_size)]
+        # Normalizing names is slow, so it runs off the loop one chunk ahead of resolution;
+        # otherwise the first chunk's responses would wait behind every later chunk's hashing
+        loop = asyncio.get_running_loop()
+        tasks = []
+        try:
+            for chunk in chunks:
+                await loop.run_in_executor(None, _namehash_all, chunk)
+                tasks.append(asyncio.ensure_future(self._resolve_chunk(chunk)))
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # A failed chunk fails the build; the others should stop spending upstream quota too
+            for task in tasks:
+                task.cancel()
+            raise
+        if self._portfolio_errors:
+            self._warn(f"Could not value token portfolios for {self._portfolio_errors} addresses")
+        if not self._addresses:
+            self._set_phase('done', 0)
+            return self.snapshot()
+
+        # Create edges only between addresses that actually transacted
+        addresses = dict(self._addresses)
+        self._set_phase('edges', len(addresses) * len(TX_KINDS))
+        edges, edge_errors = await build_social_edges(
+            addresses.values(), progress=lambda edges, done, total: self._add_edges(edges, addresses, done, total),
+        )
+        if edge_errors:
+            self._warn(f"Transaction history incomplete for {len(edge_errors)} address/tx-type pairs")
+
+        # Label nodes and their busiest outside counterparties with verified primary names
+        self._set_phase('labels', len(addresses))
+        top = {ens: edges.top_counterparties(addr.lower()) for ens, addr in addresses.items()}
+        outside = [other for pairs in top.values() for other, _ in pairs]
+        labels, _ = await reverse_resolve(list(addresses.values()) + outside)
+        with self._lock:
+            for ens, addr in addresses.items():
+                self._G.nodes[ens]['primary_name'] = labels.get(addr)
+                self._G.nodes[ens]['counterparties'] = [
+                    (labels.get(other) or f"{other[:6]}...{other[-4:]}", count) for other, count in top[ens]
+                ]
+            self.phase, self._done = 'done', self._total
+        return self.snapshot()
+
+    async def _watched(self):
+        """``run()``, cancelled once ``snapshot()`` has not been called for ``ABANDON_AFTER`` seconds."""
+        build = asyncio.ensure_future(self.run())
+        try:
+            while not build.done():
+                await asyncio.wait([build], timeout=1)
+                if not build.done() and time.monotonic() - self._polled > ABANDON_AFTER:
+                    build.cancel()
+            return await build
+        finally:
+            build.cancel()
+
+    async def _resolve_chunk(self, names):
+        addresses, errors = await resolve_names(names)
+        with self._lock:
+            for ens, error in errors.items():
+                self._warnings.append(f"Could not resolve {ens}: {error}")
+            for ens, addr in addresses.items():
+                self._addresses[ens] = addr
+                self._G.add_node(ens, address=addr)
+            self._done += len(names)
+        # Balances, portfolios and profile records for this chunk, each shown as soon as it lands
+        steps = [self._chunk_balances(addresses, len(names)), self._chunk_profiles(addresses, len(names))]
+        if self.include_portfolios:
+            steps.append(self._chunk_portfolios(addresses, len(names)))
+        await asyncio.gather(*steps)
+
+    async def _chunk_balances(self, addresses, count):
+        balances_wei = await fetch_chain_balances(list(addresses.values())) if addresses else {}
+        with self._lock:
+            for ens, addr in addresses.items():
+                if balances_wei.get(addr):
+                    self._G.nodes[ens]['balance'] = total_eth_wei(balances_wei[addr]) / WEI_PER_ETH
+                    self._G.nodes[ens]['chain_balances'] = balances_wei[addr]
+                else:
+                    self._warnings.append(f"Could not fetch balance for {ens}")
+            self._done += count
+
+    async def _chunk_portfolios(self, addresses, count):
+        portfolios, errors = await fetch_portfolios(addresses.values()) if addresses else ({}, {})
+        totals, _ = portfolio_totals(portfolios)
+        with self._lock:
+            for ens, addr in addresses.items():
+                if addr in totals:
+                    self._G.nodes[ens]['portfolio_usd'] = totals[addr]
+            self._portfolio_errors += len(errors)
+            self._done += count
+
+    async def _chunk_profiles(self, addresses, count):
+        profiles, _ = await fetch_profiles(list(addresses)) if addresses else ({}, {})
+        with self._lock:
+            self._profiles.update(profiles)
+            self._done += count
+
+    def _add_edges(self, edges, addresses, done, total):
+        with self._lock:
+            for ens_a, ens_b, attrs in named_edges(edges, addresses):
+                self._G.add_edge(ens_a, ens_b, **attrs)
+            self._done, self._total = done, total
+
+    def _warn(self, message):
+        with self._lock:
+            self._warnings.append(message)
+
+
+def _namehash_all(names):
+    for name in names:
+        try:
+            name_node(name)
+        except Exception:
+            pass
+
+
+def start_graph_build(ens_names, include_portfolios=False):
+    """Start a streaming build; poll ``snapshot()`` for partial results."""
+    return GraphBuild(ens_names, include_portfolios).start()
+
+
+async def build_graph(ens_names, include_portfolios=False):
+    """Resolve ``ens_names`` and build the transfer graph with balances, labels and profiles.
+
+    Returns the final ``snapshot()``: the ``graph`` as a ``CompactGraph``
+    (ETH balances summed over the configured chains, with per-chain amounts
+    in ``chain_balances``) and ``warnings`` (messages for the UI).
+    """
+    return await GraphBuild(ens_names, include_portfolios).run()
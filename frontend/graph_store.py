@@ -0,0 +1,310 @@
+"""Compact, content-addressed graph store shared by every session.
+
+A finished graph is frozen into a ``CompactGraph``: node names in sorted
+order, int32 IDs into a process-wide pool of 20-byte addresses, CSR
+adjacency arrays and NumPy attribute columns, instead of an ``nx.Graph``
+with a Python dict per node and edge. Graphs are stored under a key
+derived from the requested name set, so sessions that build the same list
+share one copy, and the store evicts least recently used graphs once
+their total size passes ``config.GRAPH_STORE_MAX_BYTES``. Sessions keep
+only the key.
+"""
+import hashlib
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+
+import networkx as nx
+import numpy as np
+
+from ensdata import config
+from ensdata.etherscan import WEI_PER_ETH
+
+HEX_DIGITS = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+
+
+class AddressPool:
+    """Interned 20-byte addresses; graphs hold int32 IDs into it.
+
+    Each address keeps its raw bytes plus a 40-bit mask of which hex
+    digits were upper case, so checksum strings are rebuilt exactly with
+    array operations. IDs are reference counted and reused once every
+    graph holding them is gone.
+    """
+
+    def __init__(self, capacity=1024):
+        self._raw = np.zeros((capacity, 20), dtype=np.uint8)
+        self._case = np.zeros((capacity, 5), dtype=np.uint8)
+        self._refs = np.zeros(capacity, dtype=np.int64)
+        self._ids = {}
+        self._free = []
+        self._size = 0
+        # Releases come from finalizers at arbitrary points, so they are queued and applied under the lock
+        self._released = deque()
+        self._lock = threading.Lock()
+
+    def intern(self, addresses):
+        """IDs for ``addresses`` (hex strings), taking one reference on each."""
+        with self._lock:
+            self._apply_releases()
+            ids = np.empty(len(addresses), dtype=np.int32)
+            for i, address in enumerate(addresses):
+                digits = address[2:] if address[:2] in ('0x', '0X') else address
+                raw = bytes.fromhex(digits)
+                id_ = self._ids.get(raw)
+                if id_ is None:
+                    id_ = self._free.pop() if self._free else self._grow()
+                    self._ids[raw] = id_
+                    self._raw[id_] = np.frombuffer(raw, dtype=np.uint8)
+                    self._case[id_] = np.packbits([c.isupper() for c in digits])
+                self._refs[id_] += 1
+                ids[i] = id_
+            return ids
+
+    def release(self, ids):
+        self._released.append(ids)
+
+    def strings(self, ids):
+        """``0x``-prefixed addresses for ``ids`` with their original letter case."""
+        with self._lock:
+            raw, case = self._raw[ids], self._case[ids]
+        chars = HEX_DIGITS[np.stack([raw >> 4, raw & 15], axis=-1).reshape(len(raw), 40)]
+        upper = np.unpackbits(case, axis=1)[:, :40].astype(bool) & (chars >= ord('a'))
+        chars = np.where(upper, chars - 32, chars).astype(np.uint8)
+        prefixed = np.concatenate([np.tile(np.frombuffer(b'0x', dtype=np.uint8), (len(raw), 1)), chars], axis=1)
+        return [row.tobytes().decode() for row in prefixed]
+
+    def _grow(self):
+        if self._size == len(self._refs):
+            capacity = 2 * len(self._refs)
+            self._raw = np.resize(self._raw, (capacity, 20))
+            self._case = np.resize(self._case, (capacity, 5))
+            self._refs = np.concatenate([self._refs, np.zeros(capacity - len(self._refs), dtype=np.int64)])
+        self._size += 1
+        return self._size - 1
+
+    def _apply_releases(self):
+        while self._released:
+            ids = self._released.popleft()
+            np.subtract.at(self._refs, ids, 1)
+            for id_ in np.unique(ids[self._refs[ids] == 0]):
+                del self._ids[self._raw[id_].tobytes()]
+                self._free.append(int(id_))
+
+    def __len__(self):
+        return len(self._ids)
+
+    @property
+    def nbytes(self):
+        # Arrays plus roughly 100 bytes per dict entry (key bytes object and slot)
+        return self._raw.nbytes + self._case.nbytes + self._refs.nbytes + 100 * len(self._ids)
+
+
+_pool = AddressPool()
+
+
+def _object_nbytes(values):
+    """Rough size of a sequence of small Python objects (strings, tuples, dicts)."""
+    total = sys.getsizeof(values)
+    for value in values:
+        if value is None:
+            continue
+        total += sys.getsizeof(value)
+        if isinstance(value, dict):
+            total += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+        elif isinstance(value, tuple):
+            total += sum(sys.getsizeof(item) for item in value)
+    return total
+
+
+class CompactGraph:
+    """Immutable name graph in arrays; node ``i`` is ``names[i]`` (sorted).
+
+    Node columns: ``address_ids``, ``order`` (build order), ``balance`` (ETH
+    total, NaN if unknown), ``chain_balances`` (``n x len(chains)`` native
+    amounts), ``portfolio_usd`` (NaN if unknown), ``primary_name`` and
+    ``counterparties``. Edges are the CSR arrays ``indptr``/``indices`` with
+    ``weight``, ``tx_count`` and ``value_eth`` per entry (both directions).
+    """
+
+    def __init__(self, names, addresses, order, balance, chain_balances, chains, portfolio_usd, primary_name,
+                 counterparties, indptr, indices, weight, tx_count, value_eth, profiles):
+        self.names = names
+        self.address_ids = _pool.intern(addresses)
+        weakref.finalize(self, _pool.release, self.address_ids)
+        self.order, self.balance, self.portfolio_usd = order, balance, portfolio_usd
+        self.chain_balances, self.chains = chain_balances, chains
+        self.primary_name, self.counterparties = primary_name, counterparties
+        self.indptr, self.indices = indptr, indices
+        self.weight, self.tx_count, self.value_eth = weight, tx_count, value_eth
+        self.profiles = profiles
+        self.key = self._structure_key()
+
+    @classmethod
+    def from_networkx(cls, G, profiles=None, chains=None):
+        """Freeze ``G`` (nodes carrying ``address`` and the build's attributes)."""
+        chains = tuple(chains or config.CHAINS)
+        order = {name: i for i, name in enumerate(G.nodes())}
+        names = tuple(sorted(order))
+        index = {name: i for i, name in enumerate(names)}
+        attrs = [G.nodes[name] for name in names]
+
+        chain_balances = np.full((len(names), len(chains)), np.nan)
+        for i, node in enumerate(attrs):
+            for j, chainid in enumerate(chains):
+                if chainid in node.get('chain_balances', {}):
+                    chain_balances[i, j] = node['chain_balances'][chainid] / WEI_PER_ETH
+
+        edges = [(index[a], index[b], data) for a, b, data in G.edges(data=True) if a != b]
+        rows = np.array([a for a, b, _ in edges] + [b for a, b, _ in edges], dtype=np.int32)
+        cols = np.array([b for a, b, _ in edges] + [a for a, b, _ in edges], dtype=np.int32)
+        data = [edge for _, _, edge in edges] * 2
+        entries = np.lexsort((cols, rows))
+
+        def column(key, default, dtype):
+            return np.array([edge.get(key, default) for edge in data], dtype=dtype)[entries]
+
+        return cls(
+            names=names,
+            addresses=[node['address'] for node in attrs],
+            order=np.array([order[name] for name in names], dtype=np.int32),
+            balance=np.array([node.get('balance', np.nan) for node in attrs], dtype=float),
+            chain_balances=chain_balances,
+            chains=chains,
+            portfolio_usd=np.array([node.get('portfolio_usd', np.nan) for node in attrs], dtype=float),
+            primary_name=tuple(node.get('primary_name') for node in attrs),
+            counterparties=tuple(tuple(node.get('counterparties', ())) for node in attrs),
+            indptr=np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=len(names)))]).astype(np.int32),
+            indices=cols[entries],
+            weight=column('weight', 1, np.float32),
+            tx_count=column('tx_count', 0, np.int32),
+            value_eth=column('value_eth', 0.0, np.float64),
+            profiles={name: dict(profile) for name, profile in (profiles or {}).items() if name in index and profile},
+        )
+
+    def _structure_key(self):
+        """Hash of the node names and edge set (what layouts and metrics depend on)."""
+        digest = hashlib.sha1()
+        digest.update("\0".join(self.names).encode())
+        digest.update(b"\1")
+        digest.update(self.indptr.tobytes())
+        digest.update(self.indices.tobytes())
+        return digest.hexdigest()
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def number_of_edges(self):
+        return len(self.indices) // 2
+
+    def addresses(self):
+        """Checksum addresses, aligned with ``names``."""
+        return _pool.strings(self.address_ids)
+
+    def neighbors(self, i):
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def edge_pairs(self):
+        """``(pairs, weights)``: each undirected edge once as a row of node indices."""
+        rows = np.repeat(np.arange(len(self.names), dtype=np.int32), np.diff(self.indptr))
+        upper = rows < self.indices
+        return np.column_stack([rows[upper], self.indices[upper]]), self.weight[upper]
+
+    def density(self):
+        n = len(self.names)
+        return 2 * self.number_of_edges / (n * (n - 1)) if n > 1 else 0.0
+
+    def to_networkx(self):
+        """Plain structure (names and weighted edges) for NetworkX algorithms."""
+        G = nx.Graph()
+        G.add_nodes_from(self.names)
+        pairs, weights = self.edge_pairs()
+        G.add_weighted_edges_from((self.names[a], self.names[b], w) for (a, b), w in zip(pairs.tolist(), weights.tolist()))
+        return G
+
+    @property
+    def nbytes(self):
+        arrays = (
+            self.address_ids, self.order, self.balance, self.chain_balances, self.portfolio_usd,
+            self.indptr, self.indices, self.weight, self.tx_count, self.value_eth,
+        )
+        return (
+            sum(array.nbytes for array in arrays)
+            + _object_nbytes(self.names) + _object_nbytes(self.primary_name) + _object_nbytes(self.counterparties)
+            + _object_nbytes(list(self.profiles.values()))
+        )
+
+
+def content_key(names, include_portfolios=False):
+    """Store key for a build of ``names``: the same name set always maps to the same key."""
+    digest = hashlib.sha1()
+    digest.update(",".join(map(str, config.CHAINS)).encode())
+    digest.update(b"\1portfolios" if include_portfolios else b"\1")
+    for name in sorted(set(names)):
+        digest.update(b"\0" + name.encode())
+    return digest.hexdigest()
+
+
+class GraphStore:
+    """LRU of ``CompactGraph`` by key, bounded by total bytes and entry age."""
+
+    def __init__(self, max_bytes=None, ttl=None):
+        self.max_bytes = max_bytes or config.GRAPH_STORE_MAX_BYTES
+        self.ttl = ttl or config.GRAPH_STORE_TTL
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._counts = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """The graph stored under ``key``, or None if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] > self.ttl:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self._counts['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counts['hits'] += 1
+            return entry[0]
+
+    def put(self, key, graph):
+        """Store ``graph``, then evict the least recently used graphs until under budget."""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (graph, time.monotonic(), graph.nbytes)
+            self._bytes += self._entries[key][2]
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                self._remove(next(iter(self._entries)))
+                self._counts['evictions'] += 1
+        return key
+
+    def _remove(self, key):
+        _, _, nbytes = self._entries.pop(key)
+        self._bytes -= nbytes
+
+    def stats(self):
+        with self._lock:
+            return {
+                'graphs': len(self._entries), 'bytes': self._bytes, 'max_bytes': self.max_bytes,
+                'addresses': len(_pool), 'address_pool_bytes': _pool.nbytes, **self._counts,
+            }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_graph_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = GraphStore()
+    return _store
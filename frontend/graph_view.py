@@ -0,0 +1,107 @@
+"""List Lookup views: the profile summary table, network metrics and the streaming graph-build fragment."""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from ensdata.chains import chain_columns
+from figures import build_network_figure
+from graph_analytics import get_analytics
+from graph_layout import get_layout
+from graph_store import get_graph_store
+
+
+def summary_frame(graph):
+    """ENS Profile Summary table for a ``CompactGraph``, in build order."""
+    addresses = graph.addresses()
+    profiles = [graph.profiles.get(name, {}) for name in graph.names]
+    table = {
+        "ENS Name": graph.names,
+        "Address": [f"{addr[:6]}...{addr[-4:]}" for addr in addresses],
+        "Full Address": addresses,
+        "Primary Name": [primary or "" for primary in graph.primary_name],
+        "Display Name": [profile.get('display', "") for profile in profiles],
+        "Twitter": [profile.get('twitter', "") for profile in profiles],
+        "GitHub": [profile.get('github', "") for profile in profiles],
+        "ETH Balance": _amounts(graph.balance),
+    }
+    if len(graph.chains) > 1:
+        # Per-chain native balances next to the ETH total
+        for column, amounts in zip(chain_columns({}, graph.chains), graph.chain_balances.T):
+            table[column] = _amounts(amounts)
+    table["Tokens (USD)"] = [f"${usd:,.2f}" if np.isfinite(usd) else "" for usd in graph.portfolio_usd]
+    table["Top Counterparties"] = [
+        ", ".join(f"{label} ({count})" for label, count in pairs) for pairs in graph.counterparties
+    ]
+    return pd.DataFrame(table).iloc[np.argsort(graph.order)].reset_index(drop=True)
+
+
+def _amounts(values):
+    return [f"{value:.4f}" if np.isfinite(value) else "" for value in values]
+
+
+def render_network_metrics(graph):
+    """Network Metrics panel: graph-level numbers and the top nodes by PageRank."""
+    # Cached per graph; a changed graph warm-starts from the last result
+    analytics = get_analytics(graph, previous=st.session_state.get('analytics_key'))
+    st.session_state['analytics_key'] = graph.key
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Components", analytics['components'])
+    with col2:
+        st.metric("Largest Component", analytics['largest_component'])
+    with col3:
+        st.metric("Communities", analytics['communities'])
+    with col4:
+        st.metric("Modularity", f"{analytics['modularity']:.2f}")
+    table = analytics['table'].sort_values('pagerank', ascending=False).head(50)
+    st.dataframe(table.rename(columns={
+        'pagerank': "PageRank", 'degree': "Degree", 'strength': "Strength (txs)",
+        'betweenness': "Betweenness", 'component': "Component", 'community': "Community",
+    }), use_container_width=True)
+    samples = analytics['betweenness_samples']
+    st.caption(
+        f"Betweenness {'exact' if samples >= len(graph) else f'estimated from {samples} sampled sources'}; "
+        f"computed in {analytics['timings']['total_s']:.2f}s"
+    )
+
+
+@st.fragment(run_every=0.5)
+def graph_build_progress():
+    """Stream a running graph build; only this fragment reruns until it finishes."""
+    build = st.session_state.get('graph_build')
+    if build is None:
+        return
+    col1, col2 = st.columns([5, 1])
+    with col2:
+        if not build.finished and st.button("✖ Cancel", use_container_width=True):
+            build.cancel()
+    snapshot = build.snapshot()
+    with col1:
+        st.progress(snapshot['progress'], text=snapshot['status'])
+
+    if build.finished:
+        # Hand the (possibly partial) results to the full page through the shared store and stop polling
+        del st.session_state['graph_build']
+        graph = snapshot['graph']
+        messages = [('warning', warning) for warning in snapshot['warnings']]
+        if snapshot['phase'] == 'failed':
+            messages.append(('error', f"Graph build failed: {snapshot['error']}"))
+        elif snapshot['phase'] == 'cancelled':
+            messages.append(('info', f"Build cancelled; showing the {len(graph)} names resolved so far"))
+        if len(graph):
+            # Only complete builds are shared under the name-set key
+            key = build.key if snapshot['phase'] == 'done' else f"{build.key}:partial"
+            st.session_state['graph_key'] = get_graph_store().put(key, graph)
+            if snapshot['phase'] == 'done':
+                messages.append(('success', f"✅ Graph built with {len(graph)} nodes and {graph.number_of_edges} edges"))
+        elif snapshot['phase'] == 'done':
+            messages.append(('error', "No valid ENS names resolved."))
+        st.session_state['graph_messages'] = messages
+        st.rerun()
+
+    graph = snapshot['graph']
+    if len(graph):
+        st.dataframe(summary_frame(graph), use_container_width=True)
+        pos = get_layout(graph, previous=st.session_state.get('layout_key'))
+        st.session_state['layout_key'] = graph.key
+        st.plotly_chart(build_network_figure(graph, pos), use_container_width=True, key="network_graph_partial")
@@ -1,12 +1,22 @@
 import os
+import sys
 import streamlit as st
 import networkx as nx
 import pandas as pd
-from web3 import Web3
-import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from ensdata import (
+    address_holdings, background, build_social_edges, fetch_portfolios, named_edges, portfolio_totals, resolve_name,
+    resolve_names, reverse_resolve, run, token_frame,
+)
+from ensdata.chains import chain_columns
+from ensdata.profile import fetch_profile, fetch_profiles
+from diagnostics import render_diagnostics
+from profile_view import render_profile
 
 st.set_page_config(page_title="ENS List Lookup", page_icon="🔗", layout="wide")
 st.title("ENS List Lookup & Social Graph")
+render_diagnostics()
 st.write("Enter a comma-separated list of ENS names to visualize their social network and click nodes for deep profile lookup.")
 
 ETHERSCAN_API_KEY = os.getenv('ETHERSCAN_API_KEY')
@@ -17,23 +27,16 @@ ens_list = st.text_area("ENS Names (comma separated)", "vitalik.eth, balajis.eth
 ens_names = [e.strip() for e in ens_list.split(",") if e.strip()]
 
 if st.button("Build Social Graph"):
-    w3 = Web3(Web3.HTTPProvider(ETH_RPC_URL))
-    addresses = {}
-    for ens in ens_names:
-        try:
-            addr = w3.ens.address(ens)
-            if addr:
-                addresses[ens] = addr
-        except Exception:
-            continue
-    # Build a simple graph: each ENS is a node, edges if they follow/interact (mock: all connected)
+    addresses, errors = run(background(resolve_names(ens_names)))
+    for ens, error in errors.items():
+        st.warning(f"Could not resolve {ens}: {error}")
+    # Build the graph: each ENS is a node, edges where the addresses transacted
     G = nx.Graph()
     for ens, addr in addresses.items():
         G.add_node(ens, address=addr)
-    # For demo, connect all nodes to each other
-    for i in range(len(ens_names)):
-        for j in range(i+1, len(ens_names)):
-            G.add_edge(ens_names[i], ens_names[j])
+    edges, _ = run(background(build_social_edges(addresses.values())))
+    for ens_a, ens_b, attrs in named_edges(edges, addresses):
+        G.add_edge(ens_a, ens_b, **attrs)
     st.write(f"Graph with {len(G.nodes)} nodes and {len(G.edges)} edges.")
     # Draw graph with clickable nodes
     import streamlit.components.v1 as components
@@ -48,56 +51,59 @@ if st.button("Build Social Graph"):
         if st.button(f"View {node} Profile"):
             st.session_state["selected_ens"] = node
             st.experimental_rerun()
-    st.write(pd.DataFrame({"ENS": list(addresses.keys()), "Address": list(addresses.values())}))
+    # Verified primary names for each address and its busiest outside counterparties
+    top = {ens: edges.top_counterparties(addr.lower()) for ens, addr in addresses.items()}
+    labels, _ = run(background(reverse_resolve(
+        list(addresses.values()) + [other for pairs in top.values() for other, _ in pairs]
+    )))
+    profiles, _ = run(background(fetch_profiles(list(addresses))))
+    # Token portfolios for every node in one concurrent, cached pass
+    portfolios, _ = run(background(fetch_portfolios(addresses.values()))) if SIM_API_KEY else ({}, {})
+    totals, total_usd = portfolio_totals(portfolios)
+    st.write(pd.DataFrame({
+        "ENS": list(addresses.keys()),
+        "Address": list(addresses.values()),
+        "Primary Name": [labels.get(addr) or "" for addr in addresses.values()],
+        "Display Name": [profiles.get(ens, {}).get('display', "") for ens in addresses],
+        "Twitter": [profiles.get(ens, {}).get('twitter', "") for ens in addresses],
+        "Tokens (USD)": [totals.get(addr) for addr in addresses.values()],
+        "Top Counterparties": [
+            ", ".join(f"{labels.get(other) or other[:10] + '...'} ({count})" for other, count in top[ens])
+            for ens in addresses
+        ],
+    }))
+    if totals:
+        st.write(f"**Total token value:** ${total_usd:,.2f}")
 
 # Deep profile lookup (reuse main page logic)
 if "selected_ens" in st.session_state:
     st.subheader(f"Profile for {st.session_state['selected_ens']}")
-    # ...existing logic from main page (copy from app.py)...
-    w3 = Web3(Web3.HTTPProvider(ETH_RPC_URL))
+    # Same data-access layer as the main page
     ens_name = st.session_state["selected_ens"]
-    address = w3.ens.address(ens_name)
+    address = run(resolve_name(ens_name))
     st.write(f"**Address:** {address}")
+    try:
+        render_profile(run(fetch_profile(ens_name)))
+    except Exception as e:
+        render_profile({}, e)
+
+    holdings = run(address_holdings(address, include_tokens=bool(SIM_API_KEY)))
     # ETH balance
-    bal_url = (
-        f"https://api.etherscan.io/v2/api"
-        f"?chainid=1"
-        f"&module=account"
-        f"&action=balance"
-        f"&address={address}"
-        f"&tag=latest"
-        f"&apikey={ETHERSCAN_API_KEY}"
-    )
-    bal_res = requests.get(bal_url)
-    bal_data = bal_res.json()
-    balance_wei = int(bal_data.get('result', '0'))
-    balance_eth = balance_wei / 1e18
+    balance_eth = holdings['balance_eth']
     st.write(f"**ETH Token Balance:** {balance_eth:.4f} ETH")
+    if len(holdings['chain_balances']) > 1:
+        st.write(pd.DataFrame([chain_columns(holdings['chain_balances'])]))
     # Token Holdings (SIM API)
     if SIM_API_KEY:
-        sim_bal_url = f"https://api.sim.dev.dune.com/v1/evm/balances/{address}?chain_ids=1&exclude_spam_tokens=true"
-        sim_headers = {"X-Sim-Api-Key": SIM_API_KEY}
         try:
-            sim_bal_res = requests.get(sim_bal_url, headers=sim_headers)
-            sim_bal_data = sim_bal_res.json()
-            balances = sim_bal_data.get('balances', [])
+            if holdings['tokens_error']:
+                raise holdings['tokens_error']
+            balances = holdings['tokens']
             if balances:
                 st.write("Token Holdings (SIM API):")
-                token_table = []
-                for bal in balances:
-                    symbol = bal.get('symbol', '')
-                    name = bal.get('name', '')
-                    amount = int(bal.get('amount', '0')) / (10 ** int(bal.get('decimals', 0))) if bal.get('decimals') else float(bal.get('amount', '0'))
-                    usd = bal.get('value_usd', None)
-                    price = bal.get('price_usd', None)
-                    token_table.append({
-                        "Symbol": symbol,
-                        "Name": name,
-                        "Amount": amount,
-                        "USD Value": usd,
-                        "Price": price
-                    })
-                df_tokens = pd.DataFrame(token_table)
-                st.dataframe(df_tokens)
+                df_tokens = token_frame(balances).rename(columns={
+                    'symbol': "Symbol", 'name': "Name", 'amount': "Amount", 'value_usd': "USD Value", 'price_usd': "Price",
+                })
+                st.dataframe(df_tokens[["Symbol", "Name", "Amount", "USD Value", "Price"]])
         except Exception as e:
             st.write(f"SIM API balances error: {e}")
@@ -0,0 +1,37 @@
+import streamlit as st
+
+from ensdata.profile import PROFILE_LABELS
+
+SOCIAL_KEYS = ['url', 'email', 'twitter', 'github', 'discord', 'telegram', 'reddit']
+COIN_KEYS = ['eth', 'btc', 'ltc', 'doge', 'contenthash']
+
+
+def render_profile(profile, error=None):
+    """Show an ENS profile (text records and coin addresses) from ``fetch_profile``."""
+    st.subheader("🪪 ENS Profile")
+    if error:
+        st.warning(f"Could not load ENS profile: {error}")
+        return
+    if not profile:
+        st.info("No ENS profile records set.")
+        return
+
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        avatar = profile.get('avatar', '')
+        # Only plain image URLs render directly; NFT/IPFS avatar URIs are listed below
+        if avatar.startswith(('http://', 'https://')):
+            st.image(avatar, width=120)
+    with col2:
+        if profile.get('display'):
+            st.markdown(f"**{profile['display']}**")
+        if profile.get('description'):
+            st.write(profile['description'])
+
+    rows = [
+        {"Record": PROFILE_LABELS.get(key, key), "Value": profile[key]}
+        for key in SOCIAL_KEYS + COIN_KEYS + [key for key in profile if key not in PROFILE_LABELS] + ['avatar']
+        if profile.get(key)
+    ]
+    if rows:
+        st.dataframe(rows, use_container_width=True, hide_index=True)
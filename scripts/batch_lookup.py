@@ -0,0 +1,62 @@
+"""Enrich a file (or stdin) of ENS names with address, balance, nametag and profile records.
+
+    python scripts/batch_lookup.py names.csv -o enriched.csv
+    cat names.txt | python scripts/batch_lookup.py - -o enriched.parquet --format parquet
+
+Progress is checkpointed next to the output; re-running the same command
+after a crash resumes where it stopped. Use --restart to start over.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ensdata.batch import Checkpoint, CsvSink, ParquetSink, output_columns, read_names, run_batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch ENS lookup with checkpoint/resume")
+    parser.add_argument('input', help="CSV/text file of ENS names, or - for stdin")
+    parser.add_argument('-o', '--output', required=True, help="Output CSV file or Parquet directory")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default=None, help="Defaults from the output extension")
+    parser.add_argument('--batch-size', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=4, help="Batches in flight at once")
+    parser.add_argument('--no-nametag', action='store_true', help="Skip Etherscan nametag lookups")
+    parser.add_argument('--no-profile', action='store_true', help="Skip ENS text-record lookups")
+    parser.add_argument('--restart', action='store_true', help="Ignore any existing checkpoint")
+    args = parser.parse_args()
+
+    fmt = args.format or ('parquet' if args.output.endswith('.parquet') else 'csv')
+    checkpoint_path = f"{args.output.rstrip('/')}.checkpoint.json"
+    if args.restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    checkpoint = Checkpoint(checkpoint_path)
+    if checkpoint.names_done:
+        print(f"Resuming after {checkpoint.names_done} names", file=sys.stderr)
+
+    columns = output_columns(profiles=not args.no_profile)
+    sink = ParquetSink if fmt == 'parquet' else CsvSink
+
+    def progress(done, rate):
+        print(f"\r{done} names done ({rate:,.1f} names/sec)", end='', file=sys.stderr, flush=True)
+
+    stream = sys.stdin if args.input == '-' else open(args.input, newline='')
+    try:
+        done = run_batch(
+            read_names(stream),
+            lambda position: sink(args.output, columns, position),
+            checkpoint,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            progress=progress,
+            nametags=not args.no_nametag,
+            profiles=not args.no_profile,
+        )
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    print(f"\nDone: {done} names written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
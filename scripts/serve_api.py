@@ -0,0 +1,29 @@
+"""Serve the headless JSON API (see ``ensdata/api.py``).
+
+    python scripts/serve_api.py --port 8000
+    curl localhost:8000/profile/vitalik.eth
+    curl -H 'Accept: application/x-ndjson' 'localhost:8000/profiles?names=vitalik.eth,nick.eth'
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ENS profile JSON API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--log-level', default='info')
+    args = parser.parse_args()
+
+    import uvicorn
+
+    from ensdata.api import create_app
+
+    uvicorn.run(create_app(), host=args.host, port=args.port, log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Build or update the local ENS index from registry/resolver events.
+
+    python scripts/sync_ens_index.py --db ens_index.sqlite
+    python scripts/sync_ens_index.py --db ens_index.sqlite --follow
+
+The first run walks every block since the registry deployment; later runs
+only fetch blocks after the stored cursor. Point ``ENSDATA_INDEX_DB`` at
+the same file to have lookups read from it.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ensdata import ENSIndex, background, run
+from ensdata.index import REGISTRY_START_BLOCK
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default=os.getenv('ENSDATA_INDEX_DB', 'ens_index.sqlite'), help="SQLite index file")
+    parser.add_argument('--from-block', type=int, default=REGISTRY_START_BLOCK,
+                        help="first block for a new index (ignored once a cursor exists)")
+    parser.add_argument('--to-block', type=int, help="stop at this block instead of the chain head")
+    parser.add_argument('--follow', type=int, metavar='SECONDS', nargs='?', const=12,
+                        help="keep polling for new blocks every SECONDS (default 12)")
+    args = parser.parse_args()
+
+    index = ENSIndex(args.db, start_block=args.from_block)
+
+    def progress(block, head, logs):
+        print(f"\rblock {block}/{head} ({logs} logs, span {index.span})", end='', file=sys.stderr, flush=True)
+
+    while True:
+        cursor = run(background(index.sync(args.to_block, progress)))
+        skipped = f" ({index.skipped} undecodable logs skipped)" if index.skipped else ""
+        print(f"\nindexed through block {cursor}{skipped}", file=sys.stderr)
+        if args.follow is None or args.to_block is not None:
+            break
+        time.sleep(args.follow)
+
+
+if __name__ == "__main__":
+    main()